@@ -0,0 +1,218 @@
+"""
+Омбор endpoint'ларининг async (ASGI) вариантлари — ``/api/async/...``.
+
+DRF view'лари синхрон, шунинг учун булар оддий Django async view'лари: async
+ORM (``aaggregate``, ``afirst``, ``async for``) ишлатилади. Сўров ва жавоб
+кўриниши sync endpoint'лар билан бир хил (``api.queries`` даги сўров қурувчилари).
+Ёзиш, ҳисобот ва фермер карточкаси/акт-сверка endpoint'лари фақат sync қолади;
+``warehouse/movements/`` нинг ``?stream=1`` режими ҳам фақат sync endpoint'да.
+
+Django 4.2 да async ORM сўровлари сўров (request) нинг битта sync потокида
+навбат билан бажарилади — битта жавоб sync view'дан тезроқ тайёр бўлмайди.
+Фойдаси фақат шунда: сўров базани кутаётганда ASGI worker'нинг event loop'и
+бошқа сўровларни қабул қилишда давом этади.
+"""
+
+from functools import wraps
+
+from django.http import HttpResponse, HttpResponseNotAllowed
+
+from . import queries
+from .cache import CONTRACTS, FARMERS, GIVEN, LEDGER, RECEIPTS, REFERENCE, WAREHOUSES, async_cached_response
+from .queries import (
+    MOVEMENTS,
+    STOCK_ID_PARAMS,
+    WarehouseScreen,
+    alist,
+    contract_type_param,
+    district_rows,
+    farmer_expense_rows,
+    farmer_expense_totals,
+    farmer_list,
+    farmer_list_totals,
+    farmer_summary_rows,
+    farmer_summary_totals,
+    filtered_expenses,
+    parse_ids,
+    parse_page,
+    renamed,
+    stock_totals_query,
+    stock_totals_result,
+    warehouse_product_totals,
+    warehouse_report_data,
+    warehouse_screen_data,
+)
+from .renderers import dumps
+
+
+def json_response(data, status=200, decimal_as_string=False):
+    # Сериализаторсиз sync жавоблар (Response(dict)) Decimal'ни сон қилиб беради
+    return HttpResponse(dumps(data, decimal_as_string=decimal_as_string), status=status, content_type="application/json")
+
+
+def get_only(view):
+    # Django 4.2 нинг require_GET декоратори async view'ни қўлламайди
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET"])
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def paginated_json(request, rows, get_totals, rename=None):
+    """
+    ``api.views.paginated_response`` нинг async варианти (``get_totals`` — корутина
+    қайтаради). Бу рўйхатлар sync'да ``FastJSONRenderer`` билан — Decimal сатр.
+    """
+    params = request.GET
+    rename = rename or {}
+    if "page" not in params and "page_size" not in params:
+        return json_response(list(renamed(await alist(rows), **rename)), decimal_as_string=True)
+
+    try:
+        page, page_size = parse_page(params)
+    except ValueError:
+        return json_response({"detail": "page ва page_size бутун сон бўлиши керак"}, status=400)
+
+    start = (page - 1) * page_size
+    rows = list(renamed(await alist(rows[start:start + page_size + 1]), **rename))
+
+    return json_response(
+        {
+            "page": page,
+            "page_size": page_size,
+            "has_next": len(rows) > page_size,
+            "totals": await get_totals(),
+            "results": rows[:page_size],
+        },
+        decimal_as_string=True,
+    )
+
+
+# ==========================================
+# 🔹 FARMERS / DISTRICTS
+# ==========================================
+
+@get_only
+@async_cached_response(FARMERS, CONTRACTS, REFERENCE)
+async def districts(request):
+    return json_response(await alist(district_rows(contract_type_param(request.GET))))
+
+
+@get_only
+@async_cached_response(FARMERS, LEDGER, REFERENCE)
+async def farmers(request):
+    try:
+        district_id = parse_ids(request.GET, ("district_id",))["district_id"]
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    active, rows = farmer_list(district_id)
+    return await paginated_json(request, rows, lambda: active.order_by().aaggregate(**farmer_list_totals()))
+
+
+@get_only
+@async_cached_response(FARMERS, CONTRACTS, REFERENCE)
+async def farmer_summary(request):
+    contract_type = contract_type_param(request.GET)
+    try:
+        district_id = parse_ids(request.GET, ("district_id",))["district_id"]
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    async def get_totals():
+        farmers, contracts, aggregates = farmer_summary_totals(contract_type, district_id)
+        return {
+            "count": await farmers.acount(),
+            **await contracts.aaggregate(**aggregates),
+        }
+
+    rows = farmer_summary_rows(queries.farmer_summary(contract_type, district_id))
+    return await paginated_json(request, rows, get_totals, rename={"massive": "massive_name"})
+
+
+# ==========================================
+# 🔹 WAREHOUSE
+# ==========================================
+
+@get_only
+@async_cached_response(RECEIPTS, GIVEN, FARMERS, REFERENCE)
+async def warehouse_products(request):
+    try:
+        ids = parse_ids(request.GET, ("warehouse_id", "district_id"))
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    rows = await alist(warehouse_product_totals(**ids))
+    return json_response(queries.warehouse_products(rows, request.GET.get("movement")))
+
+
+@get_only
+@async_cached_response(RECEIPTS, GIVEN, FARMERS, WAREHOUSES, REFERENCE)
+async def warehouse_movements(request):
+    """Тўлиқ рўйхат; ``?stream=1`` фақат sync endpoint'да (ASGI остида ҳам оқим)."""
+    try:
+        ids = parse_ids(request.GET, STOCK_ID_PARAMS)
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    movement = request.GET.get("movement")
+    if movement not in MOVEMENTS:
+        return json_response([])
+
+    movements, to_row = queries.warehouse_movements(movement, **ids)
+    rows = await alist(movements)
+    return json_response([to_row(index, row) for index, row in enumerate(rows, start=1)])
+
+
+@get_only
+@async_cached_response(RECEIPTS, GIVEN, FARMERS)
+async def warehouse_totals(request):
+    try:
+        ids = parse_ids(request.GET, STOCK_ID_PARAMS)
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    balances, aggregates = stock_totals_query(**ids)
+    return json_response(stock_totals_result(await balances.aaggregate(**aggregates)))
+
+
+@get_only
+@async_cached_response(RECEIPTS, GIVEN, FARMERS, REFERENCE, today_param="date")
+async def warehouse_report(request):
+    try:
+        data = await warehouse_report_data(request.GET)
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+    return json_response(data)
+
+
+@get_only
+@async_cached_response(RECEIPTS, GIVEN, FARMERS)
+async def warehouse_farmers(request):
+    try:
+        expenses = filtered_expenses(request.GET)
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    return await paginated_json(
+        request,
+        farmer_expense_rows(expenses),
+        lambda: expenses.aaggregate(**farmer_expense_totals()),
+    )
+
+
+@get_only
+@async_cached_response(RECEIPTS, GIVEN, FARMERS, WAREHOUSES, REFERENCE, today_param="date")
+async def warehouse_screen(request):
+    try:
+        screen = WarehouseScreen(request.GET)
+    except ValueError as error:
+        return json_response({"detail": str(error)}, status=400)
+
+    data = await warehouse_screen_data(screen)
+    if data is None:
+        return json_response({"detail": "Омбор топилмади"}, status=404)
+    return json_response(data)
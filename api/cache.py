@@ -0,0 +1,262 @@
+"""
+Фақат ўқиладиган API жавоблари учун версияли кэш.
+
+Калит: endpoint йўли + тартибланган query параметрлар + endpoint боғлиқ бўлган
+жадвалларнинг маълумот версиялари. Жадвал ўзгарганда (model сигналлари ёки
+``ledger_changed``) унинг версияси транзакция commit бўлгач оширилади ва эски
+калитлар ўз-ўзидан ишлатилмай қолади — ўчириш шарт эмас, TTL уларни тозалайди.
+
+Шу калит жавобнинг кучли ETag'и ҳам бўлади: ``If-None-Match`` мос келса 304
+қайтарилади ва маълумот на ўқилади, на сериализация қилинади.
+
+Backend ``settings.API_CACHE_ALIAS`` орқали танланади: стандарт — LocMemCache
+(битта процесс), бир нечта worker бўлса Redis/Memcached каби умумий кэш
+кўрсатилиши керак, акс ҳолда версиялар процесслар орасида бўлинмайди.
+"""
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from query.on_commit import commit_batch
+
+
+VERSION_KEY = "api:version:{}"
+RESPONSE_KEY = "api:response:{}"
+
+# Жадвал номлари — view'лар шуларга боғланади
+FARMERS = "farmers"
+CONTRACTS = "contracts"
+LEDGER = "ledger"
+GIVEN = "given"
+RECEIPTS = "receipts"
+WAREHOUSES = "warehouses"
+REFERENCE = "reference"
+
+
+def get_cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "API_CACHE_TIMEOUT", 300)
+
+
+# ==========================================
+# 🔹 HIT / MISS COUNTERS
+# ==========================================
+
+class CacheStats:
+    """Процесс ичидаги endpoint бўйича hit/miss ҳисоблагичлари."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0, "not_modified": 0})
+
+    def record(self, endpoint, outcome):
+        with self._lock:
+            self._counters[endpoint][outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: dict(counter) for name, counter in sorted(self._counters.items())}
+
+        return {
+            "hits": sum(counter["hits"] for counter in endpoints.values()),
+            "misses": sum(counter["misses"] for counter in endpoints.values()),
+            "not_modified": sum(counter["not_modified"] for counter in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = CacheStats()
+
+
+# ==========================================
+# 🔹 DATA VERSIONS
+# ==========================================
+
+def _initial_version():
+    # Версия кэшдан чиқиб кетса 1 дан бошланмаслиги керак, акс ҳолда эски
+    # жавоблар билан тўқнашиши мумкин
+    return int(time.time() * 1000)
+
+
+def get_versions(tables):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(table) for table in tables]
+    versions = cache.get_many(keys)
+
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+
+    # Кэш ёзмаса (DummyCache) версия номаълум — ``None``
+    return [versions.get(key) for key in keys]
+
+
+def bump_version(table):
+    cache = get_cache()
+    key = VERSION_KEY.format(table)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+class PendingBumps:
+    """Бир транзакцияда ўзгарган жадваллар — commit'да ҳар бири бир марта оширилади."""
+
+    def __init__(self, using):
+        self.using = using
+        self.tables = set()
+
+    def flush(self):
+        for table in sorted(self.tables):
+            bump_version(table)
+
+
+def bump_on_commit(table, using=DEFAULT_DB_ALIAS):
+    # Commit'дан олдин оширилса, параллел сўров эски маълумотни янги версия
+    # остида сақлаб қўйиши мумкин
+    pending = commit_batch(PendingBumps, using=using)
+    if pending is None:
+        bump_version(table)
+        return
+
+    pending.tables.add(table)
+
+
+# ==========================================
+# 🔹 VIEW DECORATOR
+# ==========================================
+
+def response_digest(request, tables, today_param=None):
+    """
+    Йўл, тартибланган параметрлар ва жадвал версияларидан ҳисобланган калит.
+    ``today_param`` берилмаган сўровда жавоб бугунги санага боғлиқ — у ҳам
+    калитга қўшилади. Версиялардан бири номаълум бўлса ``None``.
+    """
+    versions = get_versions(tables)
+    if None in versions:
+        return None
+
+    # ``GET`` — DRF Request'да ҳам, оддий Django HttpRequest'да ҳам бор
+    query = urlencode(sorted((key, value) for key, values in request.GET.lists() for value in values))
+    raw = f"{request.path}?{query}|{'.'.join(str(version) for version in versions)}"
+    if today_param and not request.GET.get(today_param):
+        raw += f"|{date.today().isoformat()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _not_modified(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
+
+def cached_response(*tables, today_param=None):
+    """
+    APIView ``get`` методини кэшлайди ва ETag / ``If-None-Match`` ни қўллайди.
+    Фақат 200 жавоблар сақланади; ``tables`` — жавоб боғлиқ бўлган жадваллар,
+    ``today_param`` — берилмаса бугунги сана олинадиган параметр.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            endpoint = view.__class__.__name__
+            digest = response_digest(request, tables, today_param)
+            if digest is None:
+                return method(view, request, *args, **kwargs)
+
+            etag = f'"{digest}"'
+            if _not_modified(request, etag):
+                stats.record(endpoint, "not_modified")
+                return _with_etag(Response(status=304), etag)
+
+            cache = get_cache()
+            key = RESPONSE_KEY.format(digest)
+            data = cache.get(key)
+            if data is not None:
+                stats.record(endpoint, "hits")
+                return _with_etag(Response(data), etag)
+
+            stats.record(endpoint, "misses")
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                # Оқимли жавоб кэшланмайди, лекин ETag билан текширилади
+                if not response.streaming:
+                    cache.set(key, response.data, timeout=get_timeout())
+                _with_etag(response, etag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def async_cached_response(*tables, today_param=None):
+    """
+    ``cached_response`` нинг async Django view'лар учун варианти. View JSON
+    ``HttpResponse`` қайтаради; кэшда унинг танаси (байтлар) сақланади.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            endpoint = view.__name__
+            # Версиялар синхрон кэш backend'идан ўқилади (Redis event loop'ни тўсмасин)
+            digest = await sync_to_async(response_digest)(request, tables, today_param)
+            if digest is None:
+                return await view(request, *args, **kwargs)
+
+            etag = f'"{digest}"'
+            if _not_modified(request, etag):
+                stats.record(endpoint, "not_modified")
+                return _with_etag(HttpResponseNotModified(), etag)
+
+            cache = get_cache()
+            key = RESPONSE_KEY.format(digest)
+            content = await cache.aget(key)
+            if content is not None:
+                stats.record(endpoint, "hits")
+                return _with_etag(HttpResponse(content, content_type="application/json"), etag)
+
+            stats.record(endpoint, "misses")
+            response = await view(request, *args, **kwargs)
+            if response.status_code == 200:
+                await cache.aset(key, response.content, timeout=get_timeout())
+                _with_etag(response, etag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _with_etag(response, etag):
+    response["ETag"] = etag
+    # Клиент ҳар сафар текшириши керак, лекин танаси ўзгармаса 304 олади
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,82 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit, urlunsplit
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Ишлаб турган серверларга параллел GET сўровлар юбориб, throughput (сўров/с) ва "
+        "кечикишларни (p50/p95) солиштиради. Масалан, бир хил worker сони билан:\n"
+        "  gunicorn config.wsgi -w 4 -b 127.0.0.1:8001\n"
+        "  uvicorn config.asgi:application --workers 4 --port 8002\n"
+        "  manage.py benchmark_concurrency "
+        "wsgi=http://127.0.0.1:8001/api/warehouse/screen/?warehouse_id=1&product_id=1&movement=report "
+        "asgi=http://127.0.0.1:8002/api/async/warehouse/screen/?warehouse_id=1&product_id=1&movement=report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("targets", nargs="+", help="номи=URL жуфтлари")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--requests", type=int, default=500, help="ҳар бир даражада сўровлар сони")
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument(
+            "--bust-cache",
+            action="store_true",
+            help="Ҳар бир сўровга ноёб параметр қўшиб, API кэшини четлаб ўтиш (SQL юкини ўлчаш учун).",
+        )
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["targets"]:
+            name, separator, url = target.partition("=")
+            if not separator or not url.startswith(("http://", "https://")):
+                raise CommandError(f"Нотўғри target: {target!r} (керак: номи=URL)")
+            targets.append((name, url))
+
+        self.stdout.write(f"{'target':<10} {'parallel':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for concurrency in options["concurrency"]:
+            for name, url in targets:
+                result = _run(url, concurrency, options["requests"], options["timeout"], options["bust_cache"])
+                self.stdout.write(
+                    f"{name:<10} {concurrency:>8} {result['throughput']:>8.1f} "
+                    f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['errors']:>7}"
+                )
+
+
+def _with_param(url, key, value):
+    parts = urlsplit(url)
+    query = f"{parts.query}&{urlencode({key: value})}" if parts.query else urlencode({key: value})
+    return urlunsplit(parts._replace(query=query))
+
+
+def _fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (HTTPError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def _run(url, concurrency, requests, timeout, bust_cache):
+    urls = [_with_param(url, "_bench", index) if bust_cache else url for index in range(requests)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda target: _fetch(target, timeout), urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency, ok in results if ok)
+    return {
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        "errors": sum(1 for _, ok in results if not ok),
+    }
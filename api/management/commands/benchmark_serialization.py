@@ -0,0 +1,147 @@
+import json
+import re
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import FarmerSerializer, MineralWarehouseReceiptSerializer
+from api.views import FarmerListAPIView, MineralWarehouseReceiptListAPIView
+from query.models.counterparties import Farmer
+from query.models.documents import MineralWarehouseReceipt, Warehouse
+from query.models.reference import District, Massive, Product, Region, Unit
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Фермерлар ва омбор кирими рўйхатларини ModelSerializer + JSONRenderer (олдинги йўл) "
+        "ва values() + FastJSONRenderer (ҳозирги йўл) орқали ўлчайди. Маълумотлар "
+        "транзакцияда яратилади ва охирида бекор қилинади."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        for rows in options["rows"]:
+            try:
+                with transaction.atomic():
+                    self._seed(rows)
+                    self._compare(rows, options["repeat"])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def _seed(self, rows):
+        region = Region.objects.create(name="Бенчмарк вилоят")
+        district = District.objects.create(region=region, name="Бенчмарк туман")
+        massive = Massive.objects.create(district=district, name="Бенчмарк массив")
+        product = Product.objects.create(name="Бенчмарк", unit=Unit.objects.create(name="Килограмм", short_name="кг"))
+        warehouse = Warehouse.objects.create(name="Бенчмарк омбор")
+
+        Farmer.objects.bulk_create(
+            [
+                Farmer(name=f"Фермер {index}", inn=f"{index:09d}", massive=massive, maydon=Decimal("12.50"))
+                for index in range(rows)
+            ],
+            batch_size=2000,
+        )
+        MineralWarehouseReceipt.objects.bulk_create(
+            [
+                MineralWarehouseReceipt(
+                    date="2026-03-01",
+                    invoice_number=str(index),
+                    transport_type="truck",
+                    transport_number="01A001AA",
+                    bag_count=20,
+                    product=product,
+                    quantity=Decimal("1000.00"),
+                    price=Decimal("4500.00"),
+                    amount=Decimal("4500000.00"),
+                    warehouse=warehouse,
+                )
+                for index in range(rows)
+            ],
+            batch_size=2000,
+        )
+
+    def _compare(self, rows, repeat):
+        cases = (
+            (
+                "farmers",
+                "/api/farmers/",
+                FarmerListAPIView,
+                lambda: FarmerSerializer(
+                    Farmer.objects
+                    .filter(is_active=True)
+                    .select_related("massive__district__region")
+                    .with_stored_balance()
+                    .order_by("massive__district__id", "massive__id", "name", "id"),
+                    many=True,
+                ).data,
+            ),
+            (
+                "receipts",
+                "/api/warehouse/receipts/",
+                MineralWarehouseReceiptListAPIView,
+                lambda: MineralWarehouseReceiptSerializer(
+                    MineralWarehouseReceipt.objects.select_related("warehouse", "product").order_by("-date", "-id"),
+                    many=True,
+                ).data,
+            ),
+        )
+        factory = APIRequestFactory()
+        dummy_cache = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        for name, path, view_class, serialize in cases:
+            view = view_class.as_view()
+
+            def before():
+                return JSONRenderer().render(serialize())
+
+            def after():
+                response = view(factory.get(path, HTTP_ACCEPT="application/json"))
+                return response.render().content
+
+            with override_settings(CACHES=dummy_cache):
+                before_body, before_time = _best_of(before, repeat)
+                after_body, after_time = _best_of(after, repeat)
+
+            same = _normalized(before_body) == _normalized(after_body)
+            self.stdout.write(
+                f"{name:<9} {rows:>7} қатор: олдин {before_time:6.2f} с, "
+                f"ҳозир {after_time:6.2f} с, x{before_time / after_time:4.1f}, "
+                f"{len(after_body) / 1_000_000:5.1f} МБ, {'мос' if same else 'ФАРҚ БОР'}"
+            )
+
+
+NUMBER = re.compile(r"-?\d+(\.\d+)?")
+
+
+def _normalized(body):
+    # SQLite COALESCE(..., 0) натижасини "0" деб қайтаради, PostgreSQL — "0.00";
+    # шунинг учун сонли сатрлар қиймат бўйича солиштирилади
+    return [
+        {key: Decimal(value) if isinstance(value, str) and NUMBER.fullmatch(value) else value for key, value in row.items()}
+        for row in json.loads(body)
+    ]
+
+
+def _best_of(func, repeat):
+    best = None
+    body = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return body, best
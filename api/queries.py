@@ -0,0 +1,721 @@
+"""
+API сўров қурувчилари — view'лардан ажратилган, HTTP'га боғлиқ бўлмаган қисм.
+
+Функциялар querystring ўрнига оддий қийматлар ёки ``params`` (``get()`` бор
+ҳар қандай mapping) олади ва queryset, aggregate ифодалари ёки тайёр қаторлар
+қайтаради. Уларни sync DRF view'лари (``api.views``), async view'лар
+(``api.async_views``) ва bot'нинг ORM backend'и (``tgbot/services/orm_backend.py``)
+бир хил ишлатади — жавоб кўриниши ҳамма жойда бир хил.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    Exists,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from query.activity import add_to_rollups
+from query.models.bot import BotUser, BotUserActivity
+from query.models.contracts import Contract
+from query.models.counterparties import Farmer
+from query.models.documents import GoodsGivenDocument, MineralWarehouseReceipt, Warehouse
+from query.models.reference import District, Product
+from query.models.stock import StockBalance, StockMovement
+
+
+CONTRACT_TYPES = {"futures", "forward", "storage"}
+MAX_PAGE_SIZE = 200
+
+def choices_display(field, choices):
+    """``get_FOO_display()`` нинг SQL'даги кўриниши."""
+    return Case(
+        *[When(**{field: value}, then=Value(str(label))) for value, label in choices],
+        default=F(field),
+        output_field=CharField(),
+    )
+
+
+def renamed(rows, **names):
+    """
+    ``values()`` ифодаси модель майдони номини (масалан ``massive``) ола олмайди —
+    бундай калитлар ``<name>_name`` кўринишида олиниб, шу ерда қайта номланади.
+    """
+    for row in rows:
+        for target, source in names.items():
+            row[target] = row.pop(source)
+        yield row
+
+
+def parse_page(params, default_size=25):
+    page = max(int(params.get("page") or 1), 1)
+    page_size = min(max(int(params.get("page_size") or default_size), 1), MAX_PAGE_SIZE)
+    return page, page_size
+
+
+def parse_ids(params, fields):
+    """``fields`` даги id параметрлари: бутун сон ёки ``None``; нотўғри бўлса ValueError."""
+    try:
+        return {field: int(params[field]) if params.get(field) else None for field in fields}
+    except ValueError:
+        raise ValueError(f"{', '.join(fields)} бутун сон бўлиши керак")
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+# ==========================================
+# 🔹 FARMERS / DISTRICTS
+# ==========================================
+
+def contract_type_param(params):
+    contract_type = params.get("contract_type")
+    return contract_type if contract_type in CONTRACT_TYPES else None
+
+
+def district_rows(contract_type=None):
+    """Фаол фермер ёки шартномаси бор туманлар (``contract_type`` бўйича)."""
+    contract_filter = Q()
+    if contract_type in CONTRACT_TYPES:
+        contract_filter = Q(massives__farmer__contracts__contract_type=contract_type)
+
+    return (
+        District.objects
+        .annotate(
+            farmers_count=Count(
+                "massives__farmer",
+                filter=Q(massives__farmer__is_active=True),
+                distinct=True,
+            ),
+            contracts_count=Count(
+                "massives__farmer__contracts",
+                filter=contract_filter,
+                distinct=True,
+            ),
+        )
+        .filter(Q(farmers_count__gt=0) | Q(contracts_count__gt=0))
+        .order_by("name")
+        .values("id", "name", "farmers_count", "contracts_count")
+    )
+
+
+def farmer_list(district_id=None):
+    """Фаол фермерлар сақланган баланс билан. Қайтаради: ``(farmers, values() қаторлари)``."""
+    farmers = (
+        Farmer.objects
+        .filter(is_active=True)
+        .with_stored_balance()
+        .order_by(
+            "massive__district__id",
+            "massive__id",
+            "name",
+            "id",
+        )
+    )
+    if district_id:
+        farmers = farmers.filter(massive__district_id=district_id)
+
+    rows = farmers.values(
+        "id",
+        "name",
+        "inn",
+        "maydon",
+        balance=F("balance_value"),
+        district=F("massive__district__name"),
+    )
+    return farmers, rows
+
+
+def farmer_list_totals():
+    return {
+        "count": Count("id"),
+        "balance": Coalesce(Sum("balance_record__balance"), Decimal("0.00")),
+    }
+
+
+def summary_farmers(contract_type=None, district_id=None):
+    farmers = Farmer.objects.all()
+    if contract_type:
+        # EXISTS — иккинчи JOIN суммаларни кўпайтириб юбормаслиги учун
+        farmers = farmers.filter(
+            Exists(Contract.objects.filter(farmer=OuterRef("pk"), contract_type=contract_type))
+        )
+    if district_id:
+        farmers = farmers.filter(massive__district_id=district_id)
+    return farmers
+
+
+def farmer_summary(contract_type=None, district_id=None):
+    """Фермерлар бўйича шартнома миқдори ва суммаси (annotate қилинган queryset)."""
+    contract_filter = Q(contracts__contract_type=contract_type) if contract_type else Q()
+
+    return (
+        summary_farmers(contract_type, district_id)
+        .annotate(
+            quantity=Coalesce(
+                Sum("contracts__planned_quantity", filter=contract_filter),
+                Decimal("0.00")
+            ),
+            amount=Coalesce(
+                Sum("contracts__total_amount", filter=contract_filter),
+                Decimal("0.00")
+            ),
+        )
+        .order_by("massive__district__id", "massive__id", "id")
+    )
+
+
+def farmer_summary_rows(farmers):
+    """``farmer_summary`` қаторлари; ``massive`` калити ``renamed`` билан тикланади."""
+    return farmers.values(
+        "id",
+        "name",
+        "inn",
+        "quantity",
+        "amount",
+        region=F("massive__district__region__name"),
+        district=F("massive__district__name"),
+        massive_name=F("massive__name"),
+    )
+
+
+def farmer_summary_totals(contract_type=None, district_id=None):
+    """Қайтаради: ``(фермерлар queryset, шартномалар queryset, aggregate ифодалари)``."""
+    farmers = summary_farmers(contract_type, district_id)
+    contracts = Contract.objects.filter(farmer__in=farmers)
+    if contract_type:
+        contracts = contracts.filter(contract_type=contract_type)
+
+    return farmers, contracts, {
+        "quantity": Coalesce(Sum("planned_quantity"), Decimal("0.00")),
+        "amount": Coalesce(Sum("total_amount"), Decimal("0.00")),
+    }
+
+
+# ==========================================
+# 🔹 WAREHOUSE
+# ==========================================
+
+def warehouse_rows():
+    return Warehouse.objects.order_by("name").values("id", "name")
+
+
+def warehouse_product_totals(warehouse_id=None, district_id=None):
+    """Маҳсулот бўйича кирим/чиқим (StockBalance GROUP BY); фильтр — ``warehouse_products``."""
+    balances = StockBalance.objects.filter(product__isnull=False)
+    if warehouse_id:
+        balances = balances.filter(warehouse_id=warehouse_id)
+
+    out_filter = Q(district_id=district_id) if district_id else Q()
+
+    return (
+        balances
+        .values("product_id")
+        .annotate(
+            product_name=F("product__name"),
+            received=Coalesce(Sum("quantity_in"), Decimal("0.00")),
+            has_in=Count("id", filter=Q(quantity_in__gt=0) | Q(amount_in__gt=0)),
+            given=Coalesce(Sum("quantity_out", filter=out_filter), Decimal("0.00")),
+            has_out=Count("id", filter=out_filter & (Q(quantity_out__gt=0) | Q(amount_out__gt=0))),
+        )
+        .order_by("product_name", "product_id")
+    )
+
+
+def warehouse_products(rows, movement=None):
+    """``movement`` (in / out / all) бўйича ҳаракати бор маҳсулотлар ва қолдиқ."""
+    with_in = movement in (None, "", "all", "in")
+    with_out = movement in (None, "", "all", "out")
+
+    products = []
+    for row in rows:
+        if not ((with_in and row["has_in"]) or (with_out and row["has_out"])):
+            continue
+
+        total_in = row["received"] if with_in else Decimal("0.00")
+        total_out = row["given"] if with_out else Decimal("0.00")
+        products.append(
+            {
+                "product_id": row["product_id"],
+                "product_name": row["product_name"] or "-",
+                "total_in": total_in,
+                "total_out": total_out,
+                "balance": total_in - total_out,
+            }
+        )
+    return products
+
+
+MOVEMENTS = {"in", "out", "report"}
+
+
+def warehouse_movements(movement, warehouse_id=None, product_id=None, district_id=None):
+    """
+    ``/warehouse/movements/`` қаторлари. Қайтаради: ``(values() queryset, to_row)``;
+    жавоб қатори — ``to_row(index, row)`` (``index`` 1 дан бошланади).
+    """
+    if movement == "in":
+        receipts = MineralWarehouseReceipt.objects.all()
+        if warehouse_id:
+            receipts = receipts.filter(warehouse_id=warehouse_id)
+        if product_id:
+            receipts = receipts.filter(product_id=product_id)
+
+        rows = receipts.order_by("-date", "-id").values(
+            "id",
+            "date",
+            "product_id",
+            "invoice_number",
+            "bag_count",
+            "quantity",
+            "warehouse__name",
+            "product__name",
+        )
+        return rows, _receipt_row
+
+    expense_items = GoodsGivenDocument.objects.all()
+    if warehouse_id:
+        expense_items = expense_items.filter(warehouse_id=warehouse_id)
+    if product_id:
+        expense_items = expense_items.filter(items__product_id=product_id)
+    if district_id:
+        expense_items = expense_items.filter(farmer__massive__district_id=district_id)
+
+    if movement == "report":
+        rows = (
+            expense_items
+            .values("date", "farmer__massive__district__name")
+            .annotate(quantity=Coalesce(Sum("items__quantity"), Decimal("0.00")))
+            .order_by("-date", "farmer__massive__district__name")
+        )
+        return rows, _report_row
+
+    rows = (
+        expense_items
+        .values(
+            "id",
+            "date",
+            "number",
+            "farmer__name",
+            "farmer__maydon",
+            "items__product_id",
+            "items__product__name",
+        )
+        .annotate(quantity=Coalesce(Sum("items__quantity"), Decimal("0.00")))
+        .order_by("-date", "-id", "items__product__name")
+    )
+    return rows, _expense_row
+
+
+def _receipt_row(index, row):
+    return {
+        "id": row["id"],
+        "date": row["date"],
+        "warehouse_name": row["warehouse__name"],
+        "product_id": row["product_id"],
+        "product_name": row["product__name"],
+        "invoice_number": row["invoice_number"],
+        "bag_count": row["bag_count"],
+        "quantity": row["quantity"],
+    }
+
+
+def _report_row(index, row):
+    return {
+        "date": row.get("date"),
+        "district_name": row.get("farmer__massive__district__name") or "-",
+        "quantity": row.get("quantity") or Decimal("0.00"),
+    }
+
+
+def _expense_row(index, row):
+    maydon = row.get("farmer__maydon") or Decimal("0.00")
+    quantity = row.get("quantity") or Decimal("0.00")
+    quantity_per_area = Decimal("0.00")
+    if maydon > 0:
+        quantity_per_area = quantity / maydon
+
+    return {
+        "id": index,
+        "date": row.get("date"),
+        "warehouse_name": None,
+        "number": row.get("number") or "-",
+        "farmer_name": row.get("farmer__name") or "-",
+        "product_id": row.get("items__product_id"),
+        "product_name": row.get("items__product__name") or "-",
+        "quantity": quantity,
+        "maydon": maydon,
+        "quantity_per_area": quantity_per_area,
+    }
+
+
+def stock_totals_query(warehouse_id=None, product_id=None, district_id=None):
+    """
+    Омбор кирим/чиқим жамланмаси — StockBalance бўйича битта агрегат сўров.
+    Қайтаради: ``(queryset, aggregate ифодалари)``; натижа ``stock_totals_result`` да.
+    """
+    balances = StockBalance.objects.all()
+    if warehouse_id:
+        balances = balances.filter(warehouse_id=warehouse_id)
+    if product_id:
+        balances = balances.filter(product_id=product_id)
+
+    # Кирим туманга боғланмаган, туман фильтри фақат чиқимга тегишли
+    out_filter = Q(district_id=district_id) if district_id else None
+    return balances, {
+        "total_in": Coalesce(Sum("quantity_in"), Decimal("0.00")),
+        "total_in_amount": Coalesce(Sum("amount_in"), Decimal("0.00")),
+        "total_out": Coalesce(Sum("quantity_out", filter=out_filter), Decimal("0.00")),
+        "total_out_amount": Coalesce(Sum("amount_out", filter=out_filter), Decimal("0.00")),
+    }
+
+
+def stock_totals_result(totals):
+    return {
+        "total_in": totals["total_in"],
+        "total_out": totals["total_out"],
+        "balance": totals["total_in"] - totals["total_out"],
+        "total_in_amount": totals["total_in_amount"],
+        "total_out_amount": totals["total_out_amount"],
+        "balance_amount": totals["total_in_amount"] - totals["total_out_amount"],
+    }
+
+
+def stock_totals(warehouse_id=None, product_id=None, district_id=None):
+    balances, aggregates = stock_totals_query(warehouse_id, product_id, district_id)
+    return stock_totals_result(balances.aggregate(**aggregates))
+
+
+STOCK_ID_PARAMS = ("warehouse_id", "product_id", "district_id")
+
+
+def filtered_expenses(params, fields=STOCK_ID_PARAMS):
+    """Журналнинг чиқим қаторлари, query параметрлари бўйича фильтрланган; нотўғри id'да ValueError."""
+    ids = parse_ids(params, fields)
+    return StockMovement.objects.filter(
+        given_item__isnull=False,
+        **{field: value for field, value in ids.items() if value is not None},
+    )
+
+
+def farmer_expense_rows(expenses):
+    """
+    Чиқим: фермер id бўйича битта қатор — миқдор, майдон ва кг/га SQL'да
+    ҳисобланади (бир хил номли фермерлар қўшилиб кетмайди).
+    """
+    return (
+        expenses
+        .values("farmer_id")
+        .annotate(
+            farmer_name=Coalesce(F("farmer__name"), Value("-")),
+            quantity=Sum(-F("quantity")),
+            maydon=Coalesce(Max("farmer__maydon"), Decimal("0.00")),
+        )
+        .annotate(
+            quantity_per_area=Case(
+                When(maydon__gt=0, then=F("quantity") / F("maydon")),
+                default=Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=18, decimal_places=2),
+            )
+        )
+        .order_by("farmer_name", "farmer_id")
+    )
+
+
+def farmer_expense_totals():
+    return {
+        "farmers": Count("farmer_id", distinct=True),
+        "quantity": Coalesce(Sum(-F("quantity")), Decimal("0.00")),
+    }
+
+
+def district_report(expenses, reference_date):
+    """
+    Свод: ``expenses`` (журналнинг чиқим қаторлари) бўйича туман кесимида
+    ``reference_date`` кундаги ва жами миқдор. Қайтаради: ``(GROUP BY queryset,
+    жами қатори учун aggregate ифодалари)``.
+    """
+    given = -F("quantity")
+    today = Q(date=reference_date)
+
+    rows = (
+        expenses
+        .values("district_id")
+        .annotate(
+            district_name=Coalesce(F("district__name"), Value("-")),
+            today_quantity=Coalesce(Sum(given, filter=today), Decimal("0.00")),
+            total_quantity=Sum(given),
+        )
+        .order_by("district_name", "district_id")
+    )
+    totals = {
+        "today_quantity": Coalesce(Sum(given, filter=today), Decimal("0.00")),
+        "total_quantity": Coalesce(Sum(given), Decimal("0.00")),
+    }
+    return rows, totals
+
+
+def parse_report_dates(params):
+    """``date`` (стандарт — бугун), ``date_from``, ``date_to``; нотўғри бўлса ValueError."""
+    def parse(name):
+        return date.fromisoformat(params[name]) if params.get(name) else None
+
+    try:
+        return parse("date") or date.today(), parse("date_from"), parse("date_to")
+    except ValueError:
+        raise ValueError("Сана YYYY-MM-DD форматида бўлиши керак")
+
+
+def report_expenses(params, date_from, date_to):
+    expenses = filtered_expenses(params)
+    if date_from:
+        expenses = expenses.filter(date__gte=date_from)
+    if date_to:
+        expenses = expenses.filter(date__lte=date_to)
+    return expenses
+
+
+# ==========================================
+# 🔹 WAREHOUSE SCREEN
+# ==========================================
+
+class WarehouseScreen:
+    """
+    Ботдаги омбор ҳаракатлари экрани сўровлари: омбор/маҳсулот номи, жамланмалар,
+    саҳифа қаторлари ва (свод учун) жами қатори. Сўровлар бир-бирига боғлиқ эмас —
+    sync ва async view уларни бир хил кетма-кет бажаради.
+    """
+
+    MOVEMENTS = MOVEMENTS
+
+    def __init__(self, params):
+        """Нотўғри параметрларда ValueError."""
+        self.movement = params.get("movement")
+        if self.movement not in self.MOVEMENTS:
+            raise ValueError("movement: in, out ёки report")
+
+        try:
+            self.warehouse_id = int(params.get("warehouse_id"))
+            self.product_id = int(params.get("product_id"))
+            self.page, self.page_size = parse_page(params)
+            # ``date`` берилмаса бугун — кэш калитига ҳам қўшилади (cached_response(today_param=...))
+            self.today = date.fromisoformat(params["date"]) if params.get("date") else date.today()
+            self.district_id = int(params["district_id"]) if params.get("district_id") else None
+        except (TypeError, ValueError):
+            raise ValueError("warehouse_id, product_id, district_id, page ва date нотўғри")
+
+    def names(self):
+        return (
+            Warehouse.objects
+            .filter(pk=self.warehouse_id)
+            .annotate(product_name=Subquery(Product.objects.filter(pk=self.product_id).values("name")[:1]))
+            .values("name", "product_name")
+        )
+
+    def totals(self):
+        return stock_totals_query(self.warehouse_id, self.product_id, self.district_id)
+
+    def expenses(self):
+        expenses = StockMovement.objects.filter(
+            warehouse_id=self.warehouse_id,
+            product_id=self.product_id,
+            given_item__isnull=False,
+        )
+        if self.district_id:
+            expenses = expenses.filter(district_id=self.district_id)
+        return expenses
+
+    def rows(self):
+        if self.movement == "in":
+            rows = (
+                MineralWarehouseReceipt.objects
+                .filter(warehouse_id=self.warehouse_id, product_id=self.product_id)
+                .order_by("-date", "-id")
+                .values("id", "date", "invoice_number", "bag_count", "quantity")
+            )
+        elif self.movement == "out":
+            rows = farmer_expense_rows(self.expenses())
+        else:
+            rows, _ = district_report(self.expenses(), self.today)
+
+        start = (self.page - 1) * self.page_size
+        return rows[start:start + self.page_size + 1]
+
+    def report_totals(self):
+        """Фақат сводда: ``(queryset, aggregate ифодалари)``, акс ҳолда ``None``."""
+        if self.movement != "report":
+            return None
+        expenses = self.expenses()
+        return expenses, district_report(expenses, self.today)[1]
+
+    def response(self, names, totals, rows, report_totals):
+        data = {
+            "warehouse_name": names["name"],
+            "product_name": names["product_name"] or "-",
+            "movement": self.movement,
+            "totals": stock_totals_result(totals),
+            "page": self.page,
+            "page_size": self.page_size,
+            "has_next": len(rows) > self.page_size,
+            "results": rows[:self.page_size],
+        }
+        if report_totals is not None:
+            data["date"] = self.today
+            data["report_totals"] = report_totals
+        return data
+
+
+async def warehouse_screen_data(screen):
+    """Экран жавоби async ORM орқали; омбор топилмаса ``None``."""
+    names = await screen.names().afirst()
+    if names is None:
+        return None
+
+    balances, aggregates = screen.totals()
+    totals = await balances.aaggregate(**aggregates)
+    rows = await alist(screen.rows())
+
+    report_totals = screen.report_totals()
+    if report_totals is not None:
+        expenses, report_aggregates = report_totals
+        report_totals = await expenses.aaggregate(**report_aggregates)
+
+    return screen.response(names, totals, rows, report_totals)
+
+
+async def warehouse_report_data(params):
+    """Свод жавоби (``WarehouseReportAPIView`` билан бир хил); нотўғри сана ёки id'да ValueError."""
+    reference_date, date_from, date_to = parse_report_dates(params)
+    expenses = report_expenses(params, date_from, date_to)
+    rows, totals = district_report(expenses, reference_date)
+    rows = await alist(rows)
+    totals = await expenses.aaggregate(**totals)
+
+    return {
+        "date": reference_date,
+        "date_from": date_from,
+        "date_to": date_to,
+        "results": rows,
+        "totals": totals,
+    }
+
+
+# ==========================================
+# 🔹 BOT USERS
+# ==========================================
+
+MAX_ACTIVITY_EVENTS = 1000
+
+
+@transaction.atomic
+def authorize_bot_user(telegram_id, full_name="", action=None):
+    """
+    Фойдаланувчини топади ёки (нофаол ҳолда) яратади, исмини янгилайди ва
+    ``action`` (``activity_fields``) берилса уни ёзади; рухсат бўлмаса ҳаракат
+    ``access_denied`` номи билан ёзилади. Қайтаради: ``{"allowed", "created"}``.
+    """
+    full_name = (full_name or "").strip()[:255]
+    user, created = BotUser.objects.get_or_create(
+        telegram_id=telegram_id,
+        defaults={
+            "full_name": full_name,
+            "is_active": False,
+        },
+    )
+    if full_name and user.full_name != full_name:
+        BotUser.objects.filter(pk=user.pk).update(full_name=full_name)
+
+    if action is not None:
+        if not user.is_active:
+            action = {**action, "action_name": "access_denied"}
+        BotUserActivity.objects.create(user=user, is_allowed=user.is_active, **action)
+
+    return {
+        "allowed": user.is_active,
+        "created": created,
+    }
+
+
+def activity_fields(data):
+    # JSON'да сон ёки рўйхат келиши мумкин — кесишдан олдин матнга ўтказилади
+    return {
+        "action_type": str(data.get("action_type") or BotUserActivity.ACTION_MESSAGE),
+        "action_name": str(data.get("action_name") or "unknown")[:100],
+        "action_payload": str(data.get("action_payload") or "")[:1000],
+    }
+
+
+def parse_flag(raw, default=True):
+    if raw is None:
+        return default
+    if isinstance(raw, str):
+        return raw.strip().lower() in {"1", "true", "yes", "y"}
+    return bool(raw)
+
+
+def parse_event_time(raw, now):
+    """Bot'даги ҳаракат вақти; йўқ, нотўғри ёки келажакдаги бўлса — ``now``."""
+    try:
+        moment = parse_datetime(raw) if isinstance(raw, str) else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        return now
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return min(moment, now)
+
+
+def record_activities(events):
+    """
+    Ҳодисалар рўйхатини ``bulk_create`` билан ёзади ва соатлик жамланмага
+    қўшади; фойдаланувчилар битта сўровда топилади, номаълумлари ташлаб кетилади.
+    Қайтаради: ``{"created", "skipped"}``.
+    """
+    telegram_ids = set()
+    for event in events:
+        try:
+            telegram_ids.add(int(event["telegram_id"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    users = dict(BotUser.objects.filter(telegram_id__in=telegram_ids).order_by().values_list("telegram_id", "id"))
+
+    now = timezone.now()
+    activities = []
+    for event in events:
+        try:
+            user_id = users.get(int(event["telegram_id"]))
+        except (KeyError, TypeError, ValueError):
+            user_id = None
+        if user_id is None:
+            continue
+
+        activities.append(BotUserActivity(
+            user_id=user_id,
+            is_allowed=parse_flag(event.get("is_allowed")),
+            created_at=parse_event_time(event.get("created_at"), now),
+            **activity_fields(event),
+        ))
+
+    with transaction.atomic():
+        BotUserActivity.objects.bulk_create(activities, batch_size=500)
+        add_to_rollups(activities)
+
+    return {"created": len(activities), "skipped": len(events) - len(activities)}
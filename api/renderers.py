@@ -0,0 +1,123 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # requirements.txt да бор; ўрнатилмаган муҳитда stdlib json
+    orjson = None
+
+
+def _default(value):
+    # DRF билан бир хил: Decimal — сатр (COERCE_DECIMAL_TO_STRING)
+    if isinstance(value, Decimal):
+        return str(value)
+    return _default_common(value)
+
+
+def _default_float(value):
+    # DRF JSONRenderer'и сериализаторсиз dict'лардаги Decimal'ни float қилади
+    if isinstance(value, Decimal):
+        return float(value)
+    return _default_common(value)
+
+
+def _default_common(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} JSON'га ўгирилмайди")
+
+
+def dumps(data, decimal_as_string=True):
+    """``values()`` қаторларини JSON байтларига ўгиради (orjson бўлса — у орқали)."""
+    default = _default if decimal_as_string else _default_float
+    if orjson is not None:
+        return orjson.dumps(data, default=default)
+    return json.dumps(data, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def to_json_types(data, decimal_as_string=True):
+    """
+    ``json.loads(dumps(data))`` билан бир хил турлар (dict/list/str/сон), лекин
+    байтларга ўгирмасдан — HTTP'сиз (bot'нинг ORM backend'и) жавоб кўриниши учун.
+    """
+    if isinstance(data, dict):
+        return {key: to_json_types(value, decimal_as_string) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_json_types(value, decimal_as_string) for value in data]
+    if data is None or isinstance(data, (str, int, float, bool)):
+        return data
+    return (_default if decimal_as_string else _default_float)(data)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    Катта рўйхатлар учун JSON renderer: DRF encoder'и ва отступларсиз, orjson
+    ўрнатилган бўлса ундан фойдаланади. Жавоб кўриниши JSONRenderer билан бир хил.
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps(data)
+
+
+# ==========================================
+# 🔹 STREAMING JSON ARRAY
+# ==========================================
+
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def stream_json_array(rows, decimal_as_string=True):
+    """
+    ``rows`` ни JSON массиви сифатида бўлак-бўлак чиқаради. Ҳар бир элемент
+    алоҳида қаторда бўлади — клиент массивни қатор-бақатор ўқий олади::
+
+        [
+        {...},
+        {...}
+        ]
+    """
+    buffer = bytearray(b"[\n")
+    separator = b""
+    for row in rows:
+        buffer += separator
+        buffer += dumps(row, decimal_as_string=decimal_as_string)
+        separator = b",\n"
+        if len(buffer) >= STREAM_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"\n]\n"
+    yield bytes(buffer)
+
+
+async def _async_chunks(chunks):
+    # Server-side cursor view очган уланишда қолиши учун бир хил sync thread'да
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def streaming_json_response(request, rows, decimal_as_string=True):
+    """
+    ``rows`` ни оқим сифатида қайтаради. ASGI остида Django sync итераторни
+    юборишдан олдин тўлиқ хотирага йиғади, шунинг учун у ерда бўлаклар async
+    итератор орқали (ҳар бўлак ``sync_to_async`` билан) ўқилади; WSGI — sync.
+    """
+    chunks = stream_json_array(rows, decimal_as_string=decimal_as_string)
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = _async_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type="application/json")
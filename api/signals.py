@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from query.balances import ledger_changed
+from query.models.accounting import Ledger
+from query.models.contracts import Contract
+from query.models.counterparties import Farmer
+from query.models.documents import GoodsGivenDocument, GoodsGivenItem, MineralWarehouseReceipt, Warehouse
+from query.models.reference import District, Massive, Product, Region
+from query.stock import stock_changed
+
+from .cache import CONTRACTS, FARMERS, GIVEN, LEDGER, RECEIPTS, REFERENCE, WAREHOUSES, bump_on_commit
+
+# ==========================================
+# 🔹 MODEL → CACHE TABLE
+# ==========================================
+
+CACHE_TABLES = {
+    Farmer: FARMERS,
+    Region: REFERENCE,
+    District: REFERENCE,
+    Massive: REFERENCE,
+    Product: REFERENCE,
+    Contract: CONTRACTS,
+    Ledger: LEDGER,
+    GoodsGivenDocument: GIVEN,
+    GoodsGivenItem: GIVEN,
+    MineralWarehouseReceipt: RECEIPTS,
+    Warehouse: WAREHOUSES,
+}
+
+
+def bump_model_version(sender, using, **kwargs):
+    bump_on_commit(CACHE_TABLES[sender], using=using)
+
+
+for model in CACHE_TABLES:
+    post_save.connect(bump_model_version, sender=model, dispatch_uid=f"api_cache_save_{model.__name__}")
+    post_delete.connect(bump_model_version, sender=model, dispatch_uid=f"api_cache_delete_{model.__name__}")
+
+
+@receiver(ledger_changed, dispatch_uid="api_cache_ledger_changed")
+def ledger_bulk_changed(sender, using, **kwargs):
+    bump_on_commit(LEDGER, using=using)
+
+
+@receiver(stock_changed, dispatch_uid="api_cache_stock_changed")
+def stock_bulk_changed(sender, using, **kwargs):
+    bump_on_commit(RECEIPTS, using=using)
+    bump_on_commit(GIVEN, using=using)
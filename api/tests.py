@@ -1,12 +1,21 @@
+import json
+from datetime import date, datetime
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from query.models.bot import BotUser, BotUserActivity
+from api.cache import stats as cache_stats
+
+from query.models.bot import BotUser, BotUserActivity, BotUserActivityHourly, BotUserSession
 from query.models.contracts import Contract
 from query.models.counterparties import Farmer
-from query.models.documents import GoodsGivenDocument, GoodsGivenItem, Warehouse
+from query.models.documents import GoodsGivenDocument, GoodsGivenItem, MineralWarehouseReceipt, Warehouse
 from query.models.reference import District, Massive, Product, Region, Unit
 
 
@@ -87,6 +96,190 @@ class WarehouseReportMovementsAPITest(TestCase):
         self.assertEqual(quantities_by_date[today], Decimal("200.00"))
         self.assertEqual(quantities_by_date[previous_day], Decimal("400.00"))
 
+    def test_totals_and_products_count_only_filtered_product_lines(self):
+        other = Product.objects.create(name="Ammofos", unit=self.product.unit)
+        with self.captureOnCommitCallbacks(execute=True):
+            MineralWarehouseReceipt.objects.create(
+                date="2026-01-15",
+                invoice_number="R-1",
+                transport_type="truck",
+                transport_number="01A001AA",
+                product=self.product,
+                quantity=Decimal("1000.00"),
+                amount=Decimal("1000.00"),
+                warehouse=self.warehouse,
+            )
+            document = GoodsGivenDocument.objects.create(
+                date="2026-02-01",
+                number="G-1",
+                farmer=self.farmer,
+                contract=self.contract,
+                warehouse=self.warehouse,
+            )
+            for product, quantity in ((self.product, "200.00"), (other, "300.00")):
+                GoodsGivenItem.objects.create(document=document, product=product, quantity=Decimal(quantity), price=Decimal("1.00"))
+
+        response = self.client.get(
+            "/api/warehouse/totals/",
+            {"warehouse_id": self.warehouse.id, "product_id": self.product.id},
+        )
+        self.assertEqual(response.data["total_in"], Decimal("1000.00"))
+        self.assertEqual(response.data["total_out"], Decimal("200.00"))
+        self.assertEqual(response.data["balance"], Decimal("800.00"))
+
+        response = self.client.get(
+            "/api/warehouse/products/",
+            {"warehouse_id": self.warehouse.id, "movement": "out", "district_id": self.farmer.massive.district_id},
+        )
+        self.assertEqual(
+            [(row["product_name"], row["total_in"], row["total_out"]) for row in response.data],
+            [("Ammofos", Decimal("0.00"), Decimal("300.00")), ("Selitra", Decimal("0.00"), Decimal("200.00"))],
+        )
+
+
+class WarehouseScreenAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        self.product = Product.objects.create(name="Selitra", unit=unit)
+        other = Product.objects.create(name="Ammofos", unit=unit)
+        district = District.objects.create(region=Region.objects.create(name="Toshkent"), name="Yangiyul")
+        farmer = Farmer.objects.create(
+            name="Farmer 1",
+            inn="123456789",
+            massive=Massive.objects.create(district=district, name="Massiv-1"),
+            maydon=Decimal("4.00"),
+        )
+        contract = Contract.objects.create(
+            farmer=farmer,
+            number="C-1",
+            date="2026-01-01",
+            planned_quantity=Decimal("100.00"),
+            price=Decimal("1000.00"),
+        )
+        self.warehouse = Warehouse.objects.create(name="Main Warehouse")
+        with self.captureOnCommitCallbacks(execute=True):
+            MineralWarehouseReceipt.objects.create(
+                date="2026-03-01",
+                invoice_number="R-1",
+                transport_type="truck",
+                transport_number="01A001AA",
+                product=self.product,
+                quantity=Decimal("100.00"),
+                warehouse=self.warehouse,
+            )
+            for day in ("2026-03-04", "2026-03-05"):
+                document = GoodsGivenDocument.objects.create(
+                    date=day, number=day, farmer=farmer, contract=contract, warehouse=self.warehouse
+                )
+                for product, quantity in ((self.product, "10.00"), (other, "7.00")):
+                    GoodsGivenItem.objects.create(document=document, product=product, quantity=Decimal(quantity), price=Decimal("1.00"))
+
+    def _screen(self, movement, **params):
+        return self.client.get(
+            "/api/warehouse/screen/",
+            {"warehouse_id": self.warehouse.id, "product_id": self.product.id, "movement": movement, **params},
+        )
+
+    def test_report_page_with_names_totals_and_day_split(self):
+        with self.assertNumQueries(4):
+            response = self._screen("report", date="2026-03-05")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["warehouse_name"], response.data["product_name"]), ("Main Warehouse", "Selitra"))
+        self.assertEqual(response.data["totals"]["balance"], Decimal("80.00"))
+        self.assertEqual(
+            [(row["district_name"], row["today_quantity"], row["total_quantity"]) for row in response.data["results"]],
+            [("Yangiyul", Decimal("10.00"), Decimal("20.00"))],
+        )
+        self.assertEqual(response.data["report_totals"]["total_quantity"], Decimal("20.00"))
+
+    def test_out_groups_by_farmer_and_pages_receipts(self):
+        response = self._screen("out")
+        row = response.data["results"][0]
+        self.assertEqual((row["farmer_name"], row["quantity"], row["quantity_per_area"]), ("Farmer 1", Decimal("20.00"), Decimal("5.00")))
+
+        response = self._screen("in", page_size=1)
+        self.assertEqual([row["invoice_number"] for row in response.data["results"]], ["R-1"])
+        self.assertFalse(response.data["has_next"])
+
+    def test_district_report_has_one_row_per_district_and_grand_total(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/warehouse/report/",
+                {"warehouse_id": self.warehouse.id, "date": "2026-03-05", "date_from": "2026-03-05"},
+            )
+
+        self.assertEqual(
+            [(row["district_name"], row["today_quantity"], row["total_quantity"]) for row in response.data["results"]],
+            [("Yangiyul", Decimal("17.00"), Decimal("17.00"))],
+        )
+        self.assertEqual(response.data["totals"], {"today_quantity": Decimal("17.00"), "total_quantity": Decimal("17.00")})
+
+        response = self.client.get("/api/warehouse/report/", {"product_id": self.product.id, "date": "2026-03-04"})
+        self.assertEqual(response.data["totals"], {"today_quantity": Decimal("10.00"), "total_quantity": Decimal("20.00")})
+        self.assertEqual(self.client.get("/api/warehouse/report/", {"date": "05.03.2026"}).status_code, 400)
+
+    def test_farmer_expenses_group_by_id_and_paginate(self):
+        namesake = Farmer.objects.create(name="Farmer 1", inn="987654321", massive=Massive.objects.first())
+        with self.captureOnCommitCallbacks(execute=True):
+            document = GoodsGivenDocument.objects.create(
+                date="2026-03-06", number="N-1", farmer=namesake, contract=Contract.objects.first(), warehouse=self.warehouse
+            )
+            GoodsGivenItem.objects.create(document=document, product=self.product, quantity=Decimal("3.00"), price=Decimal("1.00"))
+
+        response = self.client.get(
+            "/api/warehouse/farmers/",
+            {"warehouse_id": self.warehouse.id, "product_id": self.product.id, "page": 1, "page_size": 1},
+        )
+
+        data = json.loads(response.content)
+        self.assertTrue(data["has_next"])
+        self.assertEqual((data["totals"]["farmers"], Decimal(data["totals"]["quantity"])), (2, Decimal("23.00")))
+        self.assertEqual(
+            [(row["farmer_name"], Decimal(row["quantity"]), Decimal(row["quantity_per_area"])) for row in data["results"]],
+            [("Farmer 1", Decimal("20.00"), Decimal("5.00"))],
+        )
+
+    def test_non_integer_ids_are_rejected(self):
+        for path, params in (
+            ("warehouse/farmers/", {"district_id": "abc"}),
+            ("warehouse/report/", {"warehouse_id": "1.5"}),
+            ("warehouse/totals/", {"product_id": "x"}),
+            ("warehouse/products/", {"warehouse_id": "x"}),
+            ("warehouse/expense-districts/", {"warehouse_id": "x"}),
+            ("warehouse/movements/", {"movement": "out", "district_id": "x"}),
+            ("warehouse/screen/", {"warehouse_id": self.warehouse.id, "product_id": self.product.id, "movement": "out", "district_id": "x"}),
+        ):
+            self.assertEqual(self.client.get(f"/api/{path}", params).status_code, 400, path)
+            if path in {"warehouse/farmers/", "warehouse/report/", "warehouse/totals/", "warehouse/screen/"}:
+                self.assertEqual(self.client.get(f"/api/async/{path}", params).status_code, 400, path)
+
+    async def test_async_variants_match_sync_responses(self):
+        for path, params in (
+            ("warehouse/screen/", {"warehouse_id": self.warehouse.id, "product_id": self.product.id, "movement": "report", "date": "2026-03-05"}),
+            ("warehouse/screen/", {"warehouse_id": self.warehouse.id, "product_id": self.product.id, "movement": "out"}),
+            ("warehouse/report/", {"warehouse_id": self.warehouse.id, "date": "2026-03-05"}),
+            ("warehouse/farmers/", {"warehouse_id": self.warehouse.id, "page": 1}),
+            ("warehouse/totals/", {"warehouse_id": self.warehouse.id, "product_id": self.product.id}),
+            ("warehouse/products/", {"warehouse_id": self.warehouse.id, "movement": "out"}),
+            ("warehouse/movements/", {"warehouse_id": self.warehouse.id, "movement": "in"}),
+            ("warehouse/movements/", {"warehouse_id": self.warehouse.id, "movement": "out"}),
+            ("warehouse/movements/", {"warehouse_id": self.warehouse.id, "movement": "report"}),
+        ):
+            expected = await sync_to_async(self.client.get)(f"/api/{path}", params)
+            response = await self.async_client.get(f"/api/async/{path}", params)
+
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content), path)
+
+        response = await self.async_client.post("/api/async/warehouse/totals/")
+        self.assertEqual(response.status_code, 405)
+
+    def test_rejects_unknown_movement_and_warehouse(self):
+        self.assertEqual(self._screen("all").status_code, 400)
+        self.assertEqual(self.client.get("/api/warehouse/screen/", {"warehouse_id": 0, "product_id": 1, "movement": "in"}).status_code, 404)
+
 
 class BotUserActivityAnalyticsAPITest(TestCase):
     def setUp(self):
@@ -121,6 +314,131 @@ class BotUserActivityAnalyticsAPITest(TestCase):
         self.assertEqual(len(response.data['timeline']), 2)
         self.assertEqual(len(response.data['by_hour']), 24)
 
+    def test_analytics_reads_hourly_rollups_within_range(self):
+        for moment, action_name in (
+            ("2026-03-01 09:10", "start_handler"),
+            ("2026-03-01 09:50", "start_handler"),
+            ("2026-03-02 14:00", "contracts_menu"),
+        ):
+            activity = BotUserActivity.objects.create(
+                user=self.user,
+                action_type=BotUserActivity.ACTION_MESSAGE,
+                action_name=action_name,
+            )
+            # created_at — auto_now_add, шунинг учун вақт кейин берилади
+            BotUserActivity.objects.filter(pk=activity.pk).update(created_at=timezone.make_aware(datetime.fromisoformat(moment)))
+
+        call_command("compact_bot_activity", stdout=StringIO())
+        self.assertEqual(
+            sorted(BotUserActivityHourly.objects.values_list("action_name", "actions_count")),
+            [("contracts_menu", 1), ("start_handler", 2)],
+        )
+
+        response = self.client.get("/api/bot-user/activity/analytics/", {"from": "2026-03-01", "to": "2026-03-01"})
+
+        self.assertEqual(response.data["users"][0]["actions_count"], 2)
+        self.assertEqual(response.data["by_hour"][9], {"hour": 9, "actions_count": 2})
+        self.assertEqual(len(response.data["timeline"]), 2)
+        self.assertEqual([(str(row["day"]), row["actions_count"]) for row in response.data["by_day"]], [("2026-03-01", 2)])
+
+    def test_sessions_split_on_idle_gap_and_resume_incrementally(self):
+        def log(moment):
+            activity = BotUserActivity.objects.create(user=self.user, action_type=BotUserActivity.ACTION_MESSAGE, action_name="menu")
+            BotUserActivity.objects.filter(pk=activity.pk).update(created_at=timezone.make_aware(datetime.fromisoformat(moment)))
+
+        for moment in ("2026-03-01 09:00", "2026-03-01 09:10", "2026-03-01 15:00"):
+            log(moment)
+
+        # GET сессияларни ёзмайди — буйруқ янгилайди
+        with self.assertNumQueries(5):
+            user = self.client.get("/api/bot-user/activity/analytics/").data["users"][0]
+        self.assertEqual(user["sessions_count"], 0)
+
+        call_command("update_bot_sessions", stdout=StringIO())
+        user = self.client.get("/api/bot-user/activity/analytics/").data["users"][0]
+        self.assertEqual((user["sessions_count"], user["active_seconds"]), (2, 600))
+
+        # Янги ҳаракат охирги сессияни давом эттиради, эскиларига тегилмайди
+        log("2026-03-01 15:20")
+        call_command("update_bot_sessions", stdout=StringIO())
+
+        self.assertEqual(
+            list(BotUserSession.objects.order_by("started_at").values_list("actions_count", flat=True)),
+            [2, 2],
+        )
+        user = self.client.get("/api/bot-user/activity/analytics/").data["users"][0]
+        self.assertEqual((user["sessions_count"], user["active_seconds"]), (2, 1800))
+
+    def test_late_activity_rejoins_sessions_by_time(self):
+        def log(moment):
+            activity = BotUserActivity.objects.create(user=self.user, action_type=BotUserActivity.ACTION_MESSAGE, action_name="menu")
+            BotUserActivity.objects.filter(pk=activity.pk).update(created_at=timezone.make_aware(datetime.fromisoformat(moment)))
+
+        for moment in ("2026-03-01 09:00", "2026-03-01 09:50"):
+            log(moment)
+        call_command("update_bot_sessions", stdout=StringIO())
+        self.assertEqual(BotUserSession.objects.count(), 2)
+
+        # Bot буферидан кечикиб келган ҳаракат (id каттароқ, вақти олдинроқ) иккала сессияни улайди
+        log("2026-03-01 09:25")
+        call_command("update_bot_sessions", stdout=StringIO())
+        call_command("update_bot_sessions", stdout=StringIO())
+
+        self.assertEqual(
+            list(BotUserSession.objects.values_list("actions_count", "started_at", "ended_at")),
+            [(3, timezone.make_aware(datetime(2026, 3, 1, 9, 0)), timezone.make_aware(datetime(2026, 3, 1, 9, 50)))],
+        )
+
+    def test_new_activity_is_added_to_its_hour(self):
+        for _ in range(2):
+            BotUserActivity.objects.create(user=self.user, action_type=BotUserActivity.ACTION_CALLBACK, action_name="farmers_menu")
+
+        rollup = BotUserActivityHourly.objects.get(user=self.user, action_name="farmers_menu")
+        self.assertEqual(rollup.actions_count, 2)
+        self.assertEqual(rollup.hour.minute, 0)
+
+    def test_authorize_checks_access_and_logs_in_one_request(self):
+        payload = {"telegram_id": self.user.telegram_id, "full_name": "Renamed", "action_type": "callback", "action_name": "farmers_menu"}
+        response = self.client.post("/api/bot-user/authorize/", payload, format="json")
+
+        self.assertEqual(response.data, {"allowed": True, "created": False})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.full_name, "Renamed")
+        self.assertEqual(list(BotUserActivity.objects.values_list("action_name", "is_allowed")), [("farmers_menu", True)])
+
+        response = self.client.post("/api/bot-user/authorize/", {"telegram_id": 1, "action_name": "farmers_menu"}, format="json")
+
+        self.assertEqual(response.data, {"allowed": False, "created": True})
+        self.assertTrue(BotUserActivity.objects.filter(user__telegram_id=1, action_name="access_denied", is_allowed=False).exists())
+
+    def test_bulk_activity_writes_rows_and_rollups(self):
+        events = [
+            {"telegram_id": self.user.telegram_id, "action_name": "farmers_menu", "created_at": "2026-03-01T09:05:00"},
+            {"telegram_id": self.user.telegram_id, "action_name": "farmers_menu", "created_at": "2026-03-01T09:40:00"},
+            {"telegram_id": self.user.telegram_id, "action_name": "contracts_menu", "is_allowed": "false"},
+            {"telegram_id": 1, "action_name": "farmers_menu"},
+        ]
+        response = self.client.post("/api/bot-user/activity/bulk/", {"events": events}, format="json")
+
+        self.assertEqual(response.data, {"created": 3, "skipped": 1})
+        rollup = BotUserActivityHourly.objects.get(action_name="farmers_menu")
+        self.assertEqual((rollup.actions_count, rollup.hour.hour, rollup.last_activity.minute), (2, 9, 40))
+        self.assertFalse(BotUserActivityHourly.objects.get(action_name="contracts_menu").is_allowed)
+
+    def test_bulk_activity_coerces_non_string_fields(self):
+        events = [
+            {"telegram_id": self.user.telegram_id, "action_name": 42, "action_payload": ["a", 1]},
+            {"telegram_id": self.user.telegram_id, "action_name": "farmers_menu", "action_payload": {"page": 2}},
+        ]
+        response = self.client.post("/api/bot-user/activity/bulk/", {"events": events}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"created": 2, "skipped": 0})
+        self.assertEqual(
+            sorted(BotUserActivity.objects.values_list("action_name", "action_payload")),
+            [("42", "['a', 1]"), ("farmers_menu", "{'page': 2}")],
+        )
+
     def test_create_activity_endpoint_logs_event(self):
         response = self.client.post(
             '/api/bot-user/activity/',
@@ -177,3 +495,335 @@ class FarmerSummaryContractTypeFilterAPITest(TestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(Decimal(str(response.data[0]['quantity'])), Decimal('50.00'))
         self.assertEqual(Decimal(str(response.data[0]['amount'])), Decimal('100000.00'))
+
+
+class FarmerBalanceAsOfAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        self.farmer = Farmer.objects.create(name="Farmer 1", inn="123456789")
+        contract = Contract.objects.create(
+            farmer=self.farmer,
+            number="C-1",
+            date="2026-01-01",
+            planned_quantity=Decimal("100.00"),
+            price=Decimal("1000.00"),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for number, day in (("G-1", "2026-01-10"), ("G-2", "2026-02-10")):
+                document = GoodsGivenDocument.objects.create(
+                    date=day, number=number, farmer=self.farmer, contract=contract
+                )
+                GoodsGivenItem.objects.create(
+                    document=document,
+                    product=product,
+                    quantity=Decimal("1.00"),
+                    price=Decimal("100.00"),
+                    vat_rate="0",
+                )
+
+    def test_balance_as_of_date(self):
+        response = self.client.get(f"/api/farmers/{self.farmer.id}/balance/", {"as_of": "2026-02-01"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(str(response.data["balance"])), Decimal("100.00"))
+
+        response = self.client.get(f"/api/farmers/{self.farmer.id}/balance/", {"as_of": "2026-02-28"})
+        self.assertEqual(Decimal(str(response.data["balance"])), Decimal("200.00"))
+
+    def test_rejects_bad_date_and_unknown_farmer(self):
+        self.assertEqual(
+            self.client.get(f"/api/farmers/{self.farmer.id}/balance/", {"as_of": "01.02.2026"}).status_code,
+            400,
+        )
+        self.assertEqual(self.client.get("/api/farmers/999999/balance/").status_code, 404)
+
+
+class FarmerStatementAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        self.farmer = Farmer.objects.create(name="Farmer 1", inn="123456789")
+        contract = Contract.objects.create(
+            farmer=self.farmer,
+            number="C-1",
+            date="2026-01-01",
+            planned_quantity=Decimal("100.00"),
+            price=Decimal("1000.00"),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for index, day in enumerate(("2026-01-10", "2026-01-10", "2026-02-01", "2026-03-05", "2026-03-06")):
+                document = GoodsGivenDocument.objects.create(
+                    date=day, number=f"G-{index}", farmer=self.farmer, contract=contract
+                )
+                GoodsGivenItem.objects.create(
+                    document=document,
+                    product=product,
+                    quantity=Decimal("1.00"),
+                    price=Decimal("100.00"),
+                    vat_rate="0",
+                )
+
+    def test_pages_follow_keyset_cursor_with_running_balance(self):
+        url = f"/api/farmers/{self.farmer.id}/statement/"
+
+        first = self.client.get(url, {"limit": 2}).data
+        self.assertEqual([row["document_number"] for row in first["results"]], ["G-0", "G-1"])
+        self.assertEqual([row["balance"] for row in first["results"]], [Decimal("100.00"), Decimal("200.00")])
+        self.assertIsNotNone(first["next_cursor"])
+
+        second = self.client.get(url, {"limit": 2, "after": first["next_cursor"]}).data
+        self.assertEqual(second["opening_balance"], Decimal("200.00"))
+        self.assertEqual([row["document_number"] for row in second["results"]], ["G-2", "G-3"])
+        self.assertEqual(second["results"][-1]["balance"], Decimal("400.00"))
+
+        last = self.client.get(url, {"limit": 2, "after": second["next_cursor"]}).data
+        self.assertEqual([row["kind"] for row in last["results"]], ["given"])
+        self.assertIsNone(last["next_cursor"])
+
+    def test_rejects_foreign_cursor(self):
+        response = self.client.get(f"/api/farmers/{self.farmer.id}/statement/", {"after": 999999})
+        self.assertEqual(response.status_code, 400)
+
+
+class FarmerPaginationAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        region = Region.objects.create(name="Toshkent")
+        self.district = District.objects.create(region=region, name="Yangiyul")
+        other = District.objects.create(region=region, name="Chinoz")
+        massive = Massive.objects.create(district=self.district, name="Massiv-1")
+        other_massive = Massive.objects.create(district=other, name="Massiv-2")
+
+        for index in range(5):
+            farmer = Farmer.objects.create(name=f"Farmer {index}", inn=f"10{index}", massive=massive)
+            for contract_type in ("futures", "forward"):
+                Contract.objects.create(
+                    farmer=farmer,
+                    number=f"{contract_type}-{index}",
+                    contract_type=contract_type,
+                    date="2026-01-01",
+                    planned_quantity=Decimal("10.00"),
+                    price=Decimal("1000.00"),
+                )
+        Farmer.objects.create(name="Other farmer", inn="200", massive=other_massive)
+
+    def test_farmers_page_filtered_by_district(self):
+        response = self.client.get("/api/farmers/", {"district_id": self.district.id, "page": 2, "page_size": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Farmer 2", "Farmer 3"])
+        self.assertTrue(response.data["has_next"])
+        self.assertEqual(response.data["totals"]["count"], 5)
+
+    def test_summary_page_totals_are_not_multiplied_by_contract_filter(self):
+        response = self.client.get(
+            "/api/farmers/summary/",
+            {"contract_type": "forward", "district_id": self.district.id, "page": 3, "page_size": 2},
+        )
+
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertFalse(response.data["has_next"])
+        self.assertEqual(response.data["totals"]["count"], 5)
+        self.assertEqual(Decimal(str(response.data["totals"]["quantity"])), Decimal("50.00"))
+
+    def test_non_integer_district_is_rejected(self):
+        for url in ("/api/farmers/", "/api/farmers/summary/"):
+            response = self.client.get(url, {"district_id": "abc"})
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["detail"], "district_id бутун сон бўлиши керак")
+
+    async def test_async_variants_match_sync_responses(self):
+        for path, params in (
+            ("farmers/", {"district_id": self.district.id}),
+            ("farmers/", {"district_id": self.district.id, "page": 2, "page_size": 2}),
+            ("farmers/summary/", {"contract_type": "forward", "page": 1, "page_size": 2}),
+            ("districts/", {"contract_type": "futures"}),
+        ):
+            expected = await sync_to_async(self.client.get)(f"/api/{path}", params)
+            response = await self.async_client.get(f"/api/async/{path}", params)
+
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content), path)
+
+    def test_districts_with_counts(self):
+        response = self.client.get("/api/districts/", {"contract_type": "futures"})
+
+        self.assertEqual(
+            [(row["name"], row["farmers_count"], row["contracts_count"]) for row in response.data],
+            [("Chinoz", 1, 0), ("Yangiyul", 5, 5)],
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "api-cache-test"}}
+)
+class ApiResponseCacheTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache_stats.reset()
+        with self.captureOnCommitCallbacks(execute=True):
+            Warehouse.objects.create(name="Main Warehouse")
+
+    def test_cached_until_model_signal_bumps_version(self):
+        self.assertEqual(len(self.client.get("/api/warehouse/list/").data), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get("/api/warehouse/list/").data), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Warehouse.objects.create(name="Second Warehouse")
+
+        self.assertEqual(len(self.client.get("/api/warehouse/list/").data), 2)
+
+        counters = self.client.get("/api/cache/stats/").data["endpoints"]["WarehouseListAPIView"]
+        self.assertEqual(counters, {"hits": 1, "misses": 2, "not_modified": 0})
+
+    def test_conditional_get_returns_304_until_data_changes(self):
+        response = self.client.get("/api/warehouse/list/")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/warehouse/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Warehouse.objects.create(name="Second Warehouse")
+
+        response = self.client.get("/api/warehouse/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_query_param_order_does_not_change_key(self):
+        self.client.get("/api/warehouse/totals/", {"warehouse_id": 1, "product_id": 2})
+        self.client.get("/api/warehouse/totals/?product_id=2&warehouse_id=1")
+
+        self.assertEqual(cache_stats.snapshot()["endpoints"]["MineralWarehouseTotalsAPIView"]["hits"], 1)
+
+    def test_report_without_date_is_keyed_by_today(self):
+        def report(today, **headers):
+            with mock.patch("api.cache.date") as cache_date, mock.patch("api.queries.date") as queries_date:
+                cache_date.today.return_value = queries_date.today.return_value = today
+                queries_date.fromisoformat = date.fromisoformat
+                return self.client.get("/api/warehouse/report/", **headers)
+
+        first = report(date(2026, 3, 5))
+        self.assertEqual(first.data["date"], date(2026, 3, 5))
+        self.assertEqual(report(date(2026, 3, 5), HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        next_day = report(date(2026, 3, 6), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(next_day.status_code, 200)
+        self.assertEqual(next_day.data["date"], date(2026, 3, 6))
+        self.assertNotEqual(next_day["ETag"], first["ETag"])
+
+    async def test_async_view_serves_cached_body_and_304(self):
+        first = await self.async_client.get("/api/async/warehouse/totals/")
+        second = await self.async_client.get("/api/async/warehouse/totals/")
+        self.assertEqual(second.content, first.content)
+
+        response = await self.async_client.get("/api/async/warehouse/totals/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            cache_stats.snapshot()["endpoints"]["warehouse_totals"],
+            {"hits": 1, "misses": 1, "not_modified": 1},
+        )
+
+
+class LeanListSerializationAPITest(TestCase):
+    def test_receipts_keep_serializer_shape(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        warehouse = Warehouse.objects.create(name="Main Warehouse")
+        MineralWarehouseReceipt.objects.create(
+            date="2026-03-01",
+            invoice_number="7",
+            transport_type="truck",
+            transport_number="01A001AA",
+            bag_count=20,
+            product=product,
+            quantity=Decimal("1000.00"),
+            price=Decimal("2.00"),
+            warehouse=warehouse,
+        )
+
+        response = APIClient().get("/api/warehouse/receipts/")
+        row = response.json()[0]
+
+        self.assertEqual(row["product"], "Selitra")
+        self.assertEqual(row["warehouse"], "Main Warehouse")
+        self.assertEqual(row["transport_type_display"], "Юк машинаси")
+        self.assertEqual(row["date"], "2026-03-01")
+        self.assertEqual(row["quantity"], "1000.00")
+
+    def test_expenses_keep_numeric_total_amount(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        farmer = Farmer.objects.create(name="Farmer 1", inn="123456789")
+        contract = Contract.objects.create(
+            farmer=farmer, number="C-1", date="2026-01-01", planned_quantity=Decimal("10.00"), price=Decimal("1.00")
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            document = GoodsGivenDocument.objects.create(
+                date="2026-03-04", number="G-1", farmer=farmer, contract=contract, warehouse=Warehouse.objects.create(name="Main")
+            )
+            GoodsGivenItem.objects.create(document=document, product=product, quantity=Decimal("3.00"), price=Decimal("2.50"))
+        client = APIClient()
+
+        for response in (client.get("/api/warehouse/expenses/"), client.get("/api/warehouse/expenses/", {"stream": 1})):
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+            row = json.loads(body)[0]
+
+            self.assertEqual(Decimal(row["quantity"]), Decimal("3.00"))
+            self.assertIsInstance(row["total_amount"], float)
+            self.assertEqual(row["total_amount"], float(document.total_amount))
+
+    def test_stream_mode_writes_one_element_per_line(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        warehouse = Warehouse.objects.create(name="Main Warehouse")
+        for index in range(3):
+            MineralWarehouseReceipt.objects.create(
+                date="2026-03-01",
+                invoice_number=str(index),
+                transport_type="truck",
+                transport_number="01A001AA",
+                product=product,
+                quantity=Decimal("10.00"),
+                price=Decimal("2.00"),
+                warehouse=warehouse,
+            )
+        client = APIClient()
+        params = {"movement": "in", "warehouse_id": warehouse.id}
+
+        response = client.get("/api/warehouse/movements/", {**params, "stream": 1})
+        body = b"".join(response.streaming_content)
+        lines = body.decode().splitlines()
+
+        self.assertEqual(lines[0], "[")
+        self.assertEqual(lines[-1], "]")
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(body), client.get("/api/warehouse/movements/", params).json())
+
+    async def test_stream_mode_is_async_under_asgi(self):
+        warehouse = await Warehouse.objects.acreate(name="Main Warehouse")
+        product = await Product.objects.acreate(name="Selitra", unit=await Unit.objects.acreate(name="Kilogram", short_name="kg"))
+        for index in range(3):
+            await MineralWarehouseReceipt.objects.acreate(
+                date="2026-03-01",
+                invoice_number=str(index),
+                transport_type="truck",
+                transport_number="01A001AA",
+                product=product,
+                quantity=Decimal("10.00"),
+                warehouse=warehouse,
+            )
+
+        response = await self.async_client.get("/api/warehouse/movements/", {"movement": "in", "warehouse_id": warehouse.id, "stream": 1})
+
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([row["invoice_number"] for row in json.loads(body)], ["2", "1", "0"])
@@ -1,10 +1,17 @@
 from django.urls import path
 
+from . import async_views
 from .views import (
     FarmerListAPIView,
+    FarmerBalanceAsOfAPIView,
+    FarmerStatementAPIView,
     FarmerSummaryAPIView,
+    DistrictListAPIView,
     BotUserCheckAPIView,
+    BotUserAuthorizeAPIView,
+    CacheStatsAPIView,
     BotUserActivityCreateAPIView,
+    BotUserActivityBulkAPIView,
     BotUserActivityAnalyticsAPIView,
     MineralWarehouseReceiptListAPIView,
     GoodsGivenDocumentListAPIView,
@@ -12,12 +19,18 @@ from .views import (
     WarehouseListAPIView,
     WarehouseProductsAPIView,
     WarehouseMovementsAPIView,
+    WarehouseScreenAPIView,
+    WarehouseReportAPIView,
+    WarehouseFarmerExpensesAPIView,
     WarehouseExpenseDistrictsAPIView,
 )
 
 urlpatterns = [
     path("farmers/", FarmerListAPIView.as_view(), name="api_farmers"),
     path("farmers/summary/", FarmerSummaryAPIView.as_view()),
+    path("districts/", DistrictListAPIView.as_view()),
+    path("farmers/<int:farmer_id>/balance/", FarmerBalanceAsOfAPIView.as_view()),
+    path("farmers/<int:farmer_id>/statement/", FarmerStatementAPIView.as_view()),
     path("warehouse/totals/", MineralWarehouseTotalsAPIView.as_view()),
     path("warehouse/list/", WarehouseListAPIView.as_view()),
     path("warehouse/receipts/", MineralWarehouseReceiptListAPIView.as_view()),
@@ -25,7 +38,22 @@ urlpatterns = [
     path("warehouse/products/", WarehouseProductsAPIView.as_view()),
     path("warehouse/expense-districts/", WarehouseExpenseDistrictsAPIView.as_view()),
     path("warehouse/movements/", WarehouseMovementsAPIView.as_view()),
+    path("warehouse/screen/", WarehouseScreenAPIView.as_view()),
+    path("warehouse/report/", WarehouseReportAPIView.as_view()),
+    path("warehouse/farmers/", WarehouseFarmerExpensesAPIView.as_view()),
+    path("async/farmers/", async_views.farmers),
+    path("async/farmers/summary/", async_views.farmer_summary),
+    path("async/districts/", async_views.districts),
+    path("async/warehouse/totals/", async_views.warehouse_totals),
+    path("async/warehouse/products/", async_views.warehouse_products),
+    path("async/warehouse/movements/", async_views.warehouse_movements),
+    path("async/warehouse/report/", async_views.warehouse_report),
+    path("async/warehouse/farmers/", async_views.warehouse_farmers),
+    path("async/warehouse/screen/", async_views.warehouse_screen),
+    path("cache/stats/", CacheStatsAPIView.as_view()),
     path("bot-user/check/", BotUserCheckAPIView.as_view()),
+    path("bot-user/authorize/", BotUserAuthorizeAPIView.as_view()),
     path("bot-user/activity/", BotUserActivityCreateAPIView.as_view()),
+    path("bot-user/activity/bulk/", BotUserActivityBulkAPIView.as_view()),
     path("bot-user/activity/analytics/", BotUserActivityAnalyticsAPIView.as_view()),
 ]
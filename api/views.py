@@ -1,215 +1,303 @@
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 
-from django.db.models import Sum, Min, Max, Count, Q
-from django.db.models.functions import Coalesce
+from django.db.models import (
+    Count,
+    DurationField,
+    F,
+    FloatField,
+    Max,
+    Min,
+    Sum,
+)
+from django.db.models.functions import Cast, Coalesce, ExtractHour, TruncDate
+from django.utils import timezone
 from rest_framework.generics import ListAPIView
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from query.models.bot import BotUser, BotUserActivity
+from query.balances import STATEMENT_PAGE_SIZE, farmer_balance_as_of, farmer_statement
+from query.activity import hour_of
+from query.models.bot import BotUser, BotUserActivity, BotUserActivityHourly, BotUserSession
 from query.models.counterparties import Farmer
 from query.models.documents import MineralWarehouseReceipt, GoodsGivenDocument, Warehouse
-from .serializers import (
-    FarmerSerializer,
-    FarmerSummarySerializer,
-    MineralWarehouseReceiptSerializer,
-    GoodsGivenDocumentSummarySerializer,
-    WarehouseSerializer,
+from .cache import (
+    CONTRACTS,
+    FARMERS,
+    GIVEN,
+    LEDGER,
+    RECEIPTS,
+    REFERENCE,
+    WAREHOUSES,
+    cached_response,
+    stats as cache_stats,
+)
+from .queries import (
+    MAX_ACTIVITY_EVENTS,
+    MOVEMENTS,
+    STOCK_ID_PARAMS,
+    WarehouseScreen,
+    activity_fields,
+    authorize_bot_user,
+    choices_display,
+    contract_type_param,
+    district_report,
+    district_rows,
+    farmer_expense_rows,
+    farmer_expense_totals,
+    farmer_list,
+    farmer_list_totals,
+    farmer_summary,
+    farmer_summary_rows,
+    farmer_summary_totals,
+    filtered_expenses,
+    parse_flag,
+    parse_ids,
+    parse_page,
+    parse_report_dates,
+    record_activities,
+    renamed,
+    report_expenses,
+    stock_totals,
+    warehouse_movements,
+    warehouse_product_totals,
+    warehouse_products,
 )
+from .renderers import FastJSONRenderer, streaming_json_response
+from .serializers import WarehouseSerializer
+
+
+# Катта рўйхатлар: values() қаторлари тўғридан-тўғри тез JSON renderer'га
+LEAN_RENDERERS = (FastJSONRenderer, BrowsableAPIRenderer)
+
+# ``?stream=1`` да server-side cursor'дан бир марта ўқиладиган қаторлар сони
+STREAM_CHUNK_SIZE = 2000
+
+
+def wants_stream(request):
+    return request.query_params.get("stream") in {"1", "true"}
+
+
+def paginated_response(request, rows, get_totals, rename=None):
+    """
+    ``rows`` — ``values()`` queryset. ``page`` / ``page_size`` берилса фақат шу
+    саҳифани (``page_size + 1`` қатор орқали ``has_next``) ва жамланмаларни
+    қайтаради, акс ҳолда — эски кўринишдаги тўлиқ рўйхат.
+    """
+    params = request.query_params
+    rename = rename or {}
+    if "page" not in params and "page_size" not in params:
+        return Response(list(renamed(rows, **rename)))
+
+    try:
+        page, page_size = parse_page(params)
+    except ValueError:
+        return Response({"detail": "page ва page_size бутун сон бўлиши керак"}, status=400)
+
+    start = (page - 1) * page_size
+    rows = list(renamed(rows[start:start + page_size + 1], **rename))
+
+    return Response(
+        {
+            "page": page,
+            "page_size": page_size,
+            "has_next": len(rows) > page_size,
+            "totals": get_totals(),
+            "results": rows[:page_size],
+        }
+    )
 
 
 class FarmerListAPIView(APIView):
+    renderer_classes = LEAN_RENDERERS
 
+    @cached_response(FARMERS, LEDGER, REFERENCE)
     def get(self, request):
-        farmers = (
-            Farmer.objects
-            .filter(is_active=True)
-            .select_related("massive__district__region")
-            .order_by(
-                "massive__district__id",
-                "massive__id",
-                "name"
-            )
+        try:
+            district_id = parse_ids(request.query_params, ("district_id",))["district_id"]
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
+
+        farmers, rows = farmer_list(district_id)
+
+        return paginated_response(
+            request,
+            rows,
+            lambda: farmers.order_by().aggregate(**farmer_list_totals()),
         )
-        serializer = FarmerSerializer(farmers, many=True)
-        return Response(serializer.data)
 
 
-class FarmerSummaryAPIView(ListAPIView):
-    serializer_class = FarmerSummarySerializer
+class DistrictListAPIView(APIView):
 
-    def get_queryset(self):
-        contract_type = self.request.query_params.get("contract_type")
-        contract_filter = Q()
-        if contract_type in {"futures", "forward", "storage"}:
-            contract_filter = Q(contracts__contract_type=contract_type)
-
-        queryset = (
-            Farmer.objects
-            .select_related("massive__district__region")
-            .annotate(
-                quantity=Coalesce(
-                    Sum("contracts__planned_quantity", filter=contract_filter),
-                    Decimal("0.00")
-                ),
-                amount=Coalesce(
-                    Sum("contracts__total_amount", filter=contract_filter),
-                    Decimal("0.00")
-                ),
-            )
-        )
+    @cached_response(FARMERS, CONTRACTS, REFERENCE)
+    def get(self, request):
+        return Response(list(district_rows(request.query_params.get("contract_type"))))
 
-        if contract_type in {"futures", "forward", "storage"}:
-            queryset = queryset.filter(contracts__contract_type=contract_type).distinct()
 
-        return queryset.order_by("massive__district__id", "massive__id")
+class FarmerBalanceAsOfAPIView(APIView):
 
+    def get(self, request, farmer_id):
+        if not Farmer.objects.filter(pk=farmer_id).exists():
+            return Response({"detail": "Фермер топилмади"}, status=404)
 
-class MineralWarehouseReceiptListAPIView(ListAPIView):
-    serializer_class = MineralWarehouseReceiptSerializer
+        raw_as_of = request.query_params.get("as_of")
+        try:
+            as_of = date.fromisoformat(raw_as_of) if raw_as_of else date.today()
+        except ValueError:
+            return Response({"detail": "as_of YYYY-MM-DD форматида бўлиши керак"}, status=400)
 
-    def get_queryset(self):
-        return MineralWarehouseReceipt.objects.select_related("warehouse", "product").order_by("-date", "-id")
+        return Response(farmer_balance_as_of(farmer_id, as_of))
 
 
-class GoodsGivenDocumentListAPIView(ListAPIView):
-    serializer_class = GoodsGivenDocumentSummarySerializer
+class FarmerStatementAPIView(APIView):
+    max_limit = 100
 
-    def get_queryset(self):
-        return (
-            GoodsGivenDocument.objects
-            .select_related("warehouse", "farmer")
-            .annotate(
-                quantity=Coalesce(Sum("items__quantity"), Decimal("0.00")),
-            )
-            .order_by("-date", "-id")
-        )
+    def get(self, request, farmer_id):
+        farmer = Farmer.objects.filter(pk=farmer_id).values("id", "name").first()
+        if farmer is None:
+            return Response({"detail": "Фермер топилмади"}, status=404)
 
+        try:
+            after = request.query_params.get("after")
+            after = int(after) if after else None
+            limit = int(request.query_params.get("limit") or STATEMENT_PAGE_SIZE)
+        except ValueError:
+            return Response({"detail": "after ва limit бутун сон бўлиши керак"}, status=400)
 
-class WarehouseListAPIView(ListAPIView):
-    serializer_class = WarehouseSerializer
+        statement = farmer_statement(farmer_id, after=after, limit=min(max(limit, 1), self.max_limit))
+        if statement is None:
+            return Response({"detail": "Курсор топилмади"}, status=400)
 
-    def get_queryset(self):
-        return Warehouse.objects.all().order_by("name")
+        statement["farmer_name"] = farmer["name"]
+        return Response(statement)
 
 
-class MineralWarehouseTotalsAPIView(APIView):
+class FarmerSummaryAPIView(APIView):
+    renderer_classes = LEAN_RENDERERS
 
+    @cached_response(FARMERS, CONTRACTS, REFERENCE)
     def get(self, request):
-        warehouse_id = request.query_params.get("warehouse_id")
-        product_id = request.query_params.get("product_id")
-        district_id = request.query_params.get("district_id")
+        contract_type = contract_type_param(request.query_params)
+        try:
+            district_id = parse_ids(request.query_params, ("district_id",))["district_id"]
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
+
+        def get_totals():
+            farmers, contracts, aggregates = farmer_summary_totals(contract_type, district_id)
+            return {
+                "count": farmers.count(),
+                **contracts.aggregate(**aggregates),
+            }
 
-        receipts = MineralWarehouseReceipt.objects.all()
-        expenses = GoodsGivenDocument.objects.all()
+        rows = farmer_summary_rows(farmer_summary(contract_type, district_id))
+        return paginated_response(request, rows, get_totals, rename={"massive": "massive_name"})
 
-        if warehouse_id:
-            receipts = receipts.filter(warehouse_id=warehouse_id)
-            expenses = expenses.filter(warehouse_id=warehouse_id)
-
-        if product_id:
-            receipts = receipts.filter(product_id=product_id)
-            expenses = expenses.filter(items__product_id=product_id)
-        if district_id:
-            expenses = expenses.filter(farmer__massive__district_id=district_id)
-
-        total_in = receipts.aggregate(
-            value=Coalesce(Sum("quantity"), Decimal("0.00")),
-            amount=Coalesce(Sum("amount"), Decimal("0.00")),
-        )
 
-        total_out = expenses.aggregate(
-            value=Coalesce(Sum("items__quantity"), Decimal("0.00")),
-            amount=Coalesce(Sum("items__amount"), Decimal("0.00")),
+class MineralWarehouseReceiptListAPIView(APIView):
+    renderer_classes = LEAN_RENDERERS
+
+    @cached_response(RECEIPTS, WAREHOUSES, REFERENCE)
+    def get(self, request):
+        rows = MineralWarehouseReceipt.objects.order_by("-date", "-id").values(
+            "id",
+            "date",
+            "invoice_number",
+            "transport_type",
+            "transport_number",
+            "bag_count",
+            "quantity",
+            "price",
+            "amount",
+            transport_type_display=choices_display(
+                "transport_type", MineralWarehouseReceipt.TransportType.choices
+            ),
+            product_name=F("product__name"),
+            warehouse_name=F("warehouse__name"),
         )
 
-        balance = total_in["value"] - total_out["value"]
-        balance_amount = total_in["amount"] - total_out["amount"]
+        if wants_stream(request):
+            return streaming_json_response(
+                request,
+                renamed(rows.iterator(chunk_size=STREAM_CHUNK_SIZE), product="product_name", warehouse="warehouse_name")
+            )
+        return Response(list(renamed(rows, product="product_name", warehouse="warehouse_name")))
 
-        return Response(
-            {
-                "total_in": total_in["value"],
-                "total_out": total_out["value"],
-                "balance": balance,
-                "total_in_amount": total_in["amount"],
-                "total_out_amount": total_out["amount"],
-                "balance_amount": balance_amount,
-            }
+
+class GoodsGivenDocumentListAPIView(APIView):
+    renderer_classes = LEAN_RENDERERS
+
+    @cached_response(GIVEN, FARMERS, WAREHOUSES)
+    def get(self, request):
+        rows = (
+            GoodsGivenDocument.objects
+            .with_totals()
+            .annotate(
+                quantity=Coalesce(Sum("items__quantity"), Decimal("0.00")),
+            )
+            .order_by("-date", "-id")
+            .values(
+                "id",
+                "date",
+                "number",
+                "quantity",
+                warehouse_name=F("warehouse__name"),
+                farmer_name=F("farmer__name"),
+                # Сериализаторда бу модел property'си эди — DRF уни сон қилиб берарди
+                total_amount=Cast("total_amount_value", FloatField()),
+            )
         )
 
+        if wants_stream(request):
+            return streaming_json_response(request, rows.iterator(chunk_size=STREAM_CHUNK_SIZE))
+        return Response(list(rows))
 
-class WarehouseProductsAPIView(APIView):
 
-    def get(self, request):
-        warehouse_id = request.query_params.get("warehouse_id")
-        movement = request.query_params.get("movement")
-        district_id = request.query_params.get("district_id")
+class WarehouseListAPIView(ListAPIView):
+    serializer_class = WarehouseSerializer
 
-        receipt_items = MineralWarehouseReceipt.objects.all()
-        expense_items = GoodsGivenDocument.objects.all()
+    @cached_response(WAREHOUSES)
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
 
-        if warehouse_id:
-            receipt_items = receipt_items.filter(warehouse_id=warehouse_id)
-            expense_items = expense_items.filter(warehouse_id=warehouse_id)
-        if district_id:
-            expense_items = expense_items.filter(farmer__massive__district_id=district_id)
+    def get_queryset(self):
+        return Warehouse.objects.all().order_by("name")
 
-        products_map = {}
 
-        if movement in (None, "", "all", "in"):
-            for row in (
-                receipt_items
-                .values("product_id", "product__name")
-                .annotate(total_in=Coalesce(Sum("quantity"), Decimal("0.00")))
-            ):
-                product_id = row["product_id"]
-                if not product_id:
-                    continue
-
-                product = products_map.setdefault(
-                    product_id,
-                    {
-                        "product_id": product_id,
-                        "product_name": row["product__name"] or "-",
-                        "total_in": Decimal("0.00"),
-                        "total_out": Decimal("0.00"),
-                    }
-                )
-                product["total_in"] = row["total_in"]
+class MineralWarehouseTotalsAPIView(APIView):
 
-        if movement in (None, "", "all", "out"):
-            for row in (
-                expense_items
-                .values("items__product_id", "items__product__name")
-                .annotate(total_out=Coalesce(Sum("items__quantity"), Decimal("0.00")))
-            ):
-                product_id = row["items__product_id"]
-                if not product_id:
-                    continue
-
-                product = products_map.setdefault(
-                    product_id,
-                    {
-                        "product_id": product_id,
-                        "product_name": row["items__product__name"] or "-",
-                        "total_in": Decimal("0.00"),
-                        "total_out": Decimal("0.00"),
-                    }
-                )
-                product["total_out"] = row["total_out"]
+    @cached_response(RECEIPTS, GIVEN, FARMERS)
+    def get(self, request):
+        try:
+            ids = parse_ids(request.query_params, STOCK_ID_PARAMS)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
 
-        products = sorted(products_map.values(), key=lambda item: item["product_name"])
+        return Response(stock_totals(**ids))
 
-        for item in products:
-            item["balance"] = item["total_in"] - item["total_out"]
 
-        return Response(products)
+class WarehouseProductsAPIView(APIView):
+
+    @cached_response(RECEIPTS, GIVEN, FARMERS, REFERENCE)
+    def get(self, request):
+        try:
+            ids = parse_ids(request.query_params, ("warehouse_id", "district_id"))
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
+
+        rows = warehouse_product_totals(**ids)
+        return Response(warehouse_products(rows, request.query_params.get("movement")))
 
 
 class WarehouseExpenseDistrictsAPIView(APIView):
 
+    @cached_response(GIVEN, FARMERS, REFERENCE)
     def get(self, request):
-        warehouse_id = request.query_params.get("warehouse_id")
+        try:
+            warehouse_id = parse_ids(request.query_params, ("warehouse_id",))["warehouse_id"]
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
 
         expense_items = GoodsGivenDocument.objects.select_related("farmer__massive__district")
         if warehouse_id:
@@ -234,178 +322,244 @@ class WarehouseExpenseDistrictsAPIView(APIView):
 
 class WarehouseMovementsAPIView(APIView):
 
+    @cached_response(RECEIPTS, GIVEN, FARMERS, WAREHOUSES, REFERENCE)
     def get(self, request):
-        warehouse_id = request.query_params.get("warehouse_id")
-        product_id = request.query_params.get("product_id")
-        district_id = request.query_params.get("district_id")
-        movement = request.query_params.get("movement")
+        try:
+            ids = parse_ids(request.query_params, STOCK_ID_PARAMS)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
 
-        if movement not in {"in", "out", "report"}:
+        movement = request.query_params.get("movement")
+        if movement not in MOVEMENTS:
             return Response([])
 
-        if movement == "in":
-            receipts = MineralWarehouseReceipt.objects.select_related("warehouse", "product")
-
-            if warehouse_id:
-                receipts = receipts.filter(warehouse_id=warehouse_id)
-            if product_id:
-                receipts = receipts.filter(product_id=product_id)
-
-            return Response(
-                [
-                    {
-                        "id": item.id,
-                        "date": item.date,
-                        "warehouse_name": item.warehouse.name if item.warehouse else None,
-                        "product_id": item.product_id,
-                        "product_name": item.product.name if item.product else None,
-                        "invoice_number": item.invoice_number,
-                        "bag_count": item.bag_count,
-                        "quantity": item.quantity,
-                    }
-                    for item in receipts.order_by("-date", "-id")
-                ]
-            )
+        movements, to_row = warehouse_movements(movement, **ids)
+        rows = (
+            to_row(index, row)
+            for index, row in enumerate(movements.iterator(chunk_size=STREAM_CHUNK_SIZE), start=1)
+        )
 
-        expense_items = GoodsGivenDocument.objects.select_related(
-            "warehouse", "farmer", "farmer__massive__district"
+        if wants_stream(request):
+            return streaming_json_response(request, rows, decimal_as_string=False)
+        return Response(list(rows))
+
+
+class WarehouseFarmerExpensesAPIView(APIView):
+    """Фермерлар бўйича чиқим: ``page`` / ``page_size`` билан саҳифаланади."""
+
+    renderer_classes = LEAN_RENDERERS
+
+    @cached_response(RECEIPTS, GIVEN, FARMERS)
+    def get(self, request):
+        try:
+            expenses = filtered_expenses(request.query_params)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
+
+        return paginated_response(
+            request,
+            farmer_expense_rows(expenses),
+            lambda: expenses.aggregate(**farmer_expense_totals()),
         )
 
-        if warehouse_id:
-            expense_items = expense_items.filter(warehouse_id=warehouse_id)
-        if product_id:
-            expense_items = expense_items.filter(items__product_id=product_id)
-        if district_id:
-            expense_items = expense_items.filter(farmer__massive__district_id=district_id)
-
-        if movement == "report":
-            rows = (
-                expense_items
-                .values("date", "farmer__massive__district__name")
-                .annotate(quantity=Coalesce(Sum("items__quantity"), Decimal("0.00")))
-                .order_by("-date", "farmer__massive__district__name")
-            )
-            return Response(
-                [
-                    {
-                        "date": row.get("date"),
-                        "district_name": row.get("farmer__massive__district__name") or "-",
-                        "quantity": row.get("quantity") or Decimal("0.00"),
-                    }
-                    for row in rows
-                ]
-            )
 
-        rows = (
-            expense_items
-            .values(
-                "id",
-                "date",
-                "number",
-                "farmer__name",
-                "farmer__maydon",
-                "items__product_id",
-                "items__product__name",
-            )
-            .annotate(quantity=Coalesce(Sum("items__quantity"), Decimal("0.00")))
-            .order_by("-date", "-id", "items__product__name")
+class WarehouseReportAPIView(APIView):
+    """
+    Свод: ҳар бир туман учун битта қатор (``date`` кундаги ва давр бўйича жами
+    чиқим) ва жами қатори. ``date_from`` / ``date_to`` даврни чегаралайди.
+    """
+
+    @cached_response(RECEIPTS, GIVEN, FARMERS, REFERENCE, today_param="date")
+    def get(self, request):
+        try:
+            reference_date, date_from, date_to = parse_report_dates(request.query_params)
+            expenses = report_expenses(request.query_params, date_from, date_to)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
+
+        rows, totals = district_report(expenses, reference_date)
+
+        return Response(
+            {
+                "date": reference_date,
+                "date_from": date_from,
+                "date_to": date_to,
+                "results": list(rows),
+                "totals": expenses.aggregate(**totals),
+            }
         )
 
-        result = []
-        for index, row in enumerate(rows, start=1):
-            maydon = row.get("farmer__maydon") or Decimal("0.00")
-            quantity = row.get("quantity") or Decimal("0.00")
-            quantity_per_area = Decimal("0.00")
-            if maydon > 0:
-                quantity_per_area = quantity / maydon
-
-            result.append(
-                {
-                    "id": index,
-                    "date": row.get("date"),
-                    "warehouse_name": None,
-                    "number": row.get("number") or "-",
-                    "farmer_name": row.get("farmer__name") or "-",
-                    "product_id": row.get("items__product_id"),
-                    "product_name": row.get("items__product__name") or "-",
-                    "quantity": quantity,
-                    "maydon": maydon,
-                    "quantity_per_area": quantity_per_area,
-                }
-            )
 
-        return Response(result)
+class WarehouseScreenAPIView(APIView):
+    """
+    Ботдаги омбор ҳаракатлари экрани учун битта жавоб: омбор ва маҳсулот номи,
+    жамланмалар ва танланган саҳифа қаторлари (кирим, фермерлар бўйича чиқим ёки
+    туманлар бўйича свод). Ҳаммаси журнал ва қолдиқлардан 3–4 сўров билан олинади.
+    """
+
+    @cached_response(RECEIPTS, GIVEN, FARMERS, WAREHOUSES, REFERENCE, today_param="date")
+    def get(self, request):
+        try:
+            screen = WarehouseScreen(request.query_params)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=400)
+
+        names = screen.names().first()
+        if names is None:
+            return Response({"detail": "Омбор топилмади"}, status=404)
+
+        balances, aggregates = screen.totals()
+        report_totals = screen.report_totals()
+        if report_totals is not None:
+            expenses, report_aggregates = report_totals
+            report_totals = expenses.aggregate(**report_aggregates)
+
+        return Response(
+            screen.response(names, balances.aggregate(**aggregates), list(screen.rows()), report_totals)
+        )
+
 
+class CacheStatsAPIView(APIView):
 
+    def get(self, request):
+        return Response(cache_stats.snapshot())
 
 
 class BotUserActivityAnalyticsAPIView(APIView):
+    """
+    Bot фаоллиги: фойдаланувчилар, соат ва кун бўйича тақсимот соатлик
+    жамланмалардан (BotUserActivityHourly), сессиялар сони ва фаол вақт —
+    BotUserSession'дан (``update_bot_sessions`` буйруғи янгилайди), охирги 500
+    та ҳаракат — хом журналдан.
+    ``from`` / ``to`` — сана ёки ISO вақт; ``to`` сана бўлса шу кун ҳам киради.
+    Жамланмалар соат аниқлигида.
+    """
+
+    TIMELINE_SIZE = 500
 
     def get(self, request):
         user_id = request.query_params.get("user_id")
-
-        activities = BotUserActivity.objects.select_related("user")
+        try:
+            date_from = self.parse_moment(request.query_params.get("from"))
+            date_to = self.parse_moment(request.query_params.get("to"), end_of_day=True)
+        except ValueError:
+            return Response({"detail": "from / to: YYYY-MM-DD ёки ISO вақт"}, status=400)
+
+        rollups = BotUserActivityHourly.objects.all()
+        activities = BotUserActivity.objects.all()
         if user_id:
+            rollups = rollups.filter(user_id=user_id)
             activities = activities.filter(user_id=user_id)
+        if date_from:
+            rollups = rollups.filter(hour__gte=hour_of(date_from))
+            activities = activities.filter(created_at__gte=date_from)
+        if date_to:
+            rollups = rollups.filter(hour__lt=date_to)
+            activities = activities.filter(created_at__lt=date_to)
+
+        sessions = BotUserSession.objects.all()
+        if user_id:
+            sessions = sessions.filter(user_id=user_id)
+        if date_from:
+            sessions = sessions.filter(started_at__gte=date_from)
+        if date_to:
+            sessions = sessions.filter(started_at__lt=date_to)
+        session_totals = {
+            row["user_id"]: row
+            for row in (
+                sessions
+                .values("user_id")
+                .annotate(
+                    sessions_count=Count("id"),
+                    duration=Sum(F("ended_at") - F("started_at"), output_field=DurationField()),
+                )
+                .order_by()
+            )
+        }
 
         users_summary = []
         grouped_users = (
-            activities
+            rollups
             .values("user_id", "user__full_name", "user__telegram_id")
             .annotate(
-                first_activity=Min("created_at"),
-                last_activity=Max("created_at"),
-                actions_count=Count("id"),
+                first_activity=Min("first_activity"),
+                last_activity=Max("last_activity"),
+                actions_count=Sum("actions_count"),
             )
             .order_by("user__full_name")
         )
 
         for row in grouped_users:
-            first_activity = row.get("first_activity")
-            last_activity = row.get("last_activity")
-            active_seconds = 0
-            if first_activity and last_activity:
-                active_seconds = int((last_activity - first_activity).total_seconds())
+            # Фаол вақт — сессиялар давомийлиги йиғиндиси (танаффуслар кирмайди)
+            session = session_totals.get(row["user_id"], {})
+            duration = session.get("duration")
 
             users_summary.append({
                 "user_id": row.get("user_id"),
                 "full_name": row.get("user__full_name") or "-",
                 "telegram_id": row.get("user__telegram_id"),
-                "first_activity": first_activity,
-                "last_activity": last_activity,
+                "first_activity": row.get("first_activity"),
+                "last_activity": row.get("last_activity"),
                 "actions_count": row.get("actions_count") or 0,
-                "active_seconds": active_seconds,
+                "sessions_count": session.get("sessions_count", 0),
+                "active_seconds": int(duration.total_seconds()) if duration else 0,
             })
 
-        timeline = [
-            {
-                "id": item.id,
-                "user_id": item.user_id,
-                "full_name": item.user.full_name if item.user else "-",
-                "telegram_id": item.user.telegram_id if item.user else None,
-                "action_type": item.action_type,
-                "action_name": item.action_name,
-                "action_payload": item.action_payload,
-                "is_allowed": item.is_allowed,
-                "created_at": item.created_at,
-            }
-            for item in activities.order_by("-created_at")[:500]
-        ]
+        timeline = list(
+            activities
+            .order_by("-created_at")
+            .values(
+                "id",
+                "user_id",
+                "action_type",
+                "action_name",
+                "action_payload",
+                "is_allowed",
+                "created_at",
+                full_name=F("user__full_name"),
+                telegram_id=F("user__telegram_id"),
+            )[:self.TIMELINE_SIZE]
+        )
 
-        by_hour = [
-            {
-                "hour": hour,
-                "actions_count": sum(1 for item in timeline if item["created_at"].hour == hour),
-            }
-            for hour in range(24)
-        ]
+        hours = dict(
+            rollups
+            .annotate(hour_of_day=ExtractHour("hour"))
+            .values("hour_of_day")
+            .annotate(actions_count=Sum("actions_count"))
+            .order_by()
+            .values_list("hour_of_day", "actions_count")
+        )
+        by_hour = [{"hour": hour, "actions_count": hours.get(hour, 0)} for hour in range(24)]
+
+        by_day = list(
+            rollups
+            .annotate(day=TruncDate("hour"))
+            .values("day")
+            .annotate(actions_count=Sum("actions_count"))
+            .order_by("day")
+        )
 
         return Response({
+            "from": date_from,
+            "to": date_to,
             "users": users_summary,
             "timeline": timeline,
             "by_hour": by_hour,
+            "by_day": by_day,
         })
 
+    def parse_moment(self, value, end_of_day=False):
+        if not value:
+            return None
+        if len(value) == 10:
+            moment = datetime.combine(date.fromisoformat(value), time.min)
+            if end_of_day:
+                moment += timedelta(days=1)
+        else:
+            moment = datetime.fromisoformat(value)
+        return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
 class BotUserCheckAPIView(APIView):
 
     def post(self, request):
@@ -438,6 +592,22 @@ class BotUserCheckAPIView(APIView):
         })
 
 
+class BotUserAuthorizeAPIView(APIView):
+    """
+    Рухсатни текшириш ва ҳаракатни ёзиш — битта сўров ва битта транзакцияда.
+    Рухсат бўлмаса ҳаракат ``access_denied`` номи билан ёзилади; ``action_name``
+    берилмаса фақат рухсат текширилади (bot ҳаракатларни bulk юборади).
+    """
+
+    def post(self, request):
+        telegram_id = request.data.get("telegram_id")
+        if not telegram_id:
+            return Response({"allowed": False}, status=400)
+
+        action = activity_fields(request.data) if request.data.get("action_name") else None
+        return Response(authorize_bot_user(telegram_id, request.data.get("full_name"), action))
+
+
 class BotUserActivityCreateAPIView(APIView):
 
     def post(self, request):
@@ -449,21 +619,26 @@ class BotUserActivityCreateAPIView(APIView):
         if not user:
             return Response({"created": False}, status=404)
 
-        action_type = request.data.get("action_type") or BotUserActivity.ACTION_MESSAGE
-        action_name = (request.data.get("action_name") or "unknown")[:100]
-        action_payload = (request.data.get("action_payload") or "")
-        raw_is_allowed = request.data.get("is_allowed", True)
-        if isinstance(raw_is_allowed, str):
-            is_allowed = raw_is_allowed.strip().lower() in {"1", "true", "yes", "y"}
-        else:
-            is_allowed = bool(raw_is_allowed)
-
         BotUserActivity.objects.create(
             user=user,
-            action_type=action_type,
-            action_name=action_name,
-            action_payload=action_payload[:1000],
-            is_allowed=is_allowed,
+            is_allowed=parse_flag(request.data.get("is_allowed")),
+            **activity_fields(request.data),
         )
 
         return Response({"created": True})
+
+
+class BotUserActivityBulkAPIView(APIView):
+    """
+    Ҳаракатлар тўплами: ``{"events": [...]}`` ёки рўйхатнинг ўзи. Ҳар бир
+    ҳодиса ``/bot-user/activity/`` дагидек, қўшимча ``created_at`` (ISO) билан.
+    Фойдаланувчилар битта сўровда топилади, қаторлар ``bulk_create`` билан
+    ёзилади ва соатлик жамланмага қўшилади. Номаълум фойдаланувчилар ташлаб кетилади.
+    """
+
+    def post(self, request):
+        events = request.data if isinstance(request.data, list) else request.data.get("events")
+        if not isinstance(events, list) or len(events) > MAX_ACTIVITY_EVENTS:
+            return Response({"detail": f"events: {MAX_ACTIVITY_EVENTS} тагача ҳодиса рўйхати"}, status=400)
+
+        return Response(record_activities(events))
@@ -106,6 +106,58 @@ DATABASES = {
 
 
 
+#===================================================
+# API жавоблари кэши (api/cache.py)
+#===================================================
+# Стандарт — процесс ичидаги LocMemCache. Бир нечта gunicorn worker ишлаганда
+# API_CACHE_REDIS_URL берилиши керак, шунда маълумот версиялари умумий бўлади.
+
+API_CACHE_REDIS_URL = os.environ.get("API_CACHE_REDIS_URL")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+if API_CACHE_REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': API_CACHE_REDIS_URL,
+    }
+
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 300
+
+#===================================================
+# Bot сессиялари (query/activity.py)
+#===================================================
+# Шундан узоқ танаффус янги сессия бошлайди. Ўзгартирилса сессиялар
+# ``manage.py update_bot_sessions --rebuild`` билан қайта ҳисобланиши керак.
+
+BOT_SESSION_GAP_SECONDS = 30 * 60
+
+# Bot ҳаракатларни ўз вақти билан кечикиб юборади (буфер, API узилиши).
+# ``update_bot_sessions`` шунча орқадаги ҳаракатларни ҳам қайта кўриб чиқади.
+BOT_SESSION_LOOKBACK_SECONDS = 60 * 60
+
+#===================================================
+# Bot рухсат кэшини бекор қилиш (query/bot_access.py)
+#===================================================
+# Bot процессларининг локал endpoint'лари (tgbot/services/access_events.py),
+# вергул билан: ҳар бир процесс ўз BOT_ACCESS_PUSH_PORT'ида тинглайди. Берилмаса
+# бекор қилинган рухсат bot кэшида TTL тугагунча сақланади.
+
+BOT_ACCESS_PUSH_URLS = [
+    url.strip()
+    for url in os.environ.get("BOT_ACCESS_PUSH_URLS", "").split(",")
+    if url.strip()
+]
+BOT_ACCESS_PUSH_SECRET = os.environ.get("BOT_ACCESS_PUSH_SECRET", "")
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
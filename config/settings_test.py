@@ -6,3 +6,11 @@ DATABASES = {
         'NAME': BASE_DIR / 'test_db.sqlite3',
     }
 }
+
+
+# Тестлар кэшни фақат ўзлари ёқади (override_settings)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
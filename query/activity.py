@@ -0,0 +1,246 @@
+"""
+Bot фаоллиги журналининг соатлик жамланмаси (BotUserActivityHourly) ва
+сессиялари (BotUserSession).
+
+Ҳар бир янги BotUserActivity сигнал орқали ўз соатига қўшилади, bulk ёзувлар —
+``add_to_rollups`` орқали; эски хом қаторларни ўчириш ``compact_bot_activity``
+буйруғи орқали. Сессиялар ``update_bot_sessions`` буйруғи билан ҳаракат вақти
+бўйича, кечикиб келганларни ҳам ҳисобга олиб янгиланади (``update_sessions``).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import BooleanField, Case, Count, F, Max, Min, Q, Value, When, Window
+from django.db.models.functions import Greatest, Lag, Least, TruncHour
+from django.utils import timezone
+
+from .models.bot import BotUser, BotUserActivity, BotUserActivityHourly, BotUserSession
+
+
+def hour_of(moment):
+    # TruncHour ҳам жорий вақт минтақасида кесади
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def add_to_rollup(activity, using=DEFAULT_DB_ALIAS):
+    """Битта ҳаракатни унинг соатлик қаторига қўшади (қатор бўлмаса яратади)."""
+    add_to_rollups([activity], using=using)
+
+
+def add_to_rollups(activities, using=DEFAULT_DB_ALIAS):
+    """
+    Ҳаракатларни соатлик қаторларга қўшади: аввал калит бўйича Python'да
+    гуруҳланади, кейин ҳар бир калит учун битта UPDATE (ёки INSERT).
+    ``bulk_create`` сигнал юбормайди — bulk ёзувлардан кейин шуни чақиринг.
+    """
+    groups = {}
+    for activity in activities:
+        key = (activity.user_id, hour_of(activity.created_at), activity.action_name, activity.is_allowed)
+        count, first, last = groups.get(key, (0, activity.created_at, activity.created_at))
+        groups[key] = (count + 1, min(first, activity.created_at), max(last, activity.created_at))
+
+    rollups = BotUserActivityHourly.objects.using(using)
+    for (user_id, hour, action_name, is_allowed), (count, first, last) in groups.items():
+        key = {"user_id": user_id, "hour": hour, "action_name": action_name, "is_allowed": is_allowed}
+
+        def increment():
+            return rollups.filter(**key).update(
+                actions_count=F("actions_count") + count,
+                first_activity=Least("first_activity", first),
+                last_activity=Greatest("last_activity", last),
+            )
+
+        if increment():
+            continue
+
+        try:
+            with transaction.atomic(using=using):
+                rollups.create(**key, actions_count=count, first_activity=first, last_activity=last)
+        except IntegrityError:
+            # Параллел сўров қаторни биздан олдин яратди
+            increment()
+
+
+@transaction.atomic
+def rebuild_rollups(since=None):
+    """
+    Хом журналда сақланган соатларни қайта ҳисоблайди: ``since`` дан (стандарт —
+    энг эски хом қатор соатидан) кейинги жамланмалар GROUP BY билан ёзилади.
+    Ундан олдинги (хом қаторлари ўчирилган) соатларга тегилмайди.
+    """
+    if since is None:
+        first = BotUserActivity.objects.aggregate(first=Min("created_at"))["first"]
+        if first is None:
+            return 0
+        since = first
+    since = hour_of(since)
+
+    BotUserActivityHourly.objects.filter(hour__gte=since).delete()
+
+    rows = (
+        BotUserActivity.objects
+        .filter(created_at__gte=since)
+        .annotate(bucket=TruncHour("created_at"))
+        .values("user_id", "bucket", "action_name", "is_allowed")
+        .annotate(
+            actions_count=Count("id"),
+            first_activity=Min("created_at"),
+            last_activity=Max("created_at"),
+        )
+        .order_by()
+    )
+    created = BotUserActivityHourly.objects.bulk_create(
+        (
+            BotUserActivityHourly(
+                user_id=row["user_id"],
+                hour=row["bucket"],
+                action_name=row["action_name"],
+                is_allowed=row["is_allowed"],
+                actions_count=row["actions_count"],
+                first_activity=row["first_activity"],
+                last_activity=row["last_activity"],
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def prune_raw_activity(keep_days):
+    """
+    ``keep_days`` кундан эски хом қаторларни ўчиради. Чегара соат бошига
+    туширилади — шунда қолган хом қаторлар ўз соатини тўлиқ қоплайди.
+    """
+    cutoff = hour_of(timezone.now() - timedelta(days=keep_days))
+    deleted, _ = BotUserActivity.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+# ==========================================
+# 🔹 SESSIONS
+# ==========================================
+
+def session_gap():
+    return timedelta(seconds=getattr(settings, "BOT_SESSION_GAP_SECONDS", 30 * 60))
+
+
+def session_starts(activities, gap):
+    """
+    ``(id, user_id, created_at, is_start)`` қаторлари: ``is_start`` — олдинги
+    ҳаракатдан (LAG, фойдаланувчи бўйича) ``gap`` дан кўп ўтган ёки биринчи ҳаракат.
+    """
+    previous_at = Window(
+        Lag("created_at"),
+        partition_by=[F("user_id")],
+        order_by=[F("created_at").asc(), F("id").asc()],
+    )
+    return (
+        activities
+        .annotate(previous_at=previous_at)
+        .annotate(
+            is_start=Case(
+                When(Q(previous_at__isnull=True) | Q(created_at__gt=F("previous_at") + gap), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+        .order_by("user_id", "created_at", "id")
+        .values_list("id", "user_id", "created_at", "is_start")
+    )
+
+
+def session_lookback():
+    return timedelta(seconds=getattr(settings, "BOT_SESSION_LOOKBACK_SECONDS", 60 * 60))
+
+
+def update_sessions(gap=None, lookback=None):
+    """
+    Охирги сессия тугаган вақтдан ``lookback`` олдинги ҳаракатлардан бошлаб
+    сессияларни янгилайди. Bot ҳаракатларни ўз вақти билан кечикиб юборади, шунинг
+    учун курсор id эмас, ``created_at``: ойнага тушган ҳар бир фойдаланувчининг
+    шу ҳаракатларга яқин (``gap`` ичидаги) сессиялари ўчирилиб, хом журналдан
+    қайта ҳисобланади — қайта ишга тушириш натижани ўзгартирмайди.
+    ``lookback`` дан кечроқ келган ҳаракатлар ``--rebuild`` билан тузатилади.
+
+    Фойдаланувчи қаторлари ``select_for_update`` билан қулфланади — бир вақтда
+    ишга тушган иккинчи чақирув шу фойдаланувчиларни биринчиси тугагач ҳисоблайди.
+    Қайтаради: ёзилган сессиялар сони.
+    """
+    gap = gap or session_gap()
+    lookback = lookback or session_lookback()
+    try:
+        with transaction.atomic():
+            return _update_sessions(gap, lookback)
+    except IntegrityError:
+        # SQLite'да қулф йўқ — параллел ёзув unique чекловида тўхтайди
+        return 0
+
+
+def _update_sessions(gap, lookback):
+    cursor = BotUserSession.objects.aggregate(last=Max("ended_at"))["last"]
+    window = BotUserActivity.objects.all()
+    if cursor is not None:
+        window = window.filter(created_at__gte=cursor - lookback)
+
+    first_new = dict(
+        window.order_by().values("user_id").annotate(first=Min("created_at")).values_list("user_id", "first")
+    )
+    if not first_new:
+        return 0
+
+    list(BotUser.objects.select_for_update().filter(pk__in=first_new).order_by("pk").values_list("pk", flat=True))
+
+    # Янги ҳаракатга ``gap`` ичида яқин сессиялар бирлашиши ёки кенгайиши мумкин —
+    # улар ўчирилади ва фойдаланувчи журнали шу сессиялар бошидан қайта ўқилади
+    since = dict(first_new)
+    stale = []
+    for session_id, user_id, started_at, ended_at in (
+        BotUserSession.objects
+        .filter(user_id__in=first_new, ended_at__gte=min(first_new.values()) - gap)
+        .values_list("id", "user_id", "started_at", "ended_at")
+    ):
+        if ended_at >= first_new[user_id] - gap:
+            stale.append(session_id)
+            since[user_id] = min(since[user_id], started_at)
+
+    BotUserSession.objects.filter(pk__in=stale).delete()
+
+    activities = BotUserActivity.objects.filter(user_id__in=since, created_at__gte=min(since.values()))
+    created = []
+    current = None
+
+    for activity_id, user_id, created_at, is_start in session_starts(activities, gap).iterator(chunk_size=2000):
+        if created_at < since[user_id]:
+            continue
+        # Фойдаланувчининг биринчи ўқилган ҳаракати — қолган сессиялардан ``gap`` дан узоқ
+        if current is None or current.user_id != user_id:
+            is_start = True
+
+        if is_start:
+            current = BotUserSession(
+                user_id=user_id,
+                started_at=created_at,
+                ended_at=created_at,
+                actions_count=1,
+                first_activity_id=activity_id,
+                last_activity_id=activity_id,
+            )
+            created.append(current)
+            continue
+
+        current.ended_at = created_at
+        current.actions_count += 1
+        current.last_activity_id = max(current.last_activity_id, activity_id)
+
+    BotUserSession.objects.bulk_create(created, batch_size=1000)
+    return len(created)
+
+
+@transaction.atomic
+def rebuild_sessions(gap=None):
+    """Барча сессияларни сақланган хом журналдан қайта ҳисоблайди (gap ўзгарганда)."""
+    BotUserSession.objects.all().delete()
+    return update_sessions(gap)
@@ -29,33 +29,16 @@ class LedgerAdmin(admin.ModelAdmin):
 
     ordering = ("-date",)
 
-    # 🔥 Superuser hamma narsani o‘zgartira oladi
-    def get_readonly_fields(self, request, obj=None):
-        if request.user.is_superuser:
-            return ()
-        return (
-            "date",
-            "farmer",
-            "contract",
-            "given_document",
-            "received_document",
-            "debit",
-            "credit",
-        )
-
-    # 🔥 Oddiy user linkni bosa olmaydi
-    def get_list_display_links(self, request, list_display):
-        if request.user.is_superuser:
-            return ("formatted_date",)
-        return None
-
-    # 🔥 Qo‘shish faqat superuserga
+    # 🔥 Ledger faqat hujjatlardan yoziladi (repost_documents / unpost_documents):
+    # qo‘lda o‘zgartirish balanslar, balance_after va oylik qoldiqlarni buzadi
     def has_add_permission(self, request):
-        return request.user.is_superuser
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-    # 🔥 O‘chirish faqat superuserga
     def has_delete_permission(self, request, obj=None):
-        return request.user.is_superuser
+        return False
 
     # 🔥 Sana format
     def formatted_date(self, obj):
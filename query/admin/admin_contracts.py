@@ -20,7 +20,11 @@ class ContractAdmin(admin.ModelAdmin):
     search_fields = ("number", "farmer__name")
     ordering = ("-date",)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_balance()
+
     def get_balance(self, obj):
         return obj.balance
 
     get_balance.short_description = "Шартнома баланси"
+    get_balance.admin_order_field = "balance_value"
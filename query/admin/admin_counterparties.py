@@ -25,10 +25,14 @@ class FarmerAdmin(admin.ModelAdmin):
     ordering = ("name",)
     inlines = [BankAccountInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_balance()
+
     def get_balance(self, obj):
         return obj.balance
 
     get_balance.short_description = "Баланс"
+    get_balance.admin_order_field = "balance_value"
 
 
 @admin.register(BankAccount)
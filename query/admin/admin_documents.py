@@ -111,11 +111,15 @@ class GoodsGivenDocumentAdmin(admin.ModelAdmin):
 
     inlines = [GoodsGivenItemInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_totals()
+
     # 🔹 Жами сумма
     def get_total_amount(self, obj):
         return obj.total_amount
 
     get_total_amount.short_description = "Жами сумма"
+    get_total_amount.admin_order_field = "total_amount_value"
 
     # 🔹 Санани chiroyli format
     def formatted_date(self, obj):
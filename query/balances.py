@@ -0,0 +1,367 @@
+import calendar
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.dispatch import Signal
+from django.db.models import Case, CharField, F, Q, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models.accounting import ContractBalance, FarmerBalance, Ledger, LedgerSnapshot
+
+
+ZERO = Decimal("0.00")
+
+# Ledger bulk_create / raw SQL / bulk_update орқали ўзгарганда юборилади —
+# бу йўллар post_save/post_delete сигналларини чақирмайди.
+ledger_changed = Signal()
+
+
+def apply_ledger_delta(old_rows, new_rows, using=DEFAULT_DB_ALIAS):
+    """
+    Ledger қаторлари алмашганда сақланган балансларни фарқ (delta) бўйича янгилайди.
+
+    ``old_rows`` / ``new_rows`` — ``farmer_id``, ``contract_id``, ``debit``, ``credit``
+    калитлари бор dict'лар рўйхати.
+    """
+    farmer_deltas = defaultdict(lambda: [ZERO, ZERO])
+    contract_deltas = defaultdict(lambda: [ZERO, ZERO])
+
+    for sign, rows in ((-1, old_rows), (1, new_rows)):
+        for row in rows:
+            debit = (row.get("debit") or ZERO) * sign
+            credit = (row.get("credit") or ZERO) * sign
+            farmer_deltas[row["farmer_id"]][0] += debit
+            farmer_deltas[row["farmer_id"]][1] += credit
+            contract_deltas[row["contract_id"]][0] += debit
+            contract_deltas[row["contract_id"]][1] += credit
+
+    with transaction.atomic(using=using):
+        for farmer_id, (debit, credit) in farmer_deltas.items():
+            _apply_delta(FarmerBalance, "farmer_id", farmer_id, debit, credit, using)
+        for contract_id, (debit, credit) in contract_deltas.items():
+            _apply_delta(ContractBalance, "contract_id", contract_id, debit, credit, using)
+
+
+def _apply_delta(model, key, value, debit, credit, using):
+    if not debit and not credit:
+        return
+
+    model.objects.using(using).get_or_create(**{key: value})
+    model.objects.using(using).filter(**{key: value}).update(
+        total_debit=F("total_debit") + debit,
+        total_credit=F("total_credit") + credit,
+        balance=F("balance") + debit - credit,
+    )
+
+
+def ledger_totals(group_by, using=DEFAULT_DB_ALIAS):
+    """Ledger бўйича ``group_by`` (farmer_id / contract_id) кесимида жамланмалар."""
+    return (
+        Ledger.objects.using(using)
+        .order_by()
+        .values(group_by)
+        .annotate(
+            total_debit=Coalesce(Sum("debit"), ZERO),
+            total_credit=Coalesce(Sum("credit"), ZERO),
+        )
+    )
+
+
+def find_balance_mismatches(using=DEFAULT_DB_ALIAS):
+    """
+    Сақланган балансларни Ledger йиғиндиси билан солиштиради.
+
+    Фарқ бор ёзувларни ``(kind, object_id, stored, expected)`` кўринишида қайтаради.
+    """
+    mismatches = []
+
+    for model, key in ((FarmerBalance, "farmer_id"), (ContractBalance, "contract_id")):
+        kind = key.removesuffix("_id")
+        expected = {
+            row[key]: (row["total_debit"], row["total_credit"])
+            for row in ledger_totals(key, using)
+        }
+        stored = {
+            row[key]: (row["total_debit"], row["total_credit"], row["balance"])
+            for row in model.objects.using(using).values(key, "total_debit", "total_credit", "balance")
+        }
+
+        for object_id in sorted(set(expected) | set(stored)):
+            debit, credit = expected.get(object_id, (ZERO, ZERO))
+            stored_debit, stored_credit, stored_balance = stored.get(object_id, (ZERO, ZERO, ZERO))
+            if (stored_debit, stored_credit, stored_balance) != (debit, credit, debit - credit):
+                mismatches.append((kind, object_id, stored_balance, debit - credit))
+
+    return mismatches
+
+
+def rebuild_balances(using=DEFAULT_DB_ALIAS):
+    """Сақланган балансларни Ledger'дан тўлиқ қайта ҳисоблайди."""
+    with transaction.atomic(using=using):
+        for model, key in ((FarmerBalance, "farmer_id"), (ContractBalance, "contract_id")):
+            model.objects.using(using).all().delete()
+            model.objects.using(using).bulk_create(
+                [
+                    model(
+                        **{key: row[key]},
+                        total_debit=row["total_debit"],
+                        total_credit=row["total_credit"],
+                        balance=row["total_debit"] - row["total_credit"],
+                    )
+                    for row in ledger_totals(key, using)
+                ],
+                batch_size=1000,
+            )
+
+    ledger_changed.send(sender=Ledger, using=using)
+
+
+# ==========================================
+# 🔹 RUNNING BALANCE + MONTHLY SNAPSHOTS
+# ==========================================
+
+def month_end(value):
+    return value.replace(day=calendar.monthrange(value.year, value.month)[1])
+
+
+def restate_running_balances(rows, using=DEFAULT_DB_ALIAS):
+    """
+    Ўзгарган Ledger қаторлари (``farmer_id``, ``contract_id``, ``date``) учун
+    ``balance_after`` / ``contract_balance_after`` ни шу санадан бошлаб қайта ёзади
+    ва фермернинг ойлик қолдиқларини янгилайди. Эски санага киритилган қатор ҳам
+    кейинги қаторларни тўғри силжитади.
+    """
+    farmer_from = {}
+    contract_from = {}
+    for row in rows:
+        # Ойлик айланма тўлиқ бўлиши учун ой бошидан бошлаймиз
+        start = row["date"].replace(day=1)
+        farmer_from[row["farmer_id"]] = min(start, farmer_from.get(row["farmer_id"], start))
+        contract_from[row["contract_id"]] = min(start, contract_from.get(row["contract_id"], start))
+
+    with transaction.atomic(using=using):
+        for farmer_id, from_date in farmer_from.items():
+            tail = _restate_tail("farmer_id", farmer_id, "balance_after", from_date, using)
+            _refresh_snapshots(farmer_id, from_date, tail, using)
+        for contract_id, from_date in contract_from.items():
+            _restate_tail("contract_id", contract_id, "contract_balance_after", from_date, using)
+
+
+def _restate_tail(key, value, field, from_date, using):
+    opening = (
+        Ledger.objects.using(using)
+        .filter(**{key: value}, date__lt=from_date)
+        .order_by("-date", "-id")
+        .values_list(field, flat=True)
+        .first()
+    ) or ZERO
+
+    tail = list(
+        Ledger.objects.using(using)
+        .filter(**{key: value}, date__gte=from_date)
+        .order_by("date", "id")
+        .only("id", "date", "debit", "credit", field)
+    )
+
+    running = opening
+    changed = []
+    for ledger in tail:
+        running += ledger.debit - ledger.credit
+        if getattr(ledger, field) != running:
+            setattr(ledger, field, running)
+            changed.append(ledger)
+
+    if changed:
+        Ledger.objects.using(using).bulk_update(changed, [field], batch_size=500)
+
+    return tail
+
+
+def _refresh_snapshots(farmer_id, from_date, tail, using):
+    LedgerSnapshot.objects.using(using).filter(farmer_id=farmer_id, period_end__gte=from_date).delete()
+
+    periods = {}
+    for ledger in tail:
+        period_end = month_end(ledger.date)
+        snapshot = periods.setdefault(
+            period_end,
+            LedgerSnapshot(farmer_id=farmer_id, period_end=period_end, debit=ZERO, credit=ZERO),
+        )
+        snapshot.debit += ledger.debit
+        snapshot.credit += ledger.credit
+        snapshot.balance = ledger.balance_after
+
+    LedgerSnapshot.objects.using(using).bulk_create(periods.values())
+
+
+def update_running_column(model, partition, value_sql, field, using=DEFAULT_DB_ALIAS):
+    """
+    ``field`` ни ``SUM(value_sql) OVER (PARTITION BY partition ORDER BY date, id)``
+    билан битта UPDATE орқали тўлдиради.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    partition_sql = ", ".join(qn(column) for column in partition)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {qn(field)} = running.value
+            FROM (
+                SELECT id, SUM({value_sql}) OVER (PARTITION BY {partition_sql} ORDER BY date, id) AS value
+                FROM {table}
+            ) running
+            WHERE {table}.id = running.id
+            """
+        )
+
+
+def rebuild_running_balances(using=DEFAULT_DB_ALIAS):
+    """Барча ``balance_after`` ва ойлик қолдиқларни битта window-функцияли UPDATE билан қайта ҳисоблайди."""
+    with transaction.atomic(using=using):
+        update_running_column(Ledger, ["farmer_id"], "debit - credit", "balance_after", using)
+        update_running_column(Ledger, ["contract_id"], "debit - credit", "contract_balance_after", using)
+
+        LedgerSnapshot.objects.using(using).all().delete()
+
+        months = (
+            Ledger.objects.using(using)
+            .order_by()
+            .annotate(period=TruncMonth("date"))
+            .values("farmer_id", "period")
+            .annotate(debit=Coalesce(Sum("debit"), ZERO), credit=Coalesce(Sum("credit"), ZERO))
+            .order_by("farmer_id", "period")
+        )
+
+        snapshots = []
+        current_farmer = None
+        running = ZERO
+        for row in months.iterator():
+            if row["farmer_id"] != current_farmer:
+                current_farmer = row["farmer_id"]
+                running = ZERO
+            running += row["debit"] - row["credit"]
+            snapshots.append(
+                LedgerSnapshot(
+                    farmer_id=row["farmer_id"],
+                    period_end=month_end(row["period"]),
+                    debit=row["debit"],
+                    credit=row["credit"],
+                    balance=running,
+                )
+            )
+
+        LedgerSnapshot.objects.using(using).bulk_create(snapshots, batch_size=1000)
+
+    ledger_changed.send(sender=Ledger, using=using)
+
+
+def farmer_balance_as_of(farmer_id, as_of):
+    """
+    Санадаги баланс: охирги ойлик қолдиқ (битта индексли қидирув) + ундан кейинги
+    қисқа Ledger думи.
+    """
+    snapshot = (
+        LedgerSnapshot.objects
+        .filter(farmer_id=farmer_id, period_end__lte=as_of)
+        .order_by("-period_end")
+        .first()
+    )
+
+    tail = Ledger.objects.filter(farmer_id=farmer_id, date__lte=as_of)
+    opening = ZERO
+    if snapshot:
+        tail = tail.filter(date__gt=snapshot.period_end)
+        opening = snapshot.balance
+
+    totals = tail.order_by().aggregate(
+        debit=Coalesce(Sum("debit"), ZERO),
+        credit=Coalesce(Sum("credit"), ZERO),
+    )
+
+    return {
+        "farmer_id": farmer_id,
+        "as_of": as_of,
+        "snapshot_period_end": snapshot.period_end if snapshot else None,
+        "opening_balance": opening,
+        "debit": totals["debit"],
+        "credit": totals["credit"],
+        "balance": opening + totals["debit"] - totals["credit"],
+    }
+
+
+# ==========================================
+# 🔹 FARMER STATEMENT (KEYSET)
+# ==========================================
+
+STATEMENT_PAGE_SIZE = 20
+
+
+def farmer_statement(farmer_id, after=None, limit=STATEMENT_PAGE_SIZE):
+    """
+    Фермер ҳисобот саҳифаси: Ledger қаторлари ҳужжат рақамлари билан, жорий қолдиқ
+    SQL'даги window-функция орқали ҳисобланади.
+
+    ``after`` — олдинги саҳифанинг охирги Ledger id'си (курсор). Саҳифа
+    ``(date, id) > (cursor.date, cursor.id)`` шарти билан индекс бўйича олинади,
+    шунинг учун чуқур саҳифалар биринчи саҳифа каби арзон. Бошланғич қолдиқ
+    курсор қаторининг ``balance_after`` қийматидан олинади.
+
+    Курсор шу фермерга тегишли бўлмаса ``None`` қайтаради.
+    """
+    rows = Ledger.objects.filter(farmer_id=farmer_id)
+    opening = ZERO
+
+    if after is not None:
+        cursor = (
+            Ledger.objects
+            .filter(pk=after, farmer_id=farmer_id)
+            .values("date", "balance_after")
+            .first()
+        )
+        if cursor is None:
+            return None
+        opening = cursor["balance_after"]
+        rows = rows.filter(Q(date__gt=cursor["date"]) | Q(date=cursor["date"], id__gt=after))
+
+    page = list(
+        rows
+        .annotate(
+            kind=Case(
+                When(given_document__isnull=False, then=Value("given")),
+                default=Value("received"),
+                output_field=CharField(),
+            ),
+            document_id=Coalesce("given_document_id", "received_document_id"),
+            document_number=Coalesce("given_document__number", "received_document__number"),
+            contract_number=F("contract__number"),
+            balance=Window(
+                Sum(F("debit") - F("credit")),
+                order_by=[F("date").asc(), F("id").asc()],
+            ) + Value(opening),
+        )
+        .order_by("date", "id")
+        .values(
+            "id",
+            "date",
+            "kind",
+            "document_id",
+            "document_number",
+            "contract_number",
+            "debit",
+            "credit",
+            "balance",
+        )[:limit + 1]
+    )
+
+    has_next = len(page) > limit
+    page = page[:limit]
+
+    return {
+        "farmer_id": farmer_id,
+        "opening_balance": opening,
+        "results": page,
+        "next_cursor": page[-1]["id"] if has_next else None,
+    }
@@ -0,0 +1,53 @@
+"""
+Bot'га фойдаланувчи рухсати ўзгаргани ҳақида хабар бериш.
+
+Bot рухсат жавобларини бир неча дақиқа кэшлайди; админ ``BotUser.is_active``
+ни ўзгартирганда шу ердан bot'нинг локал endpoint'ига push юборилади ва кэш
+ёзуви дарҳол ўчирилади. Кэш ҳар бир bot процессида алоҳида, шунинг учун push
+``BOT_ACCESS_PUSH_URLS`` даги барча манзилларга (ҳар процессга биттадан)
+параллел юборилади. Рўйхат бўш бўлса ҳеч нарса қилинмайди.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PUSH_TIMEOUT = 2
+
+
+def push_access_change(telegram_id):
+    """Барча bot процессларига юборади; ҳаммаси қабул қилса ``True``."""
+    urls = getattr(settings, "BOT_ACCESS_PUSH_URLS", [])
+    if not urls:
+        return False
+
+    if len(urls) == 1:
+        return _push(urls[0], telegram_id)
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        return all(executor.map(lambda url: _push(url, telegram_id), urls))
+
+
+def _push(url, telegram_id):
+    request = Request(
+        url,
+        data=json.dumps({"telegram_id": telegram_id}).encode(),
+        headers={
+            "Content-Type": "application/json",
+            "X-Bot-Secret": getattr(settings, "BOT_ACCESS_PUSH_SECRET", ""),
+        },
+        method="POST",
+    )
+    try:
+        with urlopen(request, timeout=PUSH_TIMEOUT) as response:
+            return response.status == 200
+    except (URLError, OSError) as error:
+        # Bot ишламаса кэш TTL тугагач барибир янгиланади
+        logger.warning("Bot access push to %s failed for %s: %r", url, telegram_id, error)
+        return False
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from query.balances import find_balance_mismatches, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Сақланган фермер/шартнома балансларини Ledger йиғиндиси билан солиштиради."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Фарқ топилса балансларни Ledger'дан қайта ҳисоблаш.",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = find_balance_mismatches()
+
+        for kind, object_id, stored, expected in mismatches:
+            self.stdout.write(f"{kind} #{object_id}: stored={stored} expected={expected}")
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Баланслар Ledger билан мос."))
+            return
+
+        if not options["fix"]:
+            raise CommandError(f"{len(mismatches)} та баланс Ledger билан мос эмас.")
+
+        rebuild_balances()
+        self.stdout.write(self.style.SUCCESS(f"{len(mismatches)} та баланс қайта ҳисобланди."))
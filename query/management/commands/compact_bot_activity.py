@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from query.activity import prune_raw_activity, rebuild_rollups, update_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Bot фаоллиги соатлик жамланмаларини хом журналдан қайта ҳисоблайди ва "
+        "--keep-days берилса, ундан эски хом қаторларни ўчиради (жамланмалар қолади)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=None,
+            help="Хом журналда қолдириладиган кунлар сони (стандарт: ўчирилмайди).",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_rollups()
+        message = f"Соатлик жамланмалар қайта ҳисобланди: {rebuilt} қатор."
+
+        if options["keep_days"] is not None:
+            # Ўчириладиган хом қаторлар аввал сессияларга киритилади
+            update_sessions()
+            deleted = prune_raw_activity(options["keep_days"])
+            message += f" {deleted} та эски хом қатор ўчирилди."
+
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,125 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from query.balances import rebuild_balances, rebuild_running_balances
+from query.posting import diff_ledger_rows, farmer_ranges, rebuild_ledger_rows, reprice_received_items
+
+
+def _rebuild_range(farmer_range, reprice, using):
+    repriced = reprice_received_items(farmer_range, using=using) if reprice else 0
+    stats = rebuild_ledger_rows(farmer_range, using=using)
+    return farmer_range, repriced, stats
+
+
+def _rebuild_range_in_worker(farmer_range, reprice, using):
+    # Процесс ота-процессдан мерос қолган уланишни ишлатмаслиги керак
+    connections.close_all()
+    try:
+        return _rebuild_range(farmer_range, reprice, using)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Ҳужжат позицияларидан барча Ledger қаторларини INSERT ... SELECT / GROUP BY "
+        "билан қайта қуради, сақланган баланслар, жорий қолдиқлар ва ойлик қолдиқларни янгилайди."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Ҳеч нарса ёзмасдан Ledger ва ҳужжатлар орасидаги фарқларни чиқариш.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Фермер id оралиқлари бўйича параллел процесслар сони (PostgreSQL).",
+        )
+        parser.add_argument(
+            "--chunks",
+            type=int,
+            default=None,
+            help="Фермер id оралиқлари сони (стандарт: workers * 4).",
+        )
+        parser.add_argument(
+            "--reprice",
+            action="store_true",
+            help="Аввал пахта позициялари нарх/суммасини шартнома нархи ва коэффициентлардан қайта ҳисоблаш.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        self.verbosity = options["verbosity"]
+        started = time.monotonic()
+
+        if options["dry_run"]:
+            self._diff(using)
+            return
+
+        workers = max(1, options["workers"])
+        if workers > 1 and connections[using].vendor == "sqlite":
+            self.stderr.write("SQLite параллел ёзишни қўлламайди, битта процесс ишлатилади.")
+            workers = 1
+
+        ranges = farmer_ranges(options["chunks"] or workers * 4, using=using)
+        totals = {"repriced": 0, "deleted": 0, "inserted": 0}
+
+        if workers == 1:
+            results = (_rebuild_range(farmer_range, options["reprice"], using) for farmer_range in ranges)
+            self._collect(results, totals)
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                futures = [
+                    pool.submit(_rebuild_range_in_worker, farmer_range, options["reprice"], using)
+                    for farmer_range in ranges
+                ]
+                self._collect((future.result() for future in futures), totals)
+
+        rebuild_balances(using=using)
+        rebuild_running_balances(using=using)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ledger қайта қурилди: {totals['inserted']} қатор ёзилди, "
+                f"{totals['deleted']} қатор ўчирилди, {totals['repriced']} позиция қайта нархланди "
+                f"({time.monotonic() - started:.1f} с)."
+            )
+        )
+
+    def _collect(self, results, totals):
+        for (low, high), repriced, stats in results:
+            totals["repriced"] += repriced
+            totals["deleted"] += stats["deleted"]
+            totals["inserted"] += stats["inserted"]
+            if self.verbosity > 1:
+                self.stdout.write(f"  фермер {low}..{high}: {stats['inserted']} қатор")
+
+    def _diff(self, using):
+        discrepancies = diff_ledger_rows(using=using)
+
+        for kind, document_id, actual, expected in discrepancies:
+            self.stdout.write(f"{kind} #{document_id}: ledger={_format(actual)} expected={_format(expected)}")
+
+        if discrepancies:
+            self.stdout.write(self.style.WARNING(f"{len(discrepancies)} та фарқ топилди."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ledger ҳужжатлар билан мос."))
+
+
+def _format(row):
+    if row is None:
+        return "-"
+    farmer_id, contract_id, date, amount = row
+    return f"{amount} (farmer={farmer_id}, contract={contract_id}, date={date})"
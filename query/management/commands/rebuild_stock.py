@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from query.stock import rebuild_stock_journal
+
+
+class Command(BaseCommand):
+    help = (
+        "Кирим ҳужжатлари ва бериш позицияларидан омбор журналини (StockMovement) "
+        "тўлиқ қайта қуради, жорий қолдиқлар ва омбор × маҳсулот қолдиқларини янгилайди."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = rebuild_stock_journal(chunk_size=options["chunk_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Омбор журнали қайта қурилди: {stats['inserted']} қатор ёзилди, "
+                f"{stats['deleted']} қатор ўчирилди ({time.monotonic() - started:.1f} с)."
+            )
+        )
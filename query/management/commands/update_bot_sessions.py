@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from query.activity import rebuild_sessions, update_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Bot фаоллигини сессияларга ажратади: охирги сессиядан BOT_SESSION_LOOKBACK_SECONDS "
+        "олдинги ҳаракатлардан бошлаб (--rebuild — сақланган бутун хом журнални) LAG "
+        "window-функцияси билан. Cron орқали мунтазам ишга туширилади."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--gap-minutes",
+            type=int,
+            default=None,
+            help="Сессияни узадиган танаффус (стандарт: BOT_SESSION_GAP_SECONDS).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Барча сессияларни ўчириб қайта ҳисоблаш (танаффус ўзгарганда).",
+        )
+
+    def handle(self, *args, **options):
+        gap = timedelta(minutes=options["gap_minutes"]) if options["gap_minutes"] else None
+        created = rebuild_sessions(gap) if options["rebuild"] else update_sessions(gap)
+        self.stdout.write(self.style.SUCCESS(f"Сессиялар янгиланди: {created} та сессия ёзилди."))
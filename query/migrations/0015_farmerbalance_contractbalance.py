@@ -0,0 +1,73 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from decimal import Decimal
+
+
+def populate_balances(apps, schema_editor):
+    Ledger = apps.get_model("query", "Ledger")
+    zero = Decimal("0.00")
+
+    for model_name, key in (("FarmerBalance", "farmer_id"), ("ContractBalance", "contract_id")):
+        model = apps.get_model("query", model_name)
+        rows = (
+            Ledger.objects
+            .order_by()
+            .values(key)
+            .annotate(
+                total_debit=Coalesce(Sum("debit"), zero),
+                total_credit=Coalesce(Sum("credit"), zero),
+            )
+        )
+        model.objects.bulk_create(
+            [
+                model(
+                    **{key: row[key]},
+                    total_debit=row["total_debit"],
+                    total_credit=row["total_credit"],
+                    balance=row["total_debit"] - row["total_credit"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0014_contract_contract_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractBalance',
+            fields=[
+                ('contract', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance_record', serialize=False, to='query.contract', verbose_name='Шартнома')),
+                ('total_debit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Жами дебет')),
+                ('total_credit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Жами кредит')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Баланс')),
+            ],
+            options={
+                'verbose_name': 'Шартнома баланси',
+                'verbose_name_plural': 'Шартнома баланслари',
+            },
+        ),
+        migrations.CreateModel(
+            name='FarmerBalance',
+            fields=[
+                ('farmer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance_record', serialize=False, to='query.farmer', verbose_name='Фермер')),
+                ('total_debit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Жами дебет')),
+                ('total_credit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Жами кредит')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Баланс')),
+            ],
+            options={
+                'verbose_name': 'Фермер баланси',
+                'verbose_name_plural': 'Фермер баланслари',
+            },
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:38
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
+from decimal import Decimal
+
+
+def drop_duplicate_postings(apps, schema_editor):
+    Ledger = apps.get_model("query", "Ledger")
+    removed = 0
+
+    for column in ("given_document_id", "received_document_id"):
+        duplicates = (
+            Ledger.objects
+            .exclude(**{column: None})
+            .order_by()
+            .values(column)
+            .annotate(rows=Count("id"), keep_id=Max("id"))
+            .filter(rows__gt=1)
+        )
+        for row in duplicates:
+            removed += (
+                Ledger.objects
+                .filter(**{column: row[column]})
+                .exclude(id=row["keep_id"])
+                .delete()[0]
+            )
+
+    if not removed:
+        return
+
+    zero = Decimal("0.00")
+    for model_name, key in (("FarmerBalance", "farmer_id"), ("ContractBalance", "contract_id")):
+        model = apps.get_model("query", model_name)
+        model.objects.all().delete()
+        model.objects.bulk_create(
+            [
+                model(
+                    **{key: row[key]},
+                    total_debit=row["total_debit"],
+                    total_credit=row["total_credit"],
+                    balance=row["total_debit"] - row["total_credit"],
+                )
+                for row in (
+                    Ledger.objects
+                    .order_by()
+                    .values(key)
+                    .annotate(
+                        total_debit=Coalesce(Sum("debit"), zero),
+                        total_credit=Coalesce(Sum("credit"), zero),
+                    )
+                )
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0015_farmerbalance_contractbalance'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_postings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ledger',
+            constraint=models.UniqueConstraint(fields=('given_document',), name='unique_ledger_per_given_document'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledger',
+            constraint=models.UniqueConstraint(fields=('received_document',), name='unique_ledger_per_received_document'),
+        ),
+    ]
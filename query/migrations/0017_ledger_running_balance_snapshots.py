@@ -0,0 +1,93 @@
+# Generated by Django 4.2.16 on 2026-10-17 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import calendar
+from decimal import Decimal
+
+
+def populate_running_balances(apps, schema_editor):
+    Ledger = apps.get_model("query", "Ledger")
+    LedgerSnapshot = apps.get_model("query", "LedgerSnapshot")
+    zero = Decimal("0.00")
+
+    for partition, field in (("farmer_id", "balance_after"), ("contract_id", "contract_balance_after")):
+        running = {}
+        changed = []
+        rows = Ledger.objects.order_by(partition, "date", "id").only("id", partition, "debit", "credit")
+        for ledger in rows.iterator(chunk_size=2000):
+            key = getattr(ledger, partition)
+            running[key] = running.get(key, zero) + ledger.debit - ledger.credit
+            setattr(ledger, field, running[key])
+            changed.append(ledger)
+            if len(changed) >= 2000:
+                Ledger.objects.bulk_update(changed, [field])
+                changed = []
+        if changed:
+            Ledger.objects.bulk_update(changed, [field])
+
+    snapshots = {}
+    for ledger in Ledger.objects.order_by("farmer_id", "date", "id").iterator(chunk_size=2000):
+        period_end = ledger.date.replace(day=calendar.monthrange(ledger.date.year, ledger.date.month)[1])
+        snapshot = snapshots.setdefault(
+            (ledger.farmer_id, period_end),
+            LedgerSnapshot(farmer_id=ledger.farmer_id, period_end=period_end, debit=zero, credit=zero),
+        )
+        snapshot.debit += ledger.debit
+        snapshot.credit += ledger.credit
+        snapshot.balance = ledger.balance_after
+
+    LedgerSnapshot.objects.bulk_create(snapshots.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0016_ledger_unique_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(verbose_name='Давр охири')),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Давр дебети')),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Давр кредити')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Давр охирига баланс')),
+            ],
+            options={
+                'verbose_name': 'Ойлик қолдиқ',
+                'verbose_name_plural': 'Ойлик қолдиқлар',
+                'ordering': ['-period_end'],
+            },
+        ),
+        migrations.AddField(
+            model_name='ledger',
+            name='balance_after',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Фермер қолдиғи'),
+        ),
+        migrations.AddField(
+            model_name='ledger',
+            name='contract_balance_after',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Шартнома қолдиғи'),
+        ),
+        migrations.AddIndex(
+            model_name='ledger',
+            index=models.Index(fields=['farmer', 'date', 'id'], name='ledger_farmer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledger',
+            index=models.Index(fields=['contract', 'date', 'id'], name='ledger_contract_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='ledgersnapshot',
+            name='farmer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_snapshots', to='query.farmer', verbose_name='Фермер'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgersnapshot',
+            constraint=models.UniqueConstraint(fields=('farmer', 'period_end'), name='unique_snapshot_per_farmer_period'),
+        ),
+        migrations.RunPython(populate_running_balances, migrations.RunPython.noop),
+    ]
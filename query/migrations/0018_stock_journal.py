@@ -0,0 +1,123 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal
+
+
+def populate_stock_journal(apps, schema_editor):
+    MineralWarehouseReceipt = apps.get_model("query", "MineralWarehouseReceipt")
+    GoodsGivenItem = apps.get_model("query", "GoodsGivenItem")
+    StockMovement = apps.get_model("query", "StockMovement")
+    StockBalance = apps.get_model("query", "StockBalance")
+    zero = Decimal("0.00")
+
+    movements = []
+    for row in MineralWarehouseReceipt.objects.values("id", "warehouse_id", "product_id", "date", "quantity", "amount"):
+        movements.append(
+            StockMovement(
+                warehouse_id=row["warehouse_id"],
+                product_id=row["product_id"],
+                date=row["date"],
+                quantity=row["quantity"],
+                amount=row["amount"],
+                receipt_id=row["id"],
+            )
+        )
+    items = GoodsGivenItem.objects.values(
+        "id",
+        "product_id",
+        "quantity",
+        "amount",
+        "document__date",
+        "document__warehouse_id",
+        "document__farmer_id",
+        "document__farmer__massive__district_id",
+    )
+    for row in items:
+        movements.append(
+            StockMovement(
+                warehouse_id=row["document__warehouse_id"],
+                product_id=row["product_id"],
+                district_id=row["document__farmer__massive__district_id"],
+                farmer_id=row["document__farmer_id"],
+                date=row["document__date"],
+                quantity=-row["quantity"],
+                amount=-row["amount"],
+                given_item_id=row["id"],
+            )
+        )
+
+    # id'лар сана тартибида берилиши учун — balance_after (date, id) бўйича
+    movements.sort(key=lambda item: item.date)
+    running = {}
+    balances = {}
+    for movement in movements:
+        pair = (movement.warehouse_id, movement.product_id)
+        running[pair] = running.get(pair, zero) + movement.quantity
+        movement.balance_after = running[pair]
+
+        balance = balances.setdefault(
+            pair + (movement.district_id,),
+            StockBalance(warehouse_id=movement.warehouse_id, product_id=movement.product_id, district_id=movement.district_id),
+        )
+        if movement.receipt_id is not None:
+            balance.quantity_in += movement.quantity
+            balance.amount_in += movement.amount
+        else:
+            balance.quantity_out -= movement.quantity
+            balance.amount_out -= movement.amount
+
+    StockMovement.objects.bulk_create(movements, batch_size=2000)
+    StockBalance.objects.bulk_create(balances.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0017_ledger_running_balance_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Сана')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=16, verbose_name='Миқдори')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Сумма')),
+                ('balance_after', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Омбордаги қолдиқ')),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='query.district', verbose_name='Туман')),
+                ('farmer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='query.farmer', verbose_name='Фермер')),
+                ('given_item', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movement', to='query.goodsgivenitem')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='query.product', verbose_name='Маҳсулот')),
+                ('receipt', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movement', to='query.mineralwarehousereceipt')),
+                ('warehouse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='query.warehouse', verbose_name='Омбор')),
+            ],
+            options={
+                'verbose_name': 'Омбор журнали',
+                'verbose_name_plural': 'Омбор журнали',
+                'ordering': ['-date', '-id'],
+                'indexes': [models.Index(fields=['warehouse', 'product', 'date', 'id'], name='stock_wh_product_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_in', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Кирим')),
+                ('quantity_out', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Чиқим')),
+                ('amount_in', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Кирим суммаси')),
+                ('amount_out', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Чиқим суммаси')),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_balances', to='query.district', verbose_name='Туман')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_balances', to='query.product', verbose_name='Маҳсулот')),
+                ('warehouse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_balances', to='query.warehouse', verbose_name='Омбор')),
+            ],
+            options={
+                'verbose_name': 'Омбор қолдиғи',
+                'verbose_name_plural': 'Омбор қолдиқлари',
+                'indexes': [models.Index(fields=['warehouse', 'product', 'district'], name='stock_balance_key_idx')],
+            },
+        ),
+        migrations.RunPython(populate_stock_journal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncHour
+
+
+def populate_hourly_activity(apps, schema_editor):
+    BotUserActivity = apps.get_model("query", "BotUserActivity")
+    BotUserActivityHourly = apps.get_model("query", "BotUserActivityHourly")
+
+    rows = (
+        BotUserActivity.objects
+        .annotate(bucket=TruncHour("created_at"))
+        .values("user_id", "bucket", "action_name", "is_allowed")
+        .annotate(actions_count=Count("id"), first_activity=Min("created_at"), last_activity=Max("created_at"))
+        .order_by()
+    )
+    BotUserActivityHourly.objects.bulk_create(
+        [
+            BotUserActivityHourly(
+                user_id=row["user_id"],
+                hour=row["bucket"],
+                action_name=row["action_name"],
+                is_allowed=row["is_allowed"],
+                actions_count=row["actions_count"],
+                first_activity=row["first_activity"],
+                last_activity=row["last_activity"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0018_stock_journal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotUserActivityHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Соат')),
+                ('action_name', models.CharField(max_length=100, verbose_name='Ҳаракат номи')),
+                ('is_allowed', models.BooleanField(default=True, verbose_name='Рухсат берилган')),
+                ('actions_count', models.PositiveIntegerField(default=0, verbose_name='Ҳаракатлар сони')),
+                ('first_activity', models.DateTimeField(verbose_name='Биринчи ҳаракат')),
+                ('last_activity', models.DateTimeField(verbose_name='Охирги ҳаракат')),
+            ],
+            options={
+                'verbose_name': 'Bot фаоллик (соатлик)',
+                'verbose_name_plural': 'Bot фаоллиги (соатлик)',
+                'ordering': ['-hour'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='botuseractivity',
+            index=models.Index(fields=['created_at'], name='bot_activity_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='botuseractivityhourly',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_activities', to='query.botuser', verbose_name='Фойдаланувчи'),
+        ),
+        migrations.AddIndex(
+            model_name='botuseractivityhourly',
+            index=models.Index(fields=['hour'], name='bot_activity_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='botuseractivityhourly',
+            constraint=models.UniqueConstraint(fields=('user', 'hour', 'action_name', 'is_allowed'), name='bot_activity_hourly_key'),
+        ),
+        migrations.RunPython(populate_hourly_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0019_bot_activity_hourly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotUserSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Бошланди')),
+                ('ended_at', models.DateTimeField(verbose_name='Тугади')),
+                ('actions_count', models.PositiveIntegerField(default=0, verbose_name='Ҳаракатлар сони')),
+                ('first_activity_id', models.BigIntegerField(verbose_name='Биринчи ҳаракат ID')),
+                ('last_activity_id', models.BigIntegerField(unique=True, verbose_name='Охирги ҳаракат ID')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='query.botuser', verbose_name='Фойдаланувчи')),
+            ],
+            options={
+                'verbose_name': 'Bot сессия',
+                'verbose_name_plural': 'Bot сессиялари',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['user', 'started_at'], name='bot_session_user_started_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('query', '0020_bot_user_sessions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='botuseractivity',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Вақти'),
+        ),
+    ]
@@ -4,4 +4,5 @@ from .contracts import *
 from .documents import *
 from .accounting import *
 from .cotton import *
-from .bot import BotUser, BotUserActivity
+from .bot import BotUser, BotUserActivity, BotUserActivityHourly, BotUserSession
+from .stock import *
@@ -14,12 +14,92 @@ class Ledger(models.Model):
     debit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
     credit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
     date = models.DateField()
+    balance_after = models.DecimalField("Фермер қолдиғи", max_digits=18, decimal_places=2, default=0)
+    contract_balance_after = models.DecimalField("Шартнома қолдиғи", max_digits=18, decimal_places=2, default=0)
 
 
     class Meta:
         verbose_name = "Ҳаракат журнали"
         verbose_name_plural = "Ҳаракат журнали"
         ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["given_document"],
+                name="unique_ledger_per_given_document"
+            ),
+            models.UniqueConstraint(
+                fields=["received_document"],
+                name="unique_ledger_per_received_document"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["farmer", "date", "id"], name="ledger_farmer_date_idx"),
+            models.Index(fields=["contract", "date", "id"], name="ledger_contract_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.farmer} | D:{self.debit} C:{self.credit}"
+
+
+class FarmerBalance(models.Model):
+    farmer = models.OneToOneField(
+        Farmer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="balance_record",
+        verbose_name="Фермер",
+    )
+    total_debit = models.DecimalField("Жами дебет", max_digits=18, decimal_places=2, default=0)
+    total_credit = models.DecimalField("Жами кредит", max_digits=18, decimal_places=2, default=0)
+    balance = models.DecimalField("Баланс", max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Фермер баланси"
+        verbose_name_plural = "Фермер баланслари"
+
+    def __str__(self):
+        return f"{self.farmer_id} | {self.balance}"
+
+
+class ContractBalance(models.Model):
+    contract = models.OneToOneField(
+        Contract,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="balance_record",
+        verbose_name="Шартнома",
+    )
+    total_debit = models.DecimalField("Жами дебет", max_digits=18, decimal_places=2, default=0)
+    total_credit = models.DecimalField("Жами кредит", max_digits=18, decimal_places=2, default=0)
+    balance = models.DecimalField("Баланс", max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Шартнома баланси"
+        verbose_name_plural = "Шартнома баланслари"
+
+    def __str__(self):
+        return f"{self.contract_id} | {self.balance}"
+
+
+class LedgerSnapshot(models.Model):
+    """Фермернинг ойлик ёпилиш қолдиғи: ой айланмаси ва ой охиридаги баланс."""
+
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, related_name="ledger_snapshots", verbose_name="Фермер")
+    period_end = models.DateField("Давр охири")
+    debit = models.DecimalField("Давр дебети", max_digits=18, decimal_places=2, default=0)
+    credit = models.DecimalField("Давр кредити", max_digits=18, decimal_places=2, default=0)
+    balance = models.DecimalField("Давр охирига баланс", max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Ойлик қолдиқ"
+        verbose_name_plural = "Ойлик қолдиқлар"
+        ordering = ["-period_end"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["farmer", "period_end"],
+                name="unique_snapshot_per_farmer_period"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.farmer_id} | {self.period_end} | {self.balance}"
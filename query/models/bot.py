@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class BotUser(models.Model):
@@ -37,12 +38,84 @@ class BotUserActivity(models.Model):
     action_name = models.CharField("Ҳаракат номи", max_length=100)
     action_payload = models.TextField("Маълумот", blank=True)
     is_allowed = models.BooleanField("Рухсат берилган", default=True)
-    created_at = models.DateTimeField("Вақти", auto_now_add=True)
+    # auto_now_add эмас: bulk endpoint bot'даги ҳақиқий вақтни сақлайди
+    created_at = models.DateTimeField("Вақти", default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = "Bot фаоллик"
         verbose_name_plural = "Bot фаолликлари"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], name="bot_activity_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user_id} - {self.action_name} ({self.created_at})"
+
+
+class BotUserActivityHourly(models.Model):
+    """
+    BotUserActivity'нинг соатлик жамланмаси: (фойдаланувчи, соат, ҳаракат номи,
+    рухсат) бўйича битта қатор. Аналитика хом журнал ўрнига шуни ўқийди.
+    """
+
+    user = models.ForeignKey(
+        BotUser,
+        on_delete=models.CASCADE,
+        related_name="hourly_activities",
+        verbose_name="Фойдаланувчи",
+    )
+    hour = models.DateTimeField("Соат")
+    action_name = models.CharField("Ҳаракат номи", max_length=100)
+    is_allowed = models.BooleanField("Рухсат берилган", default=True)
+    actions_count = models.PositiveIntegerField("Ҳаракатлар сони", default=0)
+    first_activity = models.DateTimeField("Биринчи ҳаракат")
+    last_activity = models.DateTimeField("Охирги ҳаракат")
+
+    class Meta:
+        verbose_name = "Bot фаоллик (соатлик)"
+        verbose_name_plural = "Bot фаоллиги (соатлик)"
+        ordering = ["-hour"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "hour", "action_name", "is_allowed"],
+                name="bot_activity_hourly_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="bot_activity_hour_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.action_name} ({self.hour:%Y-%m-%d %H}:00) × {self.actions_count}"
+
+
+class BotUserSession(models.Model):
+    """
+    Фойдаланувчи сессияси: орасидаги танаффус ``BOT_SESSION_GAP_SECONDS`` дан
+    ошмаган кетма-кет ҳаракатлар. ``query.activity.update_sessions`` тўлдиради.
+    """
+
+    user = models.ForeignKey(
+        BotUser,
+        on_delete=models.CASCADE,
+        related_name="sessions",
+        verbose_name="Фойдаланувчи",
+    )
+    started_at = models.DateTimeField("Бошланди")
+    ended_at = models.DateTimeField("Тугади")
+    actions_count = models.PositiveIntegerField("Ҳаракатлар сони", default=0)
+    first_activity_id = models.BigIntegerField("Биринчи ҳаракат ID")
+    # Ҳар бир ҳаракат битта сессияга тегишли — энг каттаси қайта ишланган охирги ҳаракат
+    last_activity_id = models.BigIntegerField("Охирги ҳаракат ID", unique=True)
+
+    class Meta:
+        verbose_name = "Bot сессия"
+        verbose_name_plural = "Bot сессиялари"
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["user", "started_at"], name="bot_session_user_started_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.started_at:%Y-%m-%d %H:%M} – {self.ended_at:%H:%M} ({self.actions_count})"
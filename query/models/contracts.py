@@ -1,10 +1,17 @@
 from django.db import models
-from .counterparties import Farmer
+from .counterparties import Farmer, ledger_balance_subquery
 from django.db.models import Sum
 from decimal import Decimal
 #====================================================================================================================
 #=                                                                                                                 =#
 #====================================================================================================================
+class ContractQuerySet(models.QuerySet):
+
+    def with_balance(self):
+        """Шартнома балансини Ledger'дан subquery орқали ҳисоблайди."""
+        return self.annotate(balance_value=ledger_balance_subquery("contract"))
+
+
 class Contract(models.Model):
     TYPE_FUTURES = "futures"
     TYPE_FORWARD = "forward"
@@ -29,6 +36,8 @@ class Contract(models.Model):
     total_amount = models.DecimalField("Жами сумма",max_digits=16,decimal_places=2,default=0)
     is_active = models.BooleanField("Фаол", default=True)
 
+    objects = ContractQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Шартнома"
         verbose_name_plural = "Шартномалар"
@@ -41,6 +50,10 @@ class Contract(models.Model):
         ]
     @property
     def balance(self):
+        annotated = getattr(self, "balance_value", None)
+        if annotated is not None:
+            return annotated
+
         totals = self.ledgers.aggregate(
             total_debit=Sum("debit"),
             total_credit=Sum("credit")
@@ -3,19 +3,42 @@ from .counterparties import Farmer
 from decimal import Decimal
 from django.db import models
 from .contracts import Contract
-from django.db.models import Sum
+from django.db.models import DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 
 # ==========================================
 # DOCUMENT (Шапка)   ПАХТА
 # ==========================================
     
 
+class GoodsReceivedDocumentQuerySet(models.QuerySet):
+
+    def with_totals(self):
+        """Ҳужжат жами суммасини позициялардан subquery орқали ҳисоблайди."""
+        return self.annotate(
+            total_amount_value=Coalesce(
+                Subquery(
+                    GoodsReceivedItem.objects
+                    .filter(document=OuterRef("pk"))
+                    .order_by()
+                    .values("document")
+                    .annotate(total=Sum("amount"))
+                    .values("total"),
+                    output_field=DecimalField(max_digits=16, decimal_places=2),
+                ),
+                Decimal("0.00"),
+            )
+        )
+
+
 class GoodsReceivedDocument(models.Model):
     date = models.DateField("Сана")
     number = models.CharField("Ҳужжат рақами", max_length=50)
     farmer = models.ForeignKey(Farmer,on_delete=models.PROTECT,verbose_name="Фермер")
     contract = models.ForeignKey(Contract,on_delete=models.PROTECT,verbose_name="Шартнома")
 
+    objects = GoodsReceivedDocumentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Пахта қабул ҳужжати"
         verbose_name_plural = "Пахта қабул ҳужжатлари"
@@ -29,6 +52,10 @@ class GoodsReceivedDocument(models.Model):
 
     @property
     def total_amount(self):
+        annotated = getattr(self, "total_amount_value", None)
+        if annotated is not None:
+            return annotated
+
         total = self.received_items.aggregate(
             total=Sum("amount")
         )["total"]
@@ -57,6 +84,11 @@ class GoodsReceivedItem(models.Model):
         verbose_name_plural = "Қабул қилинган пахталар"
 
     def save(self, *args, **kwargs):
+        self.recalculate()
+        super().save(*args, **kwargs)
+
+    def recalculate(self):
+        """Вазн, нарх ва суммани шартнома нархи ва коэффициентлардан қайта ҳисоблайди."""
 
         # ==============================
         # 1️⃣ Ҳисобий вазн
@@ -80,8 +112,6 @@ class GoodsReceivedItem(models.Model):
         # ==============================
         self.amount = self.price * self.conditional_weight
 
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return f"{self.document.number} | {self.conditional_weight} кг"
 
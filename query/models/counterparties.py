@@ -1,12 +1,44 @@
 from django.db import models
 from .reference import Massive
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
+
+def ledger_balance_subquery(ledger_field):
+    """``Ledger`` бўйича (дебет - кредит) йиғиндисини ташқи қатор учун subquery қилиб беради."""
+    from .accounting import Ledger
+
+    return Coalesce(
+        Subquery(
+            Ledger.objects
+            .filter(**{ledger_field: OuterRef("pk")})
+            .order_by()
+            .values(ledger_field)
+            .annotate(total=Sum(F("debit") - F("credit")))
+            .values("total"),
+            output_field=DecimalField(max_digits=18, decimal_places=2),
+        ),
+        Decimal("0.00"),
+    )
+
 #================================================================================================================
 #--         FARMER                                                                                            --#
 #================================================================================================================
+class FarmerQuerySet(models.QuerySet):
+
+    def with_balance(self):
+        """Балансни Ledger'дан subquery орқали битта SQL сўровда ҳисоблайди."""
+        return self.annotate(balance_value=ledger_balance_subquery("farmer"))
+
+    def with_stored_balance(self):
+        """Балансни сақланган ``FarmerBalance`` жадвалидан JOIN орқали олади."""
+        return self.annotate(
+            balance_value=Coalesce(F("balance_record__balance"), Decimal("0.00"))
+        )
+
+
 class Farmer(models.Model):
     name = models.CharField("Фермер номи", max_length=255)
     inn = models.CharField("ИНН",max_length=20,unique=True)
@@ -14,6 +46,8 @@ class Farmer(models.Model):
     massive = models.ForeignKey(Massive,on_delete=models.SET_NULL,null=True,blank=True,verbose_name="Массив")
     is_active = models.BooleanField("Фаол", default=True)
 
+    objects = FarmerQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Фермер"
         verbose_name_plural = "Фермерлар"
@@ -21,6 +55,10 @@ class Farmer(models.Model):
 
     @property
     def balance(self):
+        annotated = getattr(self, "balance_value", None)
+        if annotated is not None:
+            return annotated
+
         totals = self.ledgers.aggregate(
             total_debit=Sum("debit"),
             total_credit=Sum("credit")
@@ -3,7 +3,8 @@ from .counterparties import Farmer
 from .contracts import Contract
 from decimal import Decimal
 from .reference import Product
-from django.db.models import Sum
+from django.db.models import DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 
 
 class Warehouse(models.Model):
@@ -63,6 +64,26 @@ class MineralWarehouseReceipt(models.Model):
 # ==========================================
 # DOCUMENT (Шапка) Тавар
 # ==========================================
+class GoodsGivenDocumentQuerySet(models.QuerySet):
+
+    def with_totals(self):
+        """Ҳужжат жами суммасини позициялардан subquery орқали ҳисоблайди."""
+        return self.annotate(
+            total_amount_value=Coalesce(
+                Subquery(
+                    GoodsGivenItem.objects
+                    .filter(document=OuterRef("pk"))
+                    .order_by()
+                    .values("document")
+                    .annotate(total=Sum("total_with_vat"))
+                    .values("total"),
+                    output_field=DecimalField(max_digits=16, decimal_places=2),
+                ),
+                Decimal("0.00"),
+            )
+        )
+
+
 class GoodsGivenDocument(models.Model):
     date = models.DateField("Сана")
     number = models.CharField("Ҳужжат рақами", max_length=50)
@@ -77,6 +98,8 @@ class GoodsGivenDocument(models.Model):
         verbose_name="Омбор",
     )
 
+    objects = GoodsGivenDocumentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Товар бериш ҳужжати"
         verbose_name_plural = "Товар бериш ҳужжатлари"
@@ -90,6 +113,10 @@ class GoodsGivenDocument(models.Model):
 
     @property
     def total_amount(self):
+        annotated = getattr(self, "total_amount_value", None)
+        if annotated is not None:
+            return annotated
+
         total = self.items.aggregate(
             total=Sum("total_with_vat")
         )["total"]
@@ -0,0 +1,55 @@
+from django.db import models
+from .counterparties import Farmer
+from .documents import GoodsGivenItem, MineralWarehouseReceipt, Warehouse
+from .reference import District, Product
+
+
+class StockMovement(models.Model):
+    """
+    Омбор журнали: ҳар бир кирим ҳужжати ёки бериш позицияси учун битта қатор.
+    Кирим — мусбат, чиқим — манфий миқдор/сумма.
+    """
+
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_movements", verbose_name="Омбор")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_movements", verbose_name="Маҳсулот")
+    district = models.ForeignKey(District, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements", verbose_name="Туман")
+    farmer = models.ForeignKey(Farmer, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_movements", verbose_name="Фермер")
+    date = models.DateField("Сана")
+    quantity = models.DecimalField("Миқдори", max_digits=16, decimal_places=2)
+    amount = models.DecimalField("Сумма", max_digits=18, decimal_places=2, default=0)
+    receipt = models.OneToOneField(MineralWarehouseReceipt, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_movement")
+    given_item = models.OneToOneField(GoodsGivenItem, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_movement")
+    balance_after = models.DecimalField("Омбордаги қолдиқ", max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Омбор журнали"
+        verbose_name_plural = "Омбор журнали"
+        ordering = ["-date", "-id"]
+        indexes = [
+            models.Index(fields=["warehouse", "product", "date", "id"], name="stock_wh_product_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.warehouse_id} | {self.product_id} | {self.quantity}"
+
+
+class StockBalance(models.Model):
+    """Омбор × маҳсулот × туман кесимидаги жами кирим/чиқим (журналдан сақланади)."""
+
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_balances", verbose_name="Омбор")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name="stock_balances", verbose_name="Маҳсулот")
+    district = models.ForeignKey(District, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_balances", verbose_name="Туман")
+    quantity_in = models.DecimalField("Кирим", max_digits=18, decimal_places=2, default=0)
+    quantity_out = models.DecimalField("Чиқим", max_digits=18, decimal_places=2, default=0)
+    amount_in = models.DecimalField("Кирим суммаси", max_digits=20, decimal_places=2, default=0)
+    amount_out = models.DecimalField("Чиқим суммаси", max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Омбор қолдиғи"
+        verbose_name_plural = "Омбор қолдиқлари"
+        indexes = [
+            models.Index(fields=["warehouse", "product", "district"], name="stock_balance_key_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.warehouse_id} | {self.product_id} | {self.quantity_in - self.quantity_out}"
@@ -0,0 +1,43 @@
+"""
+Транзакция давомида йиғилиб, commit'да бир марта бажариладиган батчлар
+(Ledger проводкаси, омбор журнали, API кэш версиялари).
+
+Батчлар уланиш бўйича реестрда сақланади; ``flush`` чақирилганда реестрдан
+чиқарилади. Rollback'да (savepoint ҳам) Django commit навбатини янги рўйхат
+билан алмаштиради ва эски батч ишламай қолади — шунинг учун батч фақат у
+ёзилган навбат ҳали жорий бўлса қайта ишлатилади.
+"""
+
+import weakref
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+_batches = weakref.WeakKeyDictionary()
+
+
+def commit_batch(batch_class, using=DEFAULT_DB_ALIAS):
+    """
+    Жорий транзакцияга боғланган ``batch_class`` батчини қайтаради ёки
+    ``batch_class(using)`` билан яратиб, ``flush()`` ини on_commit'га қўяди.
+    Транзакциядан ташқарида ``None``.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return None
+
+    batches = _batches.setdefault(connection, {})
+    entry = batches.get(batch_class)
+    if entry is not None and entry[0] is connection.run_on_commit:
+        return entry[1]
+
+    batch = batch_class(using)
+
+    def flush():
+        if batches.get(batch_class, (None, None))[1] is batch:
+            del batches[batch_class]
+        batch.flush()
+
+    flush.batch = batch
+    transaction.on_commit(flush, using=using)
+    batches[batch_class] = (connection.run_on_commit, batch)
+    return batch
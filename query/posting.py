@@ -0,0 +1,406 @@
+"""
+Ҳужжатларни Ledger'га ўтказиш (проводка).
+
+Позиция сақланганда/ўчирилганда ҳужжат дарҳол қайта ўтказилмайди: у жорий
+транзакциянинг навбатига қўшилади ва ``transaction.on_commit`` да ҳар бир ҳужжат
+фақат бир марта, upsert орқали қайта ўтказилади. Омбор журнали ҳам шу навбатда
+йиғилади. Импорт ва скриптлар учун
+``bulk_posting()`` навбатни блок охирида (ўша транзакция ичида) бажаради.
+"""
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .balances import apply_ledger_delta, ledger_changed, restate_running_balances
+from .models.accounting import Ledger
+from .models.cotton import GoodsReceivedDocument, GoodsReceivedItem
+from .models.documents import GoodsGivenDocument, GoodsGivenItem
+from .on_commit import commit_batch
+from .stock import post_stock
+
+ZERO = Decimal("0.00")
+LEDGER_DELTA_FIELDS = ("farmer_id", "contract_id", "debit", "credit")
+
+
+@dataclass(frozen=True)
+class PostingSpec:
+    document_model: type
+    ledger_field: str
+    amount_side: str
+    item_model: type
+    item_amount_field: str
+
+    @property
+    def ledger_column(self):
+        return f"{self.ledger_field}_id"
+
+
+GIVEN = PostingSpec(GoodsGivenDocument, "given_document", "debit", GoodsGivenItem, "total_with_vat")
+RECEIVED = PostingSpec(GoodsReceivedDocument, "received_document", "credit", GoodsReceivedItem, "amount")
+
+
+# ==========================================
+# 🔹 SET-BASED REPOST
+# ==========================================
+
+def repost_documents(spec, document_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Берилган ҳужжатлар учун Ledger қаторларини бир неча сўров билан янгилайди:
+    ҳужжат жамланмалари, эски қаторлар, битта upsert, битта delete ва баланс фарқлари.
+    """
+    document_ids = set(document_ids)
+    if not document_ids:
+        return
+
+    with transaction.atomic(using=using):
+        documents = {
+            row["id"]: row
+            for row in (
+                spec.document_model.objects.using(using)
+                .filter(pk__in=document_ids)
+                .with_totals()
+                .values("id", "farmer_id", "contract_id", "date", "total_amount_value")
+            )
+        }
+        old_rows = {
+            row[spec.ledger_column]: row
+            for row in (
+                Ledger.objects.using(using)
+                .filter(**{f"{spec.ledger_column}__in": document_ids})
+                .values("id", spec.ledger_column, "date", *LEDGER_DELTA_FIELDS)
+            )
+        }
+
+        upserts = []
+        removed = []
+        delta_old = []
+        delta_new = []
+
+        for document_id in document_ids:
+            document = documents.get(document_id)
+            old = old_rows.get(document_id)
+            total = document["total_amount_value"] if document else ZERO
+
+            if total <= 0:
+                if old:
+                    removed.append(old["id"])
+                    delta_old.append(old)
+                continue
+
+            new = {
+                "farmer_id": document["farmer_id"],
+                "contract_id": document["contract_id"],
+                "debit": total if spec.amount_side == "debit" else ZERO,
+                "credit": total if spec.amount_side == "credit" else ZERO,
+                "date": document["date"],
+            }
+            if old and all(old[field] == new[field] for field in new):
+                continue
+
+            upserts.append(Ledger(**{spec.ledger_column: document_id}, **new))
+            delta_new.append(new)
+            if old:
+                delta_old.append(old)
+
+        if upserts:
+            Ledger.objects.using(using).bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=[spec.ledger_field],
+                update_fields=["farmer", "contract", "debit", "credit", "date"],
+            )
+        if removed:
+            Ledger.objects.using(using).filter(pk__in=removed).delete()
+
+        apply_ledger_delta(delta_old, delta_new, using=using)
+        restate_running_balances(delta_old + delta_new, using=using)
+
+        if upserts or removed:
+            ledger_changed.send(sender=Ledger, using=using)
+
+
+def unpost_documents(spec, document_ids, using=DEFAULT_DB_ALIAS):
+    """Ҳужжатлар Ledger қаторларини ўчиради ва балансдан чиқаради."""
+    with transaction.atomic(using=using):
+        rows = Ledger.objects.using(using).filter(**{f"{spec.ledger_column}__in": document_ids})
+        old_rows = list(rows.values("date", *LEDGER_DELTA_FIELDS))
+        if old_rows:
+            rows.delete()
+            apply_ledger_delta(old_rows, [], using=using)
+            restate_running_balances(old_rows, using=using)
+            ledger_changed.send(sender=Ledger, using=using)
+
+
+# ==========================================
+# 🔹 DEFERRED (ONCE PER TRANSACTION) REPOST
+# ==========================================
+
+STOCK_KINDS = ("receipt_ids", "item_ids", "document_ids", "farmer_ids")
+
+
+class PostingBatch:
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.pending = {GIVEN: set(), RECEIVED: set()}
+        self.stock = {kind: set() for kind in STOCK_KINDS}
+
+    def add(self, spec, document_id):
+        self.pending[spec].add(document_id)
+
+    def add_stock(self, **ids):
+        for kind, values in ids.items():
+            self.stock[kind].update(values)
+
+    def flush(self):
+        for spec, document_ids in self.pending.items():
+            if document_ids:
+                self.pending[spec] = set()
+                repost_documents(spec, document_ids, using=self.using)
+
+        stock, self.stock = self.stock, {kind: set() for kind in STOCK_KINDS}
+        post_stock(**stock, using=self.using)
+
+
+_local = threading.local()
+
+
+def _bulk_stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _pending_batch(using):
+    """``bulk_posting()`` блоки ёки жорий транзакция батчи; транзакциядан ташқарида ``None``."""
+    stack = _bulk_stack()
+    if stack and stack[-1].using == using:
+        return stack[-1]
+    return commit_batch(PostingBatch, using=using)
+
+
+def schedule_repost(spec, document_id, using=DEFAULT_DB_ALIAS):
+    batch = _pending_batch(using)
+    if batch is None:
+        repost_documents(spec, [document_id], using=using)
+        return
+
+    batch.add(spec, document_id)
+
+
+def schedule_stock(using=DEFAULT_DB_ALIAS, **ids):
+    """
+    Омбор журналини ``receipt_ids`` / ``item_ids`` / ``document_ids`` /
+    ``farmer_ids`` бўйича транзакция охирида бир марта қайта ёзишга қўяди.
+    """
+    batch = _pending_batch(using)
+    if batch is None:
+        post_stock(**ids, using=using)
+        return
+
+    batch.add_stock(**ids)
+
+
+@contextmanager
+def bulk_posting(using=DEFAULT_DB_ALIAS):
+    """
+    Импорт/скриптлар учун: блок ичидаги барча позиция ўзгаришлари ҳужжат бўйича
+    йиғилади ва блок охирида бир марта ўтказилади.
+
+        with bulk_posting():
+            for row in rows:
+                GoodsGivenItem.objects.create(...)
+    """
+    batch = PostingBatch(using)
+    stack = _bulk_stack()
+
+    with transaction.atomic(using=using):
+        stack.append(batch)
+        try:
+            yield batch
+        finally:
+            stack.pop()
+        batch.flush()
+
+
+# ==========================================
+# 🔹 FULL REBUILD (INSERT ... SELECT)
+# ==========================================
+
+def _expected_ledger_sql(spec, connection, farmer_range=None):
+    """Ҳужжат позицияларидан кутилган Ledger қаторларини GROUP BY билан беради."""
+    qn = connection.ops.quote_name
+    document_table = qn(spec.document_model._meta.db_table)
+    item_table = qn(spec.item_model._meta.db_table)
+    item_document = qn(spec.item_model._meta.get_field("document").column)
+    amount = qn(spec.item_model._meta.get_field(spec.item_amount_field).column)
+
+    where = ""
+    params = []
+    if farmer_range:
+        where = "WHERE d.farmer_id BETWEEN %s AND %s"
+        params = list(farmer_range)
+
+    sql = f"""
+        SELECT d.id AS document_id, d.farmer_id, d.contract_id, d.date,
+               ROUND(SUM(i.{amount}), 2) AS total
+        FROM {document_table} d
+        JOIN {item_table} i ON i.{item_document} = d.id
+        {where}
+        GROUP BY d.id, d.farmer_id, d.contract_id, d.date
+        HAVING SUM(i.{amount}) > 0
+    """
+    return sql, params
+
+
+def _ledger_scope_sql(spec, connection, farmer_range=None):
+    """Ledger'даги ушбу турдаги (ва фермер оралиғидаги) ҳужжат қаторлари шарти."""
+    qn = connection.ops.quote_name
+    document_table = qn(spec.document_model._meta.db_table)
+    column = qn(spec.ledger_column)
+
+    if not farmer_range:
+        return f"{column} IS NOT NULL", []
+
+    return (
+        f"{column} IS NOT NULL AND (farmer_id BETWEEN %s AND %s "
+        f"OR {column} IN (SELECT id FROM {document_table} WHERE farmer_id BETWEEN %s AND %s))",
+        [*farmer_range, *farmer_range],
+    )
+
+
+def rebuild_ledger_rows(farmer_range=None, using=DEFAULT_DB_ALIAS):
+    """
+    Берилган фермер оралиғи учун ҳужжат Ledger қаторларини тўлиқ қайта ёзади:
+    ҳар бир тур учун битта DELETE ва битта INSERT ... SELECT ... GROUP BY.
+    Жорий қолдиқлар кейин ``rebuild_running_balances()`` билан тўлдирилади.
+    Қайтаради: ``{"deleted": n, "inserted": n}``.
+    """
+    connection = connections[using]
+    ledger_table = connection.ops.quote_name(Ledger._meta.db_table)
+    stats = {"deleted": 0, "inserted": 0}
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for spec in (GIVEN, RECEIVED):
+            scope, scope_params = _ledger_scope_sql(spec, connection, farmer_range)
+            cursor.execute(f"DELETE FROM {ledger_table} WHERE {scope}", scope_params)
+            stats["deleted"] += cursor.rowcount
+
+            expected, params = _expected_ledger_sql(spec, connection, farmer_range)
+            given_id, received_id = ("e.document_id", "NULL") if spec is GIVEN else ("NULL", "e.document_id")
+            debit, credit = ("e.total", "0") if spec.amount_side == "debit" else ("0", "e.total")
+            cursor.execute(
+                f"""
+                INSERT INTO {ledger_table}
+                    (farmer_id, contract_id, given_document_id, received_document_id, debit, credit, date,
+                     balance_after, contract_balance_after)
+                SELECT e.farmer_id, e.contract_id, {given_id}, {received_id}, {debit}, {credit}, e.date, 0, 0
+                FROM ({expected}) e
+                """,
+                params,
+            )
+            stats["inserted"] += cursor.rowcount
+
+    return stats
+
+
+def diff_ledger_rows(farmer_range=None, using=DEFAULT_DB_ALIAS):
+    """
+    Ёзмасдан солиштиради. Фарқларни ``(kind, document_id, ledger, expected)``
+    кўринишида қайтаради (``None`` — қатор йўқ).
+    """
+    connection = connections[using]
+    ledger_table = connection.ops.quote_name(Ledger._meta.db_table)
+    discrepancies = []
+
+    with connection.cursor() as cursor:
+        for spec in (GIVEN, RECEIVED):
+            expected_sql, params = _expected_ledger_sql(spec, connection, farmer_range)
+            cursor.execute(expected_sql, params)
+            expected = {
+                document_id: (farmer_id, contract_id, _as_date(date), Decimal(str(total)))
+                for document_id, farmer_id, contract_id, date, total in cursor.fetchall()
+            }
+
+            scope, scope_params = _ledger_scope_sql(spec, connection, farmer_range)
+            amount_column = spec.amount_side
+            cursor.execute(
+                f"SELECT {spec.ledger_column}, farmer_id, contract_id, date, {amount_column} "
+                f"FROM {ledger_table} WHERE {scope}",
+                scope_params,
+            )
+            actual = {
+                document_id: (farmer_id, contract_id, _as_date(date), Decimal(str(amount)))
+                for document_id, farmer_id, contract_id, date, amount in cursor.fetchall()
+            }
+
+            kind = spec.ledger_field.removesuffix("_document")
+            for document_id in sorted(set(expected) | set(actual)):
+                if expected.get(document_id) != actual.get(document_id):
+                    discrepancies.append((kind, document_id, actual.get(document_id), expected.get(document_id)))
+
+    return discrepancies
+
+
+def _as_date(value):
+    # SQLite сана устунини матн кўринишида қайтаради
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def farmer_ranges(chunks, using=DEFAULT_DB_ALIAS):
+    """Ҳужжатлари бор фермерлар id оралиғини ``chunks`` та тенг бўлакка бўлади."""
+    bounds = []
+    for spec in (GIVEN, RECEIVED):
+        values = spec.document_model.objects.using(using).order_by("farmer_id").values_list("farmer_id", flat=True)
+        first = values.first()
+        if first is not None:
+            bounds.extend([first, values.last()])
+
+    if not bounds:
+        return []
+
+    low, high = min(bounds), max(bounds)
+    step = max(1, -(-(high - low + 1) // max(1, chunks)))
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def reprice_received_items(farmer_range=None, chunk_size=2000, using=DEFAULT_DB_ALIAS):
+    """Пахта позициялари нарх/суммасини жорий шартнома нархи ва коэффициентлардан қайта ҳисоблайди."""
+    items = (
+        GoodsReceivedItem.objects.using(using)
+        .select_related("document__contract", "selection_type", "sort_class")
+        .order_by("pk")
+    )
+    if farmer_range:
+        items = items.filter(document__farmer_id__range=farmer_range)
+
+    fields = ["calculated_weight", "conditional_weight", "price", "amount"]
+    changed = 0
+    batch = []
+
+    with transaction.atomic(using=using):
+        for item in items.iterator(chunk_size=chunk_size):
+            before = [getattr(item, field) for field in fields]
+            item.recalculate()
+            after = [
+                getattr(item, field).quantize(Decimal("0.01"))
+                for field in fields
+            ]
+            if before != after:
+                batch.append(item)
+            if len(batch) >= chunk_size:
+                GoodsReceivedItem.objects.using(using).bulk_update(batch, fields)
+                changed += len(batch)
+                batch = []
+
+        if batch:
+            GoodsReceivedItem.objects.using(using).bulk_update(batch, fields)
+            changed += len(batch)
+
+    return changed
@@ -1,38 +1,46 @@
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from decimal import Decimal
-from .models.documents import GoodsGivenItem
-from .models.accounting import Ledger
-from .models.cotton import GoodsReceivedItem
+from .activity import add_to_rollup
+from .bot_access import push_access_change
+from .models.bot import BotUser, BotUserActivity
+from .models.counterparties import Farmer
+from .models.documents import GoodsGivenDocument, GoodsGivenItem, MineralWarehouseReceipt
+from .models.reference import Massive
+from .models.cotton import GoodsReceivedDocument, GoodsReceivedItem
+from .models.stock import StockMovement
+from .posting import GIVEN, RECEIVED, repost_documents, schedule_repost, schedule_stock, unpost_documents
+from .stock import unpost_given_items, unpost_receipts
 
 # ==========================================
 # 🔵 GOODS GIVEN  → DEBIT
 # ==========================================
 
 def update_given_ledger(document):
-    Ledger.objects.filter(given_document=document).delete()
-
-    total = document.total_amount
-
-    if total > 0:
-        Ledger.objects.create(
-            farmer=document.farmer,
-            contract=document.contract,
-            given_document=document,
-            debit=total,
-            credit=Decimal("0.00"),
-            date=document.date
-        )
+    repost_documents(GIVEN, [document.pk])
 
 
 @receiver(post_save, sender=GoodsGivenItem)
-def given_item_saved(sender, instance, **kwargs):
-    update_given_ledger(instance.document)
+def given_item_saved(sender, instance, using, **kwargs):
+    schedule_repost(GIVEN, instance.document_id, using=using)
 
 
 @receiver(post_delete, sender=GoodsGivenItem)
-def given_item_deleted(sender, instance, **kwargs):
-    update_given_ledger(instance.document)
+def given_item_deleted(sender, instance, using, **kwargs):
+    schedule_repost(GIVEN, instance.document_id, using=using)
+
+
+@receiver(post_save, sender=GoodsGivenDocument)
+def given_document_saved(sender, instance, created, using, **kwargs):
+    # Сана/фермер/шартнома ўзгарса Ledger қатори ҳам янгиланиши керак
+    if not created:
+        schedule_repost(GIVEN, instance.pk, using=using)
+
+
+@receiver(pre_delete, sender=GoodsGivenDocument)
+def given_document_deleting(sender, instance, using, **kwargs):
+    # Каскад ўчиришда Ledger қатори балансни четлаб ўтмаслиги учун олдиндан ёпамиз
+    unpost_documents(GIVEN, [instance.pk], using=using)
 
 
 # ==========================================
@@ -40,26 +48,107 @@ def given_item_deleted(sender, instance, **kwargs):
 # ==========================================
 
 def update_received_ledger(document):
-    Ledger.objects.filter(received_document=document).delete()
-
-    total = document.total_amount
-
-    if total > 0:
-        Ledger.objects.create(
-            farmer=document.farmer,
-            contract=document.contract,
-            received_document=document,
-            debit=Decimal("0.00"),
-            credit=total,
-            date=document.date
-        )
+    repost_documents(RECEIVED, [document.pk])
 
 
 @receiver(post_save, sender=GoodsReceivedItem)
-def received_item_saved(sender, instance, **kwargs):
-    update_received_ledger(instance.document)
+def received_item_saved(sender, instance, using, **kwargs):
+    schedule_repost(RECEIVED, instance.document_id, using=using)
 
 
 @receiver(post_delete, sender=GoodsReceivedItem)
-def received_item_deleted(sender, instance, **kwargs):
-    update_received_ledger(instance.document)
+def received_item_deleted(sender, instance, using, **kwargs):
+    schedule_repost(RECEIVED, instance.document_id, using=using)
+
+
+@receiver(post_save, sender=GoodsReceivedDocument)
+def received_document_saved(sender, instance, created, using, **kwargs):
+    if not created:
+        schedule_repost(RECEIVED, instance.pk, using=using)
+
+
+@receiver(pre_delete, sender=GoodsReceivedDocument)
+def received_document_deleting(sender, instance, using, **kwargs):
+    unpost_documents(RECEIVED, [instance.pk], using=using)
+
+
+# ==========================================
+# 📦 WAREHOUSE STOCK JOURNAL
+# ==========================================
+
+@receiver(post_save, sender=MineralWarehouseReceipt)
+def warehouse_receipt_saved(sender, instance, using, **kwargs):
+    schedule_stock(receipt_ids=[instance.pk], using=using)
+
+
+@receiver(pre_delete, sender=MineralWarehouseReceipt)
+def warehouse_receipt_deleting(sender, instance, using, **kwargs):
+    unpost_receipts([instance.pk], using=using)
+
+
+@receiver(post_save, sender=GoodsGivenItem)
+def given_item_stock_saved(sender, instance, using, **kwargs):
+    schedule_stock(item_ids=[instance.pk], using=using)
+
+
+@receiver(pre_delete, sender=GoodsGivenItem)
+def given_item_stock_deleting(sender, instance, using, **kwargs):
+    # Каскад журнал қаторини ўчиради, лекин қолдиқни камайтирмайди
+    unpost_given_items([instance.pk], using=using)
+
+
+@receiver(post_save, sender=GoodsGivenDocument)
+def given_document_stock_saved(sender, instance, created, using, **kwargs):
+    # Омбор/сана/фермер ўзгарса позициялар журнали ҳам кўчади
+    if not created:
+        schedule_stock(document_ids=[instance.pk], using=using)
+
+
+@receiver(post_save, sender=Farmer)
+def farmer_stock_district_changed(sender, instance, created, using, **kwargs):
+    if created:
+        return
+
+    district_id = instance.massive.district_id if instance.massive_id else None
+    moved = (
+        StockMovement.objects.using(using)
+        .filter(farmer_id=instance.pk)
+        .exclude(district_id=district_id)
+        .exists()
+    )
+    if moved:
+        schedule_stock(farmer_ids=[instance.pk], using=using)
+
+
+@receiver(post_save, sender=Massive)
+def massive_stock_district_changed(sender, instance, created, using, **kwargs):
+    if created:
+        return
+
+    moved = (
+        StockMovement.objects.using(using)
+        .filter(farmer__massive_id=instance.pk)
+        .exclude(district_id=instance.district_id)
+        .exists()
+    )
+    if moved:
+        farmer_ids = Farmer.objects.using(using).filter(massive_id=instance.pk).values_list("pk", flat=True)
+        schedule_stock(farmer_ids=list(farmer_ids), using=using)
+
+
+# ==========================================
+# 🤖 BOT ACTIVITY ROLLUP
+# ==========================================
+
+@receiver(post_save, sender=BotUserActivity)
+def bot_activity_saved(sender, instance, created, using, **kwargs):
+    if created:
+        add_to_rollup(instance, using=using)
+
+
+@receiver(post_save, sender=BotUser)
+def bot_user_saved(sender, instance, created, update_fields, using, **kwargs):
+    # Bot рухсатни кэшлайди — is_active ўзгариши дарҳол етиб бориши керак
+    if created or (update_fields is not None and "is_active" not in update_fields):
+        return
+    transaction.on_commit(lambda: push_access_change(instance.telegram_id), using=using)
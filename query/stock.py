@@ -0,0 +1,270 @@
+"""
+Омбор журнали (StockMovement) ва омбор × маҳсулот × туман қолдиқлари (StockBalance).
+
+Кирим ҳужжати ёки бериш позицияси сақланганда унинг журнал қатори
+транзакция commit бўлгач (``query.posting`` батчи орқали) бир марта қайта
+ёзилади, қолдиқлар фарқ (delta) бўйича янгиланади ва шу омбор/маҳсулот
+учун ``balance_after`` ўзгарган санадан бошлаб қайта ҳисобланади.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from itertools import chain
+from operator import or_
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+from .balances import update_running_column
+from .models.documents import GoodsGivenItem, MineralWarehouseReceipt
+from .models.stock import StockBalance, StockMovement
+
+
+ZERO = Decimal("0.00")
+
+MOVEMENT_FIELDS = (
+    "warehouse_id",
+    "product_id",
+    "district_id",
+    "farmer_id",
+    "date",
+    "quantity",
+    "amount",
+    "receipt_id",
+    "given_item_id",
+)
+
+# Журнал bulk/raw SQL орқали тўлиқ қайта қурилганда юборилади
+stock_changed = Signal()
+
+
+# ==========================================
+# 🔹 SOURCE ROWS
+# ==========================================
+
+def receipt_movement_rows(receipts):
+    """Кирим ҳужжатларидан мусбат журнал қаторлари."""
+    for row in receipts.values("id", "warehouse_id", "product_id", "date", "quantity", "amount"):
+        yield {
+            "warehouse_id": row["warehouse_id"],
+            "product_id": row["product_id"],
+            "district_id": None,
+            "farmer_id": None,
+            "date": row["date"],
+            "quantity": row["quantity"],
+            "amount": row["amount"],
+            "receipt_id": row["id"],
+            "given_item_id": None,
+        }
+
+
+def given_item_movement_rows(items):
+    """Бериш позицияларидан манфий журнал қаторлари (ҳар бир позиция ўз маҳсулоти билан)."""
+    rows = items.values(
+        "id",
+        "product_id",
+        "quantity",
+        "amount",
+        "document__date",
+        "document__warehouse_id",
+        "document__farmer_id",
+        "document__farmer__massive__district_id",
+    )
+    for row in rows:
+        yield {
+            "warehouse_id": row["document__warehouse_id"],
+            "product_id": row["product_id"],
+            "district_id": row["document__farmer__massive__district_id"],
+            "farmer_id": row["document__farmer_id"],
+            "date": row["document__date"],
+            "quantity": -row["quantity"],
+            "amount": -row["amount"],
+            "receipt_id": None,
+            "given_item_id": row["id"],
+        }
+
+
+# ==========================================
+# 🔹 POSTING
+# ==========================================
+
+def replace_movements(scope, new_rows, using=DEFAULT_DB_ALIAS):
+    """
+    ``scope`` (Q) га тушадиган журнал қаторларини ``new_rows`` билан алмаштиради.
+    Ҳеч нарса ўзгармаган бўлса ёзмайди.
+    """
+    new_rows = list(new_rows)
+
+    with transaction.atomic(using=using):
+        movements = StockMovement.objects.using(using).filter(scope)
+        old_rows = list(movements.values(*MOVEMENT_FIELDS))
+
+        if _same_rows(old_rows, new_rows):
+            return
+
+        movements.delete()
+        StockMovement.objects.using(using).bulk_create(StockMovement(**row) for row in new_rows)
+
+        apply_stock_delta(old_rows, new_rows, using=using)
+        restate_stock_running(old_rows + new_rows, using=using)
+
+
+def _same_rows(old_rows, new_rows):
+    def key(row):
+        return tuple(row[field] for field in MOVEMENT_FIELDS)
+
+    return sorted(map(key, old_rows), key=repr) == sorted(map(key, new_rows), key=repr)
+
+
+def post_stock(receipt_ids=(), item_ids=(), document_ids=(), farmer_ids=(), using=DEFAULT_DB_ALIAS):
+    """
+    Кирим ҳужжатлари ва бериш позициялари журналини битта алмаштириш билан
+    қайта ёзади. Позициялар id, ҳужжат ёки фермер бўйича танланади.
+    """
+    scopes = []
+    sources = []
+
+    if receipt_ids:
+        scopes.append(Q(receipt_id__in=receipt_ids))
+        sources.append(receipt_movement_rows(MineralWarehouseReceipt.objects.using(using).filter(pk__in=receipt_ids)))
+
+    item_filters = []
+    given_scopes = []
+    if item_ids:
+        item_filters.append(Q(pk__in=item_ids))
+        given_scopes.append(Q(given_item_id__in=item_ids))
+    if document_ids:
+        item_filters.append(Q(document_id__in=document_ids))
+        given_scopes.append(Q(given_item__document_id__in=document_ids))
+    if farmer_ids:
+        item_filters.append(Q(document__farmer_id__in=farmer_ids))
+        given_scopes.append(Q(farmer_id__in=farmer_ids))
+    if item_filters:
+        scopes.append(Q(given_item__isnull=False) & reduce(or_, given_scopes))
+        sources.append(given_item_movement_rows(GoodsGivenItem.objects.using(using).filter(reduce(or_, item_filters))))
+
+    if scopes:
+        replace_movements(reduce(or_, scopes), chain(*sources), using=using)
+
+
+def unpost_receipts(receipt_ids, using=DEFAULT_DB_ALIAS):
+    replace_movements(Q(receipt_id__in=receipt_ids), [], using=using)
+
+
+def unpost_given_items(item_ids, using=DEFAULT_DB_ALIAS):
+    replace_movements(Q(given_item_id__in=item_ids), [], using=using)
+
+
+# ==========================================
+# 🔹 BALANCES
+# ==========================================
+
+def apply_stock_delta(old_rows, new_rows, using=DEFAULT_DB_ALIAS):
+    deltas = defaultdict(lambda: [ZERO, ZERO, ZERO, ZERO])
+
+    for sign, rows in ((-1, old_rows), (1, new_rows)):
+        for row in rows:
+            delta = deltas[(row["warehouse_id"], row["product_id"], row["district_id"])]
+            if row["receipt_id"] is not None:
+                delta[0] += row["quantity"] * sign
+                delta[2] += row["amount"] * sign
+            else:
+                delta[1] -= row["quantity"] * sign
+                delta[3] -= row["amount"] * sign
+
+    balances = StockBalance.objects.using(using)
+    for (warehouse_id, product_id, district_id), (quantity_in, quantity_out, amount_in, amount_out) in deltas.items():
+        if not any((quantity_in, quantity_out, amount_in, amount_out)):
+            continue
+
+        key = {"warehouse_id": warehouse_id, "product_id": product_id, "district_id": district_id}
+        balance = balances.filter(**key).first() or balances.create(**key)
+        balances.filter(pk=balance.pk).update(
+            quantity_in=F("quantity_in") + quantity_in,
+            quantity_out=F("quantity_out") + quantity_out,
+            amount_in=F("amount_in") + amount_in,
+            amount_out=F("amount_out") + amount_out,
+        )
+
+
+def restate_stock_running(rows, using=DEFAULT_DB_ALIAS):
+    """Ўзгарган омбор/маҳсулот жуфтлари учун ``balance_after`` ни энг эски санадан қайта ёзади."""
+    from_dates = {}
+    for row in rows:
+        key = (row["warehouse_id"], row["product_id"])
+        from_dates[key] = min(row["date"], from_dates.get(key, row["date"]))
+
+    movements = StockMovement.objects.using(using)
+    for (warehouse_id, product_id), from_date in from_dates.items():
+        pair = movements.filter(warehouse_id=warehouse_id, product_id=product_id)
+        running = (
+            pair.filter(date__lt=from_date)
+            .order_by("-date", "-id")
+            .values_list("balance_after", flat=True)
+            .first()
+        ) or ZERO
+
+        changed = []
+        for movement in pair.filter(date__gte=from_date).order_by("date", "id").only("id", "quantity", "balance_after"):
+            running += movement.quantity
+            if movement.balance_after != running:
+                movement.balance_after = running
+                changed.append(movement)
+
+        if changed:
+            movements.bulk_update(changed, ["balance_after"], batch_size=500)
+
+
+# ==========================================
+# 🔹 FULL REBUILD
+# ==========================================
+
+@transaction.atomic
+def rebuild_stock_journal(chunk_size=2000):
+    """
+    Журнални кирим ҳужжатлари ва бериш позицияларидан тўлиқ қайта қуради,
+    ``balance_after`` ни битта window UPDATE билан, қолдиқларни GROUP BY билан
+    тўлдиради. Қайтаради: ``{"deleted": n, "inserted": n}``.
+    """
+    deleted, _ = StockMovement.objects.all().delete()
+    inserted = 0
+
+    sources = (
+        receipt_movement_rows(MineralWarehouseReceipt.objects.order_by("id")),
+        given_item_movement_rows(GoodsGivenItem.objects.order_by("id")),
+    )
+    for rows in sources:
+        batch = []
+        for row in rows:
+            batch.append(StockMovement(**row))
+            if len(batch) >= chunk_size:
+                inserted += len(StockMovement.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            inserted += len(StockMovement.objects.bulk_create(batch))
+
+    update_running_column(StockMovement, ["warehouse_id", "product_id"], "quantity", "balance_after")
+    rebuild_stock_balances()
+
+    stock_changed.send(sender=StockMovement, using=DEFAULT_DB_ALIAS)
+    return {"deleted": deleted, "inserted": inserted}
+
+
+def rebuild_stock_balances():
+    StockBalance.objects.all().delete()
+
+    totals = (
+        StockMovement.objects
+        .order_by()
+        .values("warehouse_id", "product_id", "district_id")
+        .annotate(
+            quantity_in=Coalesce(Sum("quantity", filter=Q(receipt__isnull=False)), ZERO),
+            quantity_out=-Coalesce(Sum("quantity", filter=Q(given_item__isnull=False)), ZERO),
+            amount_in=Coalesce(Sum("amount", filter=Q(receipt__isnull=False)), ZERO),
+            amount_out=-Coalesce(Sum("amount", filter=Q(given_item__isnull=False)), ZERO),
+        )
+    )
+    StockBalance.objects.bulk_create((StockBalance(**row) for row in totals), batch_size=1000)
@@ -1,3 +1,456 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from .balances import farmer_balance_as_of, rebuild_running_balances
+from .bot_access import push_access_change
+from .models.accounting import ContractBalance, FarmerBalance, Ledger, LedgerSnapshot
+from .models.bot import BotUser
+from .models.contracts import Contract
+from .models.counterparties import Farmer
+from .models.documents import GoodsGivenDocument, GoodsGivenItem, MineralWarehouseReceipt, Warehouse
+from .models.reference import District, Massive, Product, Region, Unit
+from .models.stock import StockBalance, StockMovement
+from .posting import PostingBatch, bulk_posting
+from .stock import post_stock
+
+
+class LedgerBalanceTest(TestCase):
+    def setUp(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        self.product = Product.objects.create(name="Selitra", unit=unit)
+        self.warehouse = Warehouse.objects.create(name="Main Warehouse")
+        self.farmer = Farmer.objects.create(name="Farmer 1", inn="123456789")
+        self.contract = Contract.objects.create(
+            farmer=self.farmer,
+            number="C-1",
+            date="2026-01-01",
+            planned_quantity=Decimal("100.00"),
+            price=Decimal("1000.00"),
+        )
+
+    def _given_document(self, number, quantity, date="2026-02-01"):
+        with self.captureOnCommitCallbacks(execute=True):
+            document = GoodsGivenDocument.objects.create(
+                date=date,
+                number=number,
+                farmer=self.farmer,
+                contract=self.contract,
+                warehouse=self.warehouse,
+            )
+            GoodsGivenItem.objects.create(
+                document=document,
+                product=self.product,
+                quantity=Decimal(quantity),
+                price=Decimal("10.00"),
+                vat_rate="0",
+            )
+        return document
+
+    def test_stored_balance_follows_ledger_postings(self):
+        document = self._given_document("G-1", "20.00")
+        self._given_document("G-2", "5.00")
+
+        self.assertEqual(FarmerBalance.objects.get(farmer=self.farmer).balance, Decimal("250.00"))
+        self.assertEqual(ContractBalance.objects.get(contract=self.contract).total_debit, Decimal("250.00"))
+
+        item = document.items.get()
+        item.quantity = Decimal("10.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertEqual(FarmerBalance.objects.get(farmer=self.farmer).balance, Decimal("150.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.delete()
+        self.assertEqual(FarmerBalance.objects.get(farmer=self.farmer).balance, Decimal("50.00"))
+        self.assertEqual(ContractBalance.objects.get(contract=self.contract).balance, Decimal("50.00"))
+
+    def test_admin_cannot_edit_ledger_rows(self):
+        self._given_document("G-1", "20.00")
+        ledger = Ledger.objects.get()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+
+        self.assertEqual(self.client.get("/admin/query/ledger/add/").status_code, 403)
+        self.assertEqual(self.client.get(f"/admin/query/ledger/{ledger.pk}/delete/").status_code, 403)
+        self.client.post(f"/admin/query/ledger/{ledger.pk}/change/", {"debit": "1.00"})
+        self.assertEqual(Ledger.objects.get().debit, Decimal("200.00"))
+
+    def test_check_balances_reports_and_fixes_drift(self):
+        self._given_document("G-1", "20.00")
+        call_command("check_balances", stdout=StringIO())
+
+        FarmerBalance.objects.filter(farmer=self.farmer).update(balance=Decimal("1.00"))
+        with self.assertRaises(CommandError):
+            call_command("check_balances", stdout=StringIO())
+
+        call_command("check_balances", "--fix", stdout=StringIO())
+        self.assertEqual(FarmerBalance.objects.get(farmer=self.farmer).balance, Decimal("200.00"))
+
+    def test_items_saved_in_one_transaction_are_posted_once(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            document = GoodsGivenDocument.objects.create(
+                date="2026-02-01",
+                number="G-1",
+                farmer=self.farmer,
+                contract=self.contract,
+                warehouse=self.warehouse,
+            )
+            for _ in range(30):
+                GoodsGivenItem.objects.create(
+                    document=document,
+                    product=self.product,
+                    quantity=Decimal("1.00"),
+                    price=Decimal("10.00"),
+                    vat_rate="0",
+                )
+
+        posting_callbacks = [
+            callback for callback in callbacks
+            if isinstance(getattr(callback, "batch", None), PostingBatch)
+        ]
+        self.assertEqual(len(posting_callbacks), 1)
+        self.assertFalse(Ledger.objects.exists())
+
+        posting_callbacks[0]()
+        ledger = Ledger.objects.get(given_document=document)
+        self.assertEqual(ledger.debit, Decimal("300.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.items.first().delete()
+        self.assertEqual(Ledger.objects.get(pk=ledger.pk).debit, Decimal("290.00"))
+
+    def test_posting_after_rolled_back_savepoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            document = GoodsGivenDocument.objects.create(
+                date="2026-02-01",
+                number="G-1",
+                farmer=self.farmer,
+                contract=self.contract,
+            )
+            item_fields = {"document": document, "product": self.product, "quantity": Decimal("1.00"), "price": Decimal("10.00"), "vat_rate": "0"}
+
+            # Батч savepoint ичида яратилади ва у билан бирга бекор бўлади
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                GoodsGivenItem.objects.create(**item_fields)
+                raise RuntimeError
+
+            GoodsGivenItem.objects.create(**item_fields)
+
+        self.assertEqual(Ledger.objects.get(given_document=document).debit, Decimal("10.00"))
+
+    def test_bulk_posting_reposts_on_exit(self):
+        with bulk_posting():
+            document = GoodsGivenDocument.objects.create(
+                date="2026-02-01",
+                number="G-1",
+                farmer=self.farmer,
+                contract=self.contract,
+            )
+            for _ in range(3):
+                GoodsGivenItem.objects.create(
+                    document=document,
+                    product=self.product,
+                    quantity=Decimal("2.00"),
+                    price=Decimal("10.00"),
+                    vat_rate="0",
+                )
+            self.assertFalse(Ledger.objects.exists())
+
+        self.assertEqual(Ledger.objects.get(given_document=document).debit, Decimal("60.00"))
+        self.assertEqual(FarmerBalance.objects.get(farmer=self.farmer).balance, Decimal("60.00"))
+
+    def test_running_balance_stays_ordered_for_backdated_postings(self):
+        self._given_document("G-1", "3.00", date="2026-03-10")
+        self._given_document("G-2", "1.00", date="2026-01-15")
+        self._given_document("G-3", "2.00", date="2026-03-01")
+
+        running = list(Ledger.objects.order_by("date", "id").values_list("balance_after", flat=True))
+        self.assertEqual(running, [Decimal("10.00"), Decimal("30.00"), Decimal("60.00")])
+
+        snapshots = dict(LedgerSnapshot.objects.values_list("period_end", "balance"))
+        self.assertEqual(snapshots, {date(2026, 1, 31): Decimal("10.00"), date(2026, 3, 31): Decimal("60.00")})
+
+        self.assertEqual(farmer_balance_as_of(self.farmer.pk, date(2026, 2, 20))["balance"], Decimal("10.00"))
+        self.assertEqual(farmer_balance_as_of(self.farmer.pk, date(2026, 3, 5))["balance"], Decimal("30.00"))
+
+        expected = list(Ledger.objects.order_by("date", "id").values_list("balance_after", "contract_balance_after"))
+        rebuild_running_balances()
+        self.assertEqual(
+            list(Ledger.objects.order_by("date", "id").values_list("balance_after", "contract_balance_after")),
+            expected,
+        )
+        self.assertEqual(LedgerSnapshot.objects.count(), 2)
+
+
+class AnnotatedQuerySetTest(TestCase):
+    def setUp(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        self.farmers = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                farmer = Farmer.objects.create(name=f"Farmer {index}", inn=f"10000000{index}")
+                contract = Contract.objects.create(
+                    farmer=farmer,
+                    number=f"C-{index}",
+                    date="2026-01-01",
+                    planned_quantity=Decimal("100.00"),
+                    price=Decimal("1000.00"),
+                )
+                document = GoodsGivenDocument.objects.create(
+                    date="2026-02-01", number=f"G-{index}", farmer=farmer, contract=contract
+                )
+                GoodsGivenItem.objects.create(
+                    document=document,
+                    product=product,
+                    quantity=Decimal(index + 1),
+                    price=Decimal("100.00"),
+                    vat_rate="0",
+                )
+                self.farmers.append(farmer)
+
+    def test_with_balance_reads_every_row_in_one_query(self):
+        with self.assertNumQueries(1):
+            balances = {farmer.name: farmer.balance for farmer in Farmer.objects.with_balance()}
+        self.assertEqual(balances["Farmer 2"], Decimal("300.00"))
+
+        with self.assertNumQueries(1):
+            contract_balances = [contract.balance for contract in Contract.objects.with_balance()]
+        self.assertEqual(sorted(contract_balances), [Decimal("100.00"), Decimal("200.00"), Decimal("300.00")])
+
+    def test_with_totals_matches_property_fallback(self):
+        with self.assertNumQueries(1):
+            annotated = {document.pk: document.total_amount for document in GoodsGivenDocument.objects.with_totals()}
+
+        for document in GoodsGivenDocument.objects.all():
+            self.assertEqual(annotated[document.pk], document.total_amount)
+
+
+class RebuildLedgerCommandTest(TestCase):
+    def setUp(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        product = Product.objects.create(name="Selitra", unit=unit)
+        self.farmer = Farmer.objects.create(name="Farmer 1", inn="123456789")
+        contract = Contract.objects.create(
+            farmer=self.farmer,
+            number="C-1",
+            date="2026-01-01",
+            planned_quantity=Decimal("100.00"),
+            price=Decimal("1000.00"),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.documents = []
+            for index in range(3):
+                document = GoodsGivenDocument.objects.create(
+                    date="2026-02-01", number=f"G-{index}", farmer=self.farmer, contract=contract
+                )
+                GoodsGivenItem.objects.create(
+                    document=document,
+                    product=product,
+                    quantity=Decimal("1.00"),
+                    price=Decimal("100.00"),
+                    vat_rate="12",
+                )
+                self.documents.append(document)
+
+    def test_dry_run_reports_drift_and_rebuild_repairs_it(self):
+        Ledger.objects.filter(given_document=self.documents[0]).update(debit=Decimal("1.00"))
+        Ledger.objects.filter(given_document=self.documents[1]).delete()
+
+        out = StringIO()
+        call_command("rebuild_ledger", "--dry-run", stdout=out)
+        self.assertIn(f"given #{self.documents[0].pk}", out.getvalue())
+        self.assertIn(f"given #{self.documents[1].pk}", out.getvalue())
+        self.assertEqual(Ledger.objects.count(), 2)
+
+        call_command("rebuild_ledger", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Ledger.objects.values_list("debit", flat=True)),
+            [Decimal("112.00")] * 3,
+        )
+        self.assertEqual(FarmerBalance.objects.get(farmer=self.farmer).balance, Decimal("336.00"))
+
+        out = StringIO()
+        call_command("rebuild_ledger", "--dry-run", stdout=out)
+        self.assertNotIn("#", out.getvalue())
+
+
+class StockJournalTest(TestCase):
+    def setUp(self):
+        unit = Unit.objects.create(name="Kilogram", short_name="kg")
+        self.selitra = Product.objects.create(name="Selitra", unit=unit)
+        self.ammofos = Product.objects.create(name="Ammofos", unit=unit)
+        self.warehouse = Warehouse.objects.create(name="Main Warehouse")
+        region = Region.objects.create(name="Region")
+        self.district = District.objects.create(region=region, name="District 1")
+        self.other_district = District.objects.create(region=region, name="District 2")
+        self.farmer = Farmer.objects.create(
+            name="Farmer 1",
+            inn="123456789",
+            massive=Massive.objects.create(district=self.district, name="Massive 1"),
+        )
+        contract = Contract.objects.create(
+            farmer=self.farmer,
+            number="C-1",
+            date="2026-01-01",
+            planned_quantity=Decimal("100.00"),
+            price=Decimal("1000.00"),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for day, quantity in ((1, "100.00"), (10, "50.00")):
+                MineralWarehouseReceipt.objects.create(
+                    date=date(2026, 3, day),
+                    invoice_number=f"R-{day}",
+                    transport_type="truck",
+                    transport_number="01A001AA",
+                    product=self.selitra,
+                    quantity=Decimal(quantity),
+                    price=Decimal("10.00"),
+                    amount=Decimal(quantity) * 10,
+                    warehouse=self.warehouse,
+                )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document = GoodsGivenDocument.objects.create(
+                date="2026-03-05", number="G-1", farmer=self.farmer, contract=contract, warehouse=self.warehouse
+            )
+            self.items = [
+                GoodsGivenItem.objects.create(
+                    document=self.document,
+                    product=product,
+                    quantity=Decimal("30.00"),
+                    price=Decimal("10.00"),
+                    vat_rate="0",
+                )
+                for product in (self.selitra, self.ammofos)
+            ]
+
+    def _balances(self):
+        return {
+            (row.product_id, row.district_id): (row.quantity_in, row.quantity_out)
+            for row in StockBalance.objects.exclude(quantity_in=0, quantity_out=0)
+        }
+
+    def test_journal_keeps_running_and_keyed_balances(self):
+        running = list(
+            StockMovement.objects
+            .filter(warehouse=self.warehouse, product=self.selitra)
+            .order_by("date", "id")
+            .values_list("quantity", "balance_after")
+        )
+        self.assertEqual(
+            running,
+            [
+                (Decimal("100.00"), Decimal("100.00")),
+                (Decimal("-30.00"), Decimal("70.00")),
+                (Decimal("50.00"), Decimal("120.00")),
+            ],
+        )
+        self.assertEqual(
+            self._balances(),
+            {
+                (self.selitra.id, None): (Decimal("150.00"), Decimal("0.00")),
+                (self.selitra.id, self.district.id): (Decimal("0.00"), Decimal("30.00")),
+                (self.ammofos.id, self.district.id): (Decimal("0.00"), Decimal("30.00")),
+            },
+        )
+
+    def test_item_delete_and_district_move_restate_balances(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[1].delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.farmer.massive = Massive.objects.create(district=self.other_district, name="Massive 2")
+            self.farmer.save()
+
+        self.assertEqual(
+            self._balances(),
+            {
+                (self.selitra.id, None): (Decimal("150.00"), Decimal("0.00")),
+                (self.selitra.id, self.other_district.id): (Decimal("0.00"), Decimal("30.00")),
+            },
+        )
+        self.assertFalse(StockMovement.objects.filter(product=self.ammofos).exists())
+
+    def test_massive_district_change_moves_journal(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            massive = self.farmer.massive
+            massive.district = self.other_district
+            massive.save()
+
+        self.assertEqual(
+            self._balances(),
+            {
+                (self.selitra.id, None): (Decimal("150.00"), Decimal("0.00")),
+                (self.selitra.id, self.other_district.id): (Decimal("0.00"), Decimal("30.00")),
+                (self.ammofos.id, self.other_district.id): (Decimal("0.00"), Decimal("30.00")),
+            },
+        )
+
+    def test_document_resave_posts_stock_once_per_transaction(self):
+        with mock.patch("query.posting.post_stock", wraps=post_stock) as posted:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.document.date = date(2026, 3, 12)
+                self.document.save()
+                for item in self.items:
+                    item.quantity = Decimal("20.00")
+                    item.save()
+
+        posted.assert_called_once()
+        self.assertEqual(
+            list(StockMovement.objects.filter(product=self.selitra).order_by("date", "id").values_list("balance_after", flat=True)),
+            [Decimal("100.00"), Decimal("150.00"), Decimal("130.00")],
+        )
+
+    def test_rebuild_stock_command_matches_incremental_posting(self):
+        def snapshot():
+            return (
+                sorted(StockMovement.objects.values_list("receipt_id", "given_item_id", "quantity", "balance_after"), key=repr),
+                self._balances(),
+            )
+
+        expected = snapshot()
+        StockMovement.objects.filter(given_item__isnull=False).delete()
+        StockBalance.objects.all().delete()
+
+        call_command("rebuild_stock", stdout=StringIO())
+
+        self.assertEqual(snapshot(), expected)
+
+
+@override_settings(BOT_ACCESS_PUSH_URLS=["http://127.0.0.1:8081/access/"], BOT_ACCESS_PUSH_SECRET="secret")
+class BotAccessPushTest(TestCase):
+    def test_is_active_change_is_pushed_after_commit(self):
+        with mock.patch("query.bot_access.urlopen") as urlopen:
+            with self.captureOnCommitCallbacks(execute=True):
+                user = BotUser.objects.create(telegram_id=555, full_name="Test", is_active=False)
+            self.assertFalse(urlopen.called)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                user.is_active = True
+                user.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.save(update_fields=["full_name"])
+
+        self.assertEqual(urlopen.call_count, 1)
+        request = urlopen.call_args.args[0]
+        self.assertEqual((request.full_url, request.data, request.get_header("X-bot-secret")), ("http://127.0.0.1:8081/access/", b'{"telegram_id": 555}', "secret"))
+
+    @override_settings(BOT_ACCESS_PUSH_URLS=["http://127.0.0.1:8081/access/", "http://127.0.0.1:8082/access/"])
+    def test_push_reaches_every_bot_process(self):
+        with mock.patch("query.bot_access.urlopen") as urlopen:
+            urlopen.return_value.__enter__.return_value.status = 200
+            self.assertTrue(push_access_change(555))
+
+        self.assertEqual(
+            sorted(call.args[0].full_url for call in urlopen.call_args_list),
+            ["http://127.0.0.1:8081/access/", "http://127.0.0.1:8082/access/"],
+        )
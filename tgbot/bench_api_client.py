@@ -0,0 +1,60 @@
+"""
+API клиентининг микро-бенчмарки: ҳар чақирувда янги ``ClientSession``
+(эски усул) ва умумий уланишлар пули (``services.api_client.api``).
+
+    python bench_api_client.py --url http://127.0.0.1:8000/api/districts/ --calls 500 --concurrency 1 10
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from config import API_BASE_URL
+from services.api_client import api
+
+
+async def fresh_session_get(url: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            await resp.read()
+
+
+async def shared_session_get(url: str):
+    session = await api.session()
+    async with session.get(url) as resp:
+        await resp.read()
+
+
+async def run(fetch, url: str, calls: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await fetch(url)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return calls / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=f"{API_BASE_URL}/districts/")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    await api.start()
+    try:
+        print(f"{'client':<8} {'parallel':>8} {'calls/s':>9}")
+        for concurrency in args.concurrency:
+            for name, fetch in (("fresh", fresh_session_get), ("shared", shared_session_get)):
+                rate = await run(fetch, args.url, args.calls, concurrency)
+                print(f"{name:<8} {concurrency:>8} {rate:>9.1f}")
+    finally:
+        await api.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,22 +1,77 @@
 import asyncio
 from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
-from config import TOKEN
+from config import (
+    BOT_MODE,
+    MAX_CONCURRENT_UPDATES,
+    TOKEN,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_SET,
+)
 from handlers import start, farmers, contracts, mineral
+from middlewares.concurrency import ConcurrencyLimitMiddleware
+from services.access_events import start_access_events, stop_access_events
+from services.activity_log import activity_log
+from services.api_client import api
 
 bot = Bot(token=TOKEN)
 dp = Dispatcher()
 
+dp.update.outer_middleware(ConcurrencyLimitMiddleware(MAX_CONCURRENT_UPDATES))
+
 dp.include_router(start.router)
 dp.include_router(farmers.router)
 dp.include_router(contracts.router)
 dp.include_router(mineral.router)
 
+# Умумий HTTP уланишлар пули; буфер тўхтаганда қолган ҳодисалар ҳам шу орқали кетади
+dp.startup.register(api.start)
+dp.startup.register(activity_log.start)
+dp.startup.register(start_access_events)
+dp.shutdown.register(stop_access_events)
+dp.shutdown.register(activity_log.stop)
+dp.shutdown.register(api.close)
+
 
 async def main():
     await dp.start_polling(bot)
 
 
-if __name__ == "__main__":
-    asyncio.run(main())
+# ===============================
+# 🔹 WEBHOOK
+# ===============================
+
+async def set_webhook(bot: Bot):
+    await bot.set_webhook(
+        f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
 
+def run_webhook():
+    if not WEBHOOK_SECRET:
+        raise SystemExit("WEBHOOK_SECRET берилмаган — webhook'га ҳар ким update юбора олади")
+    if WEBHOOK_SET:
+        if not WEBHOOK_BASE_URL:
+            raise SystemExit("WEBHOOK_BASE_URL берилмаган")
+        dp.startup.register(set_webhook)
+
+    app = web.Application()
+    # Жавоб Telegram'га дарҳол қайтади, update фонда ишланади (handle_in_background)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    web.run_app(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+
+
+if __name__ == "__main__":
+    if BOT_MODE == "webhook":
+        run_webhook()
+    else:
+        asyncio.run(main())
@@ -1,3 +1,38 @@
+import os
+
 TOKEN = "7700091895:AAGoi7KA-t-aOfwuk7fTxmQclGexYNavgQE"
 
-API_BASE_URL = "http://tetratexmchj.uz/api"
\ No newline at end of file
+API_BASE_URL = "http://tetratexmchj.uz/api"
+
+# Жавобларни gzip билан сўраш (сервер/nginx сиқса трафик камаяди)
+API_GZIP = os.environ.get("API_GZIP", "1") == "1"
+
+# "http" — API орқали; "orm" — bot Django билан бир серверда ишлаганда маълумот
+# тўғридан-тўғри ORM'дан олинади (services/orm_backend.py)
+API_BACKEND = os.environ.get("API_BACKEND", "http")
+DJANGO_PROJECT_DIR = os.environ.get("DJANGO_PROJECT_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DJANGO_SETTINGS_FILE = os.environ.get("DJANGO_SETTINGS_FILE", os.path.join(DJANGO_PROJECT_DIR, "config", "settings.py"))
+
+# Ўқиш жавоблари шунча сония умумий кэшда туради (services/read_cache.py)
+API_READ_CACHE_TTL = float(os.environ.get("API_READ_CACHE_TTL", "5"))
+
+# API фойдаланувчи рухсатини ўзгартирганда шу манзилга хабар беради
+# (Django: BOT_ACCESS_PUSH_URLS = "http://<host>:<port>/access/,..."). Бир нечта
+# bot процесси бўлса ҳар бирига ўз порти берилади ва Django рўйхатига қўшилади.
+ACCESS_PUSH_HOST = os.environ.get("BOT_ACCESS_PUSH_HOST", "127.0.0.1")
+ACCESS_PUSH_PORT = int(os.environ.get("BOT_ACCESS_PUSH_PORT", "8081"))
+ACCESS_PUSH_SECRET = os.environ.get("BOT_ACCESS_PUSH_SECRET", "")
+
+# "polling" ёки "webhook". Webhook'да бир нечта bot процесси load balancer
+# ортида ишлай олади; set_webhook'ни фақат биттаси чақирсин (WEBHOOK_SET=0).
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+WEBHOOK_BASE_URL = os.environ.get("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram/webhook")
+# Webhook режимида мажбурий: Telegram уни X-Telegram-Bot-Api-Secret-Token да юборади
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8080"))
+WEBHOOK_SET = os.environ.get("WEBHOOK_SET", "1") == "1"
+
+# Бир вақтда ишланадиган update'лар чегараси (middlewares/concurrency.py)
+MAX_CONCURRENT_UPDATES = int(os.environ.get("MAX_CONCURRENT_UPDATES", "32"))
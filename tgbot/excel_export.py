@@ -2,6 +2,7 @@
 from io import BytesIO
 from datetime import datetime
 import pandas as pd
+from openpyxl import Workbook
 from openpyxl.styles import Font
 
 
@@ -44,6 +45,26 @@ def _autosize_and_bold(worksheet):
         worksheet.column_dimensions[column_letter].width = max_length + 2
 
 
+async def _aenumerate(rows, start: int = 1):
+    """Рўйхат ҳам, ``iter_warehouse_movements`` оқими ҳам бир хил ўқилади."""
+    index = start
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield index, row
+            index += 1
+    else:
+        for row in rows:
+            yield index, row
+            index += 1
+
+
+def _save(workbook):
+    buffer = BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
 async def farmers_to_excel(data: list):
     if not data:
         return None
@@ -109,69 +130,84 @@ async def contracts_to_excel(data: list, contract_type: str = "all"):
     return buffer
 
 
-async def warehouse_receipts_to_excel(data: list[dict]):
-    if not data:
-        return None
-
-    formatted = []
-    for index, item in enumerate(data, start=1):
-        formatted.append(
-            {
-                "№": index,
-                "Сана": item.get("date"),
-                "Накладной": item.get("invoice_number") or "-",
-                "Маҳсулот": item.get("product_name") or "-",
-                "Қоп сони": item.get("bag_count") or 0,
-                "Миқдор": float(item.get("quantity") or 0),
-            }
+async def warehouse_receipts_to_excel(rows):
+    """
+    ``rows`` — ``iter_warehouse_movements`` оқими: ҳар бир қатор келиши билан
+    варақга ёзилади, бутун жавоб рўйхат/DataFrame бўлиб хотирага йиғилмайди.
+    """
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "WarehouseReceipts"
+    worksheet.append(["№", "Сана", "Накладной", "Маҳсулот", "Қоп сони", "Миқдор"])
+
+    index = 0
+    async for index, item in _aenumerate(rows):
+        worksheet.append(
+            [
+                index,
+                item.get("date"),
+                item.get("invoice_number") or "-",
+                item.get("product_name") or "-",
+                item.get("bag_count") or 0,
+                float(item.get("quantity") or 0),
+            ]
         )
 
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
-
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="WarehouseReceipts")
-        _autosize_and_bold(writer.sheets["WarehouseReceipts"])
+    if not index:
+        return None
 
-    buffer.seek(0)
-    return buffer
+    _autosize_and_bold(worksheet)
+    return _save(workbook)
 
 
-async def warehouse_expenses_to_excel(data: list[dict], mode: str = "out"):
-    if not data:
-        return None
+async def warehouse_expenses_to_excel(rows, mode: str = "out", totals: dict | None = None):
+    """Чиқим — ``iter_warehouse_movements`` оқимидан, Свод (``mode="report"``) — рўйхатдан."""
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = "WarehouseExpenses"
+    today_column = f"Бир кунда ({datetime.now().strftime('%d.%m.%Y')})"
+    if mode == "report":
+        worksheet.append(["№", "Туман", today_column, "Миқдори (умумий)"])
+    else:
+        worksheet.append(["№", "Сана", "Ҳужжат №", "Фермер", "Маҳсулот", "Миқдор", "Га/кг"])
 
-    formatted = []
-    for index, item in enumerate(data, start=1):
+    index = 0
+    async for index, item in _aenumerate(rows):
         if mode == "report":
-            formatted.append(
-                {
-                    "№": index,
-                    "Туман": item.get("district_name") or "-",
-                    f"Бир кунда ({datetime.now().strftime('%d.%m.%Y')})": float(item.get("today_quantity") or 0),
-                    "Миқдори (умумий)": float(item.get("total_quantity") or item.get("quantity") or 0),
-                }
+            worksheet.append(
+                [
+                    index,
+                    item.get("district_name") or "-",
+                    float(item.get("today_quantity") or 0),
+                    float(item.get("total_quantity") or item.get("quantity") or 0),
+                ]
             )
             continue
 
-        formatted.append(
-            {
-                "№": index,
-                "Сана": _excel_date(item.get("date")),
-                "Ҳужжат №": item.get("number") or "-",
-                "Фермер": item.get("farmer_name") or "-",
-                "Маҳсулот": item.get("product_name") or "-",
-                "Миқдор": float(item.get("quantity") or 0),
-                "Га/кг": round(float(item.get("quantity_per_area") or 0)),
-            }
+        worksheet.append(
+            [
+                index,
+                _excel_date(item.get("date")),
+                item.get("number") or "-",
+                item.get("farmer_name") or "-",
+                item.get("product_name") or "-",
+                float(item.get("quantity") or 0),
+                round(float(item.get("quantity_per_area") or 0)),
+            ]
         )
 
-    df = pd.DataFrame(formatted)
-    buffer = BytesIO()
+    if not index:
+        return None
 
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="WarehouseExpenses")
-        _autosize_and_bold(writer.sheets["WarehouseExpenses"])
+    if mode == "report" and totals:
+        worksheet.append(
+            [
+                "",
+                "Жами",
+                float(totals.get("today_quantity") or 0),
+                float(totals.get("total_quantity") or 0),
+            ]
+        )
 
-    buffer.seek(0)
-    return buffer
+    _autosize_and_bold(worksheet)
+    return _save(workbook)
@@ -1,10 +1,10 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
-from services.api_client import get_contracts_summary
+from services.api_client import get_contracts_summary, get_districts
 from excel_export import contracts_to_excel
 from keyboards import contracts_filter_keyboard, contracts_pagination_keyboard, contracts_type_menu, farmers_menu
 from middlewares.access import access_required
-from services.pagination import build_page_text, paginate_data
+from services.pagination import build_page_text
 
 router = Router()
 PER_PAGE = 25
@@ -34,8 +34,7 @@ async def contracts_handler(message: Message):
 @access_required
 async def contracts_type_selected(message: Message):
     contract_type = CONTRACT_TYPE_MAP[message.text]
-    data = await get_contracts_data(contract_type)
-    districts = extract_districts(data)
+    districts = await get_contract_districts(contract_type)
     await message.answer(
         "Туманни танланг 👇",
         reply_markup=contracts_filter_keyboard(districts, contract_type),
@@ -51,8 +50,8 @@ async def back_to_farmers_menu(message: Message):
 @router.callback_query(F.data.startswith("contracts_filter:"))
 @access_required
 async def contracts_pagination(callback: CallbackQuery):
-    _, contract_type, district_index, page = callback.data.split(":", 3)
-    await send_page(callback.message, int(page), int(district_index), contract_type, True)
+    _, contract_type, district_id, page = callback.data.split(":", 3)
+    await send_page(callback.message, int(page), int(district_id), contract_type, True)
     await callback.answer()
 
 
@@ -60,8 +59,7 @@ async def contracts_pagination(callback: CallbackQuery):
 @access_required
 async def contracts_back_to_filters(callback: CallbackQuery):
     contract_type = callback.data.split(":", 1)[1]
-    data = await get_contracts_data(contract_type)
-    districts = extract_districts(data)
+    districts = await get_contract_districts(contract_type)
     await callback.message.edit_text(
         "Туманни танланг 👇",
         reply_markup=contracts_filter_keyboard(districts, contract_type),
@@ -69,14 +67,14 @@ async def contracts_back_to_filters(callback: CallbackQuery):
     await callback.answer()
 
 
-async def send_page(target, page, district_index, contract_type, edit):
-    data = await get_contracts_data(contract_type)
-    districts = extract_districts(data)
-    district = get_district_by_index(districts, district_index)
-    filtered_data = filter_by_district(data, district)
-    page_data, start, end = paginate_data(filtered_data, page, PER_PAGE)
+async def send_page(target, page, district_id, contract_type, edit):
+    data = await get_contracts_data(contract_type, district_id=district_id, page=page)
+    page_data = data["results"]
+    start = (page - 1) * PER_PAGE
 
-    district_title = "Ҳаммаси" if district == "all" else district
+    district_title = "Ҳаммаси"
+    if district_id and page_data:
+        district_title = page_data[0]["district"]
     type_title = CONTRACT_TYPE_LABELS.get(contract_type, "Ҳаммаси")
 
     text = build_page_text(
@@ -94,7 +92,7 @@ async def send_page(target, page, district_index, contract_type, edit):
         ],
     )
 
-    keyboard = contracts_pagination_keyboard(page, end < len(filtered_data), district_index, contract_type)
+    keyboard = contracts_pagination_keyboard(page, data["has_next"], district_id, contract_type)
 
     if edit:
         await target.edit_text(f"<pre>{text}</pre>", parse_mode="HTML", reply_markup=keyboard)
@@ -105,11 +103,8 @@ async def send_page(target, page, district_index, contract_type, edit):
 @router.callback_query(F.data.startswith("contracts_export_excel:"))
 @access_required
 async def contracts_excel(callback: CallbackQuery):
-    _, contract_type, district_index = callback.data.split(":", 2)
-    data = await get_contracts_excel_data(contract_type)
-    districts = extract_districts(data)
-    district = get_district_by_index(districts, int(district_index))
-    filtered_data = filter_by_district(data, district)
+    _, contract_type, district_id = callback.data.split(":", 2)
+    filtered_data = await get_contracts_excel_data(contract_type, int(district_id))
 
     file_buffer = await contracts_to_excel(filtered_data, contract_type=contract_type)
 
@@ -129,44 +124,31 @@ async def contracts_excel(callback: CallbackQuery):
     await callback.answer()
 
 
-async def get_contracts_data(contract_type: str):
-    if contract_type == CONTRACT_TYPE_ALL:
-        return await get_contracts_summary()
-    return await get_contracts_summary(contract_type=contract_type)
+async def get_contracts_data(contract_type: str, district_id: int = 0, page: int | None = None):
+    return await get_contracts_summary(
+        contract_type=None if contract_type == CONTRACT_TYPE_ALL else contract_type,
+        district_id=district_id,
+        page=page,
+        page_size=PER_PAGE,
+    )
 
 
-async def get_contracts_excel_data(contract_type: str):
+async def get_contracts_excel_data(contract_type: str, district_id: int = 0):
     if contract_type != CONTRACT_TYPE_ALL:
-        data = await get_contracts_summary(contract_type=contract_type)
+        data = await get_contracts_summary(contract_type=contract_type, district_id=district_id)
         return [{**item, "contract_type": contract_type} for item in data]
 
     export_data = []
     for contract_key in ("futures", "forward", "storage"):
-        typed_data = await get_contracts_summary(contract_type=contract_key)
+        typed_data = await get_contracts_summary(contract_type=contract_key, district_id=district_id)
         export_data.extend({**item, "contract_type": contract_key} for item in typed_data)
 
     return export_data
 
 
-def extract_districts(data: list[dict]) -> list[str]:
-    districts = {
-        contract.get("district")
-        for contract in data
-        if contract.get("district")
-    }
-    return sorted(districts)
-
-
-def filter_by_district(data: list[dict], district: str) -> list[dict]:
-    if district == "all":
-        return data
-    return [contract for contract in data if contract.get("district") == district]
-
+async def get_contract_districts(contract_type: str) -> list[dict]:
+    if contract_type == CONTRACT_TYPE_ALL:
+        return await get_districts()
 
-def get_district_by_index(districts: list[str], district_index: int) -> str:
-    if district_index <= 0:
-        return "all"
-    district_pos = district_index - 1
-    if district_pos >= len(districts):
-        return "all"
-    return districts[district_pos]
+    districts = await get_districts(contract_type=contract_type)
+    return [district for district in districts if district["contracts_count"]]
@@ -1,49 +1,55 @@
+from datetime import datetime
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
 
-from services.api_client import get_farmers
+from services.api_client import get_districts, get_farmers, get_farmer_statement
 from excel_export import farmers_to_excel
-from keyboards import farmers_filter_keyboard, farmers_pagination_keyboard
+from keyboards import (
+    farmers_filter_keyboard,
+    farmers_pagination_keyboard,
+    statement_farmers_keyboard,
+    statement_keyboard,
+)
 from middlewares.access import access_required
-from services.pagination import build_page_text, paginate_data
+from services.pagination import build_page_text
 
 router = Router()
 PER_PAGE = 25
+STATEMENT_PER_PAGE = 15
 
 
 @router.message(F.text == "📋 Фермер Баланс")
 @access_required
 async def farmers_handler(message: Message):
-    data = await get_farmers()
-    districts = extract_districts(data)
+    districts = await get_farmer_districts()
     await message.answer("Туманни танланг 👇", reply_markup=farmers_filter_keyboard(districts))
 
 
 @router.callback_query(F.data.startswith("farmers_filter:"))
 @access_required
 async def farmers_pagination(callback: CallbackQuery):
-    _, district_index, page = callback.data.split(":", 2)
-    await send_page(callback.message, int(page), int(district_index), True)
+    _, district_id, page = callback.data.split(":", 2)
+    await send_page(callback.message, int(page), int(district_id), True)
     await callback.answer()
 
 
 @router.callback_query(F.data == "farmers_back_to_filters")
 @access_required
 async def farmers_back_to_filters(callback: CallbackQuery):
-    data = await get_farmers()
-    districts = extract_districts(data)
+    districts = await get_farmer_districts()
     await callback.message.edit_text("Туманни танланг 👇", reply_markup=farmers_filter_keyboard(districts))
     await callback.answer()
 
 
-async def send_page(target, page, district_index, edit):
-    data = await get_farmers()
-    districts = extract_districts(data)
-    district = get_district_by_index(districts, district_index)
-    filtered_data = filter_by_district(data, district)
-    page_data, start, end = paginate_data(filtered_data, page, PER_PAGE)
+async def send_page(target, page, district_id, edit):
+    data = await get_farmers(district_id=district_id, page=page, page_size=PER_PAGE)
+    page_data = data["results"]
+    start = (page - 1) * PER_PAGE
 
-    district_title = "Умумий" if district == "all" else district
+    district_title = "Умумий"
+    if district_id and page_data:
+        district_title = page_data[0]["district"]
 
     text = build_page_text(
         title=f"📋 Фермер Баланс: {district_title}",
@@ -54,7 +60,7 @@ async def send_page(target, page, district_index, edit):
             for index, farmer in enumerate(page_data, start=start + 1)
         ],
     )
-    keyboard = farmers_pagination_keyboard(page, end < len(filtered_data), district_index)
+    keyboard = farmers_pagination_keyboard(page, data["has_next"], district_id)
 
     if edit:
         await target.edit_text(f"<pre>{text}</pre>", parse_mode="HTML", reply_markup=keyboard)
@@ -65,11 +71,8 @@ async def send_page(target, page, district_index, edit):
 @router.callback_query(F.data.startswith("farmers_export_excel:"))
 @access_required
 async def farmers_excel(callback: CallbackQuery):
-    district_index = int(callback.data.split(":", 1)[1])
-    data = await get_farmers()
-    districts = extract_districts(data)
-    district = get_district_by_index(districts, district_index)
-    filtered_data = filter_by_district(data, district)
+    district_id = int(callback.data.split(":", 1)[1])
+    filtered_data = await get_farmers(district_id=district_id)
 
     file_buffer = await farmers_to_excel(filtered_data)
 
@@ -89,25 +92,57 @@ async def farmers_excel(callback: CallbackQuery):
     await callback.answer()
 
 
-def extract_districts(data: list[dict]) -> list[str]:
-    districts = {
-        farmer.get("district")
-        for farmer in data
-        if farmer.get("district")
-    }
-    return sorted(districts)
+@router.callback_query(F.data.startswith("statement_pick:"))
+@access_required
+async def statement_pick(callback: CallbackQuery):
+    _, district_id, page = callback.data.split(":", 2)
+    district_id, page = int(district_id), int(page)
+
+    data = await get_farmers(district_id=district_id, page=page, page_size=PER_PAGE)
+
+    await callback.message.edit_text(
+        "Ҳисобот учун фермерни танланг 👇",
+        reply_markup=statement_farmers_keyboard(data["results"], district_id, page),
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("statement:"))
+@access_required
+async def statement_page(callback: CallbackQuery):
+    # statement:<farmer_id>:<cursor>:<district_id>:<page>
+    _, farmer_id, cursor, district_id, page = callback.data.split(":", 4)
+    farmer_id, cursor = int(farmer_id), int(cursor)
+
+    statement = await get_farmer_statement(farmer_id, after=cursor or None, limit=STATEMENT_PER_PAGE)
+    if "results" not in statement:
+        await callback.answer(statement.get("detail", "Маълумот йўқ"), show_alert=True)
+        return
+
+    text = build_page_text(
+        title=(
+            f"📄 Ҳисобот: {statement['farmer_name']}\n"
+            f"Бошланғич қолдиқ: {float(statement['opening_balance']) / 1_000_000:,.1f} млн"
+        ),
+        headers=f"{'Сана':<8} {'Ҳужжат':<8} {'Сумма':>8} {'Қолдиқ':>8}",
+        subheaders=f"{' ':<8} {' ':<8} {'(млн)':>8} {'(млн)':>8}",
+        rows=[build_statement_row(row) for row in statement["results"]],
+    )
+
+    keyboard = statement_keyboard(
+        farmer_id, cursor, statement["next_cursor"], int(district_id), int(page)
+    )
+    await callback.message.edit_text(f"<pre>{text}</pre>", parse_mode="HTML", reply_markup=keyboard)
+    await callback.answer()
 
 
-def filter_by_district(data: list[dict], district: str) -> list[dict]:
-    if district == "all":
-        return data
-    return [farmer for farmer in data if farmer.get("district") == district]
+def build_statement_row(row: dict) -> str:
+    amount = float(row["debit"]) - float(row["credit"])
+    day = datetime.strptime(row["date"], "%Y-%m-%d").strftime("%d.%m.%y")
+    number = (row["document_number"] or "")[:8]
+    return f"{day:<8} {number:<8} {amount / 1_000_000:>8,.1f} {float(row['balance']) / 1_000_000:>8,.1f}"
 
 
-def get_district_by_index(districts: list[str], district_index: int) -> str:
-    if district_index <= 0:
-        return "all"
-    district_pos = district_index - 1
-    if district_pos >= len(districts):
-        return "all"
-    return districts[district_pos]
+async def get_farmer_districts() -> list[dict]:
+    districts = await get_districts()
+    return [district for district in districts if district["farmers_count"]]
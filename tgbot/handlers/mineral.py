@@ -1,3 +1,4 @@
+import aiohttp
 from aiogram import F, Router
 from aiogram.types import BufferedInputFile, CallbackQuery, Message
 from datetime import date, datetime
@@ -14,10 +15,11 @@ from keyboards import (
 from middlewares.access import access_required
 from services.api_client import (
     get_warehouse_expense_districts,
-    get_warehouse_movements,
     get_warehouse_products,
-    get_warehouse_totals_by_filters,
+    get_warehouse_report,
+    get_warehouse_screen,
     get_warehouses,
+    iter_warehouse_movements,
 )
 
 router = Router()
@@ -49,75 +51,6 @@ def _format_date_ddmmyyyy(value) -> str:
 
     return date_text[:10]
 
-def _date_key(value) -> str:
-    if not value:
-        return ""
-
-    date_text = str(value).strip()
-    normalized = date_text.replace("Z", "+00:00")
-
-    try:
-        return datetime.fromisoformat(normalized).strftime("%Y-%m-%d")
-    except ValueError:
-        pass
-
-    for date_format in ("%Y-%m-%d", "%d.%m.%Y"):
-        try:
-            return datetime.strptime(date_text[:10], date_format).strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-
-    return date_text[:10]
-
-
-def _report_rows_by_district(items: list[dict]) -> list[dict]:
-    today_key = date.today().strftime("%Y-%m-%d")
-    district_totals: dict[str, dict] = {}
-
-    for item in items:
-        district_name = (item.get("district_name") or "-").strip() or "-"
-        quantity = float(item.get("quantity") or 0)
-        record = district_totals.setdefault(
-            district_name,
-            {"district_name": district_name, "today_quantity": 0.0, "total_quantity": 0.0},
-        )
-        record["total_quantity"] += quantity
-
-        if _date_key(item.get("date")) == today_key:
-            record["today_quantity"] += quantity
-
-    return sorted(district_totals.values(), key=lambda row: row["district_name"])
-
-
-def _expense_rows_by_farmer(items: list[dict]) -> list[dict]:
-    farmer_totals: dict[str, dict] = {}
-
-    for item in items:
-        farmer_name = (item.get("farmer_name") or "-").strip() or "-"
-        quantity = float(item.get("quantity") or 0)
-        maydon = float(item.get("maydon") or 0)
-
-        record = farmer_totals.setdefault(
-            farmer_name,
-            {
-                "farmer_name": farmer_name,
-                "quantity": 0.0,
-                "maydon": maydon,
-            },
-        )
-        record["quantity"] += quantity
-
-        if record.get("maydon", 0) <= 0 and maydon > 0:
-            record["maydon"] = maydon
-
-    rows = sorted(farmer_totals.values(), key=lambda row: row["farmer_name"])
-    for row in rows:
-        maydon = row.get("maydon") or 0
-        row["quantity_per_area"] = (row["quantity"] / maydon) if maydon > 0 else 0.0
-
-    return rows
-
-
 async def _warehouse_map():
     warehouses = await get_warehouses()
     return {
@@ -370,37 +303,21 @@ async def _send_warehouse_movements_page(
     district_id: int,
     page: int,
 ):
-    totals = await get_warehouse_totals_by_filters(
+    screen = await get_warehouse_screen(
         warehouse_id=warehouse_id,
         product_id=product_id,
-        district_id=None if district_id == 0 else district_id,
-    )
-    movements = await get_warehouse_movements(
         movement=movement,
-        warehouse_id=warehouse_id,
-        product_id=product_id,
-        district_id=None if district_id == 0 else district_id,
-    )
-    warehouse_map = await _warehouse_map()
-    warehouse_name = warehouse_map.get(warehouse_id, "Омбор")
-
-    products = await get_warehouse_products(
-        warehouse_id=warehouse_id,
-        movement="out" if movement == "report" else movement,
         district_id=None if district_id == 0 else district_id,
+        page=page,
+        page_size=PER_PAGE,
     )
-    product_name = next(
-        (item.get("product_name") for item in products if int(item.get("product_id", 0)) == product_id),
-        "Маҳсулот",
-    )
-
+    totals = screen.get("totals") or {}
+    page_items = screen.get("results") or []
     start = (page - 1) * PER_PAGE
-    end = start + PER_PAGE
-    page_items = movements[start:end]
 
     lines = [
-        f"🏬 {warehouse_name}",
-        f"📦 {product_name}",
+        f"🏬 {screen.get('warehouse_name') or 'Омбор'}",
+        f"📦 {screen.get('product_name') or 'Маҳсулот'}",
         "",
         f"📥 Кирим: {float(totals.get('total_in', 0)):.2f}",
         f"📤 Чиқим: {float(totals.get('total_out', 0)):.2f}",
@@ -419,8 +336,6 @@ async def _send_warehouse_movements_page(
             quantity = f"{float(item.get('quantity') or 0):.0f}"
             lines.append(f"{date_text:<12} {invoice_number:<4} {bag_count:>4} {quantity:>8}")
     elif movement == "out":
-        expense_rows = _expense_rows_by_farmer(movements)
-        page_items = expense_rows[start:end]
         lines.append("📤 Чиқим деталлари:")
         lines.append(f"{'№':<3} {'Фермер номи':<16} {'Миқдори':>8} {'Га/кг':>6}")
         lines.append("-" * 37)
@@ -430,10 +345,9 @@ async def _send_warehouse_movements_page(
             per_area = f"{float(item.get('quantity_per_area') or 0):.0f}"
             lines.append(f"{index:<3} {farmer_name:<16} {quantity:>8} {per_area:>6}")
     else:
-        report_rows = _report_rows_by_district(movements)
-        page_items = report_rows[start:end]
-        total_today_quantity = sum(float(item.get("today_quantity") or 0) for item in report_rows)
-        total_quantity = sum(float(item.get("total_quantity") or 0) for item in report_rows)
+        report_totals = screen.get("report_totals") or {}
+        total_today_quantity = float(report_totals.get("today_quantity") or 0)
+        total_quantity = float(report_totals.get("total_quantity") or 0)
         lines.append("📊 Свод деталлари:")
         today_title = date.today().strftime("%d.%m.%Y")
         lines.append(f"{'№':<3} {'Туман':<10} {'Бир кунда':>8} {'Мавсумда':>10}")
@@ -459,11 +373,7 @@ async def _send_warehouse_movements_page(
         product_id=product_id,
         district_id=district_id,
         page=page,
-        has_next=end < (
-            len(report_rows)
-            if movement == "report"
-            else (len(expense_rows) if movement == "out" else len(movements))
-        ),
+        has_next=bool(screen.get("has_next")),
         back_callback=back_callback,
     )
     await message.edit_text(f"<pre>{content}</pre>", parse_mode="HTML", reply_markup=keyboard)
@@ -514,28 +424,40 @@ async def _send_warehouse_products_page(message, warehouse_id: int, movement: st
     )
 
 
+async def _export_movements(filters: dict):
+    """Кирим/чиқим Excel'и ``?stream=1`` оқимидан қатор-бақатор тўлдирилади."""
+    rows = iter_warehouse_movements(**filters)
+    try:
+        if filters["movement"] == "in":
+            return await warehouse_receipts_to_excel(rows), "warehouse_receipts.xlsx"
+        return await warehouse_expenses_to_excel(rows), "warehouse_expenses.xlsx"
+    except aiohttp.ClientResponseError:
+        # Хато статус (масалан, омбор топилмади) — файл ўрнига "Маълумот йўқ"
+        return None, None
+
+
 @router.callback_query(F.data.startswith("warehouse_export_filtered:"))
 @access_required
 async def warehouse_export_filtered_handler(callback: CallbackQuery):
     _, warehouse_id, movement, product_id, district_id = callback.data.split(":", maxsplit=4)
 
-    actual_movement = movement
-    data = await get_warehouse_movements(
-        movement=actual_movement,
-        warehouse_id=int(warehouse_id),
-        product_id=int(product_id),
-        district_id=None if int(district_id) == 0 else int(district_id),
-    )
+    filters = {
+        "movement": movement,
+        "warehouse_id": int(warehouse_id),
+        "product_id": int(product_id),
+        "district_id": None if int(district_id) == 0 else int(district_id),
+    }
 
-    if movement == "in":
-        file_buffer = await warehouse_receipts_to_excel(data)
-        filename = "warehouse_receipts.xlsx"
-    elif movement == "report":
-        file_buffer = await warehouse_expenses_to_excel(_report_rows_by_district(data), mode="report")
+    if movement == "report":
+        report = await get_warehouse_report(
+            warehouse_id=filters["warehouse_id"],
+            product_id=filters.get("product_id"),
+            district_id=filters["district_id"],
+        )
+        file_buffer = await warehouse_expenses_to_excel(report["results"], mode="report", totals=report["totals"])
         filename = "warehouse_report.xlsx"
     else:
-        file_buffer = await warehouse_expenses_to_excel(data)
-        filename = "warehouse_expenses.xlsx"
+        file_buffer, filename = await _export_movements(filters)
 
     if not file_buffer:
         await callback.answer("Маълумот йўқ", show_alert=True)
@@ -560,21 +482,22 @@ async def warehouse_export_handler(callback: CallbackQuery):
         actual_movement = "report"
         district_id = int(movement.removeprefix("report_d"))
 
-    data = await get_warehouse_movements(
-        movement=actual_movement,
-        warehouse_id=warehouse_id,
-        district_id=district_id,
-    )
+    filters = {
+        "movement": actual_movement,
+        "warehouse_id": warehouse_id,
+        "district_id": district_id,
+    }
 
-    if actual_movement == "in":
-        file_buffer = await warehouse_receipts_to_excel(data)
-        filename = "warehouse_receipts.xlsx"
-    elif actual_movement == "report":
-        file_buffer = await warehouse_expenses_to_excel(_report_rows_by_district(data), mode="report")
+    if actual_movement == "report":
+        report = await get_warehouse_report(
+            warehouse_id=filters["warehouse_id"],
+            product_id=filters.get("product_id"),
+            district_id=filters["district_id"],
+        )
+        file_buffer = await warehouse_expenses_to_excel(report["results"], mode="report", totals=report["totals"])
         filename = "warehouse_report.xlsx"
     else:
-        file_buffer = await warehouse_expenses_to_excel(data)
-        filename = "warehouse_expenses.xlsx"
+        file_buffer, filename = await _export_movements(filters)
 
     if not file_buffer:
         await callback.answer("Маълумот йўқ", show_alert=True)
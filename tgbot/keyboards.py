@@ -72,18 +72,18 @@ contracts_type_menu = ReplyKeyboardMarkup(
     resize_keyboard=True,
 )
 
-def farmers_filter_keyboard(districts: list[str]):
+def farmers_filter_keyboard(districts: list[dict]):
     buttons = [[InlineKeyboardButton(text="📊 Умумий", callback_data="farmers_filter:0:1")]]
 
-    for index, district in enumerate(districts, start=1):
+    for district in districts:
         buttons.append(
-            [InlineKeyboardButton(text=district, callback_data=f"farmers_filter:{index}:1")]
+            [InlineKeyboardButton(text=district["name"], callback_data=f"farmers_filter:{district['id']}:1")]
         )
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def farmers_pagination_keyboard(page: int, has_next: bool, district_index: int):
+def farmers_pagination_keyboard(page: int, has_next: bool, district_id: int):
 
     buttons = []
     row = []
@@ -92,14 +92,14 @@ def farmers_pagination_keyboard(page: int, has_next: bool, district_index: int):
         row.append(
             InlineKeyboardButton(
                 text="⬅️",
-                callback_data=f"farmers_filter:{district_index}:{page-1}"
+                callback_data=f"farmers_filter:{district_id}:{page-1}"
             )
         )
 
     row.append(
         InlineKeyboardButton(
             text="📥 Excel",
-            callback_data=f"farmers_export_excel:{district_index}"
+            callback_data=f"farmers_export_excel:{district_id}"
         )
     )
 
@@ -107,11 +107,14 @@ def farmers_pagination_keyboard(page: int, has_next: bool, district_index: int):
         row.append(
             InlineKeyboardButton(
                 text="➡️",
-                callback_data=f"farmers_filter:{district_index}:{page+1}"
+                callback_data=f"farmers_filter:{district_id}:{page+1}"
             )
         )
 
     buttons.append(row)
+    buttons.append(
+        [InlineKeyboardButton(text="📄 Ҳисобот", callback_data=f"statement_pick:{district_id}:{page}")]
+    )
     buttons.append(
         [InlineKeyboardButton(text="⬅️ Туманлар рўйхати", callback_data="farmers_back_to_filters")]
     )
@@ -119,19 +122,66 @@ def farmers_pagination_keyboard(page: int, has_next: bool, district_index: int):
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+def statement_farmers_keyboard(farmers: list[dict], district_id: int, page: int):
+    buttons = [
+        [
+            InlineKeyboardButton(
+                text=farmer["name"][:40],
+                callback_data=f"statement:{farmer['id']}:0:{district_id}:{page}",
+            )
+        ]
+        for farmer in farmers
+    ]
+    buttons.append(
+        [InlineKeyboardButton(text="⬅️ Орқага", callback_data=f"farmers_filter:{district_id}:{page}")]
+    )
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def statement_keyboard(farmer_id: int, cursor: int, next_cursor: int | None, district_id: int, page: int):
+    row = []
 
-def contracts_filter_keyboard(districts: list[str], contract_type: str = "all"):
+    if cursor:
+        row.append(
+            InlineKeyboardButton(
+                text="⏮ Бошидан",
+                callback_data=f"statement:{farmer_id}:0:{district_id}:{page}",
+            )
+        )
+
+    if next_cursor:
+        row.append(
+            InlineKeyboardButton(
+                text="➡️",
+                callback_data=f"statement:{farmer_id}:{next_cursor}:{district_id}:{page}",
+            )
+        )
+
+    buttons = [row] if row else []
+    buttons.append(
+        [InlineKeyboardButton(text="⬅️ Фермерлар", callback_data=f"statement_pick:{district_id}:{page}")]
+    )
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+
+def contracts_filter_keyboard(districts: list[dict], contract_type: str = "all"):
     buttons = [[InlineKeyboardButton(text="📊 Ҳаммаси", callback_data=f"contracts_filter:{contract_type}:0:1")]]
 
-    for index, district in enumerate(districts, start=1):
+    for district in districts:
         buttons.append(
-            [InlineKeyboardButton(text=district, callback_data=f"contracts_filter:{contract_type}:{index}:1")]
+            [
+                InlineKeyboardButton(
+                    text=district["name"],
+                    callback_data=f"contracts_filter:{contract_type}:{district['id']}:1",
+                )
+            ]
         )
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def contracts_pagination_keyboard(page: int, has_next: bool, district_index: int = 0, contract_type: str = "all"):
+def contracts_pagination_keyboard(page: int, has_next: bool, district_id: int = 0, contract_type: str = "all"):
 
     buttons = []
     row = []
@@ -140,14 +190,14 @@ def contracts_pagination_keyboard(page: int, has_next: bool, district_index: int
         row.append(
             InlineKeyboardButton(
                 text="⬅️",
-                callback_data=f"contracts_filter:{contract_type}:{district_index}:{page-1}"
+                callback_data=f"contracts_filter:{contract_type}:{district_id}:{page-1}"
             )
         )
 
     row.append(
         InlineKeyboardButton(
             text="📥 Excel",
-            callback_data=f"contracts_export_excel:{contract_type}:{district_index}"
+            callback_data=f"contracts_export_excel:{contract_type}:{district_id}"
         )
     )
 
@@ -155,7 +205,7 @@ def contracts_pagination_keyboard(page: int, has_next: bool, district_index: int
         row.append(
             InlineKeyboardButton(
                 text="➡️",
-                callback_data=f"contracts_filter:{contract_type}:{district_index}:{page+1}"
+                callback_data=f"contracts_filter:{contract_type}:{district_id}:{page+1}"
             )
         )
 
@@ -1,6 +1,48 @@
+import time
 from functools import wraps
 from aiogram.types import Message, CallbackQuery
-from services.api_client import check_access, log_activity
+from services.activity_log import activity_log
+from services.api_client import authorize
+
+# telegram_id → (муддати, рухсат). Рад жавоблар тезроқ эскиради — админ
+# тасдиқлагандан кейин узоқ кутилмасин; бекор қилиш API'дан push орқали келади
+# (services/access_events.py). Push endpoint ишламаса бекор қилиш фақат TTL
+# тугагач билинади, шунинг учун рухсат ҳам қисқа сақланади.
+ALLOW_TTL = 300
+ALLOW_TTL_WITHOUT_PUSH = 30
+DENY_TTL = 30
+_access_cache: dict[int, tuple[float, bool]] = {}
+_push_enabled = False
+
+
+def set_push_enabled(enabled: bool):
+    global _push_enabled
+    _push_enabled = enabled
+
+
+def cached_access(telegram_id: int) -> bool | None:
+    cached = _access_cache.get(telegram_id)
+    if cached is None:
+        return None
+    expires_at, allowed = cached
+    if expires_at < time.monotonic():
+        _access_cache.pop(telegram_id, None)
+        return None
+    return allowed
+
+
+def remember_access(telegram_id: int, allowed: bool):
+    if not allowed:
+        ttl = DENY_TTL
+    elif _push_enabled:
+        ttl = ALLOW_TTL
+    else:
+        ttl = ALLOW_TTL_WITHOUT_PUSH
+    _access_cache[telegram_id] = (time.monotonic() + ttl, allowed)
+
+
+def forget_access(telegram_id: int):
+    _access_cache.pop(telegram_id, None)
 
 
 def access_required(handler):
@@ -17,31 +59,46 @@ def access_required(handler):
         else:
             return
 
-        result = await check_access(telegram_id, full_name)
-        is_allowed = isinstance(result, dict) and bool(result.get("allowed"))
+        action_name = getattr(handler, "__name__", "handler")
+        action_payload = getattr(event, "text", "") or getattr(event, "data", "")
+        action_type = "message" if isinstance(event, Message) else "callback"
 
-        if not is_allowed:
-            await log_activity(
+        is_allowed = cached_access(telegram_id)
+        recorded = False
+        if is_allowed is None:
+            # Кэш йўқ — рухсат текшируви ва ҳаракат ёзуви битта сўровда;
+            # рухсат бўлмаса сервер уни ``access_denied`` номи билан ёзади
+            result = await authorize(
+                telegram_id=telegram_id,
+                full_name=full_name,
+                action_name=action_name,
+                action_payload=action_payload,
+                action_type=action_type,
+            )
+            is_allowed = isinstance(result, dict) and bool(result.get("allowed"))
+            # API ишламаса жавоб "рухсат йўқ" — уни кэшламаймиз ва ҳаракат ёзилмаган
+            recorded = isinstance(result, dict) and "created" in result
+            if recorded:
+                remember_access(telegram_id, is_allowed)
+
+        if not recorded:
+            # Кэшдан жавоб берилди (ёки API ишламади) — ҳаракат буфер орқали
+            # фонда юборилади, handler кутмайди
+            activity_log.add(
                 telegram_id=telegram_id,
-                action_name="access_denied",
-                action_payload=getattr(event, "text", "") or getattr(event, "data", ""),
-                action_type="message" if isinstance(event, Message) else "callback",
-                is_allowed=False,
+                action_name=action_name if is_allowed else "access_denied",
+                action_payload=action_payload,
+                action_type=action_type,
+                is_allowed=is_allowed,
             )
+
+        if not is_allowed:
             if isinstance(event, Message):
                 await event.answer("⛔️ Сизга рухсат берилмаган.")
             else:
                 await event.answer("⛔️ Рухсат йўқ", show_alert=True)
             return
 
-        await log_activity(
-            telegram_id=telegram_id,
-            action_name=getattr(handler, "__name__", "handler"),
-            action_payload=getattr(event, "text", "") or getattr(event, "data", ""),
-            action_type="message" if isinstance(event, Message) else "callback",
-            is_allowed=True,
-        )
-
         return await handler(event, *args, **kwargs)
 
     return wrapper
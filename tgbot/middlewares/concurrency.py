@@ -0,0 +1,25 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Бир вақтда ишлаётган update'лар сонини чеклайди. Webhook ва polling update'ларни
+    алоҳида task'ларда ишлатади — чўққида API ва базага юк шу чегарадан ошмайди,
+    қолганлари навбат кутади.
+    """
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with self.semaphore:
+            return await handler(event, data)
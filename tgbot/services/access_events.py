@@ -0,0 +1,85 @@
+"""
+Рухсат ўзгариши ҳақидаги push'ларни қабул қилувчи кичик локал HTTP сервер
+(шу ерда ``GET /read-cache/`` — API ўқиш кэши статистикаси ҳам).
+
+Админ ``BotUser.is_active`` ни ўзгартирганда Django ``POST /access/``
+(``{"telegram_id": ...}``, ``X-Bot-Secret`` сарлавҳаси билан) юборади ва шу
+фойдаланувчининг кэшдаги рухсати ўчирилади — кейинги босишда API'дан қайта сўралади.
+Ҳар бир bot процесси ўз портида тинглайди; Django push'ни уларнинг барчасига юборади.
+"""
+
+import hmac
+import logging
+
+from aiohttp import web
+from config import ACCESS_PUSH_HOST, ACCESS_PUSH_PORT, ACCESS_PUSH_SECRET
+from middlewares.access import ALLOW_TTL_WITHOUT_PUSH, forget_access, set_push_enabled
+from services.read_cache import read_cache
+
+logger = logging.getLogger(__name__)
+
+_runner: web.AppRunner | None = None
+
+
+def _authorized(request: web.Request) -> bool:
+    secret = request.headers.get("X-Bot-Secret", "")
+    return bool(ACCESS_PUSH_SECRET) and hmac.compare_digest(secret, ACCESS_PUSH_SECRET)
+
+
+async def access_changed(request: web.Request):
+    if not _authorized(request):
+        return web.json_response({"ok": False}, status=403)
+
+    try:
+        data = await request.json()
+        telegram_id = int(data["telegram_id"])
+    except (ValueError, KeyError, TypeError):
+        return web.json_response({"ok": False}, status=400)
+
+    forget_access(telegram_id)
+    return web.json_response({"ok": True})
+
+
+async def read_cache_stats(request: web.Request):
+    """API ўқиш кэшининг калит бўйича статистикаси (hits / misses / coalesced)."""
+    if not _authorized(request):
+        return web.json_response({"ok": False}, status=403)
+    return web.json_response(read_cache.stats())
+
+
+async def start_access_events():
+    global _runner
+    if _runner is not None:
+        return
+    if not ACCESS_PUSH_SECRET:
+        logger.warning("BOT_ACCESS_PUSH_SECRET is not set, access push endpoint is disabled; allowed users are cached for %ss", ALLOW_TTL_WITHOUT_PUSH)
+        return
+
+    app = web.Application()
+    app.router.add_post("/access/", access_changed)
+    app.router.add_get("/read-cache/", read_cache_stats)
+    _runner = web.AppRunner(app)
+    await _runner.setup()
+    try:
+        await web.TCPSite(_runner, ACCESS_PUSH_HOST, ACCESS_PUSH_PORT).start()
+    except OSError:
+        # Порт банд бўлса бу процесс push олмайди ва бекор қилинган рухсат
+        # кэшда қолади — жимгина давом этмаймиз
+        logger.error(
+            "Cannot listen on %s:%s for access pushes; every bot process needs its own "
+            "BOT_ACCESS_PUSH_PORT listed in Django's BOT_ACCESS_PUSH_URLS",
+            ACCESS_PUSH_HOST,
+            ACCESS_PUSH_PORT,
+        )
+        await _runner.cleanup()
+        _runner = None
+        raise
+    set_push_enabled(True)
+
+
+async def stop_access_events():
+    global _runner
+    if _runner is not None:
+        set_push_enabled(False)
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,112 @@
+"""
+Bot фаоллиги буфери: ҳаракатлар навбатга қўйилади ва фон вазифаси уларни
+``/bot-user/activity/bulk/`` га тўплам қилиб юборади — ҳажм ёки вақт бўйича.
+Handler'лар тармоқ сўровини кутмайди.
+
+Навбат тўлса (API секин ёки ишламаяпти) энг эски ҳодиса ташланади — хотира
+чекланган. Бот тўхтаганда қолган ҳодисалар юбориб бўлинади.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from services.api_client import log_activity_batch
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 2.0
+MAX_PENDING = 10_000
+
+
+class ActivityBuffer:
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL, max_pending: int = MAX_PENDING):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self._collected: list[dict] = []
+        self._task: asyncio.Task | None = None
+
+    def add(
+        self,
+        telegram_id: int,
+        action_name: str,
+        action_payload: str = "",
+        action_type: str = "message",
+        is_allowed: bool = True,
+    ):
+        event = {
+            "telegram_id": telegram_id,
+            "action_type": action_type,
+            "action_name": (action_name or "unknown")[:100],
+            "action_payload": (action_payload or "")[:1000],
+            "is_allowed": is_allowed,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Фон вазифасини тўхтатади ва навбатда қолганини юборади."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Фон вазифаси тўплаб улгурган, лекин юбормаган ҳодисалар
+        collected, self._collected = self._collected, []
+        await self._send(collected)
+        while not self.queue.empty():
+            await self._send(self._take(self.batch_size))
+
+        if self.dropped:
+            logger.warning("Activity buffer dropped %s events", self.dropped)
+
+    def _take(self, limit: int) -> list[dict]:
+        batch = []
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Тўплам навбатдан олинган заҳоти self._collected да туради:
+            # тўплаш ёки юбориш пайтида бекор қилинса stop() уни юборади
+            batch = self._collected = []
+            batch.append(await self.queue.get())
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                batch.extend(self._take(self.batch_size - len(batch)))
+
+            await self._send(batch)
+            self._collected = []
+
+    async def _send(self, batch: list[dict]):
+        if not batch:
+            return
+
+        if not await log_activity_batch(batch):
+            logger.warning("Activity bulk upload failed, %s events lost", len(batch))
+
+
+activity_log = ActivityBuffer()
@@ -1,72 +1,233 @@
 import asyncio
+import json
+from collections import OrderedDict
+from datetime import date
 from urllib.parse import urlencode
 
 import aiohttp
-from config import API_BASE_URL
+from config import API_BACKEND, API_BASE_URL, API_GZIP
+from services.read_cache import read_cache
+
+# ==========================================
+# 🔹 SHARED CLIENT
+# ==========================================
+
+# Ҳар бир эндпоинт гуруҳи учун вақт чегараси: рухсат текшируви тез жавоб
+# бермаса фойдаланувчи кутиб қолмасин, Свод/экранлар эса оғирроқ.
+TIMEOUTS = {
+    "access": aiohttp.ClientTimeout(total=5, connect=2),
+    "read": aiohttp.ClientTimeout(total=20, connect=3),
+    "report": aiohttp.ClientTimeout(total=60, connect=3),
+    "write": aiohttp.ClientTimeout(total=10, connect=3),
+    "stream": aiohttp.ClientTimeout(total=None, connect=3, sock_read=60),
+}
+
+
+class ApiClient:
+    """
+    Битта ``ClientSession``: keep-alive уланишлар пули, уланишлар чеклови ва
+    DNS кэши. Dispatcher ишга тушганда очилади, тўхтаганда ёпилади; ундан
+    ташқарида (скриптлар) биринчи сўровда ўзи очилади.
+    """
+
+    def __init__(self, limit: int = 50, limit_per_host: int = 20, dns_ttl: int = 300, gzip: bool = API_GZIP):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.gzip = gzip
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=TIMEOUTS["read"],
+                headers={"Accept-Encoding": "gzip, deflate" if self.gzip else "identity"},
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+
+api = ApiClient()
+
+
+# URL → (ETag, жавоб). Сервер 304 қайтарса сақланган жавоб ишлатилади;
+# қайтарилган объектлар умумий, уларни ўзгартирманг.
+ETAG_CACHE_SIZE = 256
+_etag_cache: OrderedDict[str, tuple[str, object]] = OrderedDict()
+
+
+class ApiStatusError(Exception):
+    """2xx/304 бўлмаган жавоб; ``data`` — хато танаси (масалан ``{"detail": ...}``)."""
+
+    def __init__(self, status: int, data):
+        super().__init__(f"API {status}")
+        self.status = status
+        self.data = data
+
+
+async def _get_json(url: str, budget: str = "read"):
+    try:
+        return await read_cache.get(url, lambda: _fetch_json(url, budget))
+    except ApiStatusError as error:
+        # Хато танаси handler'ларга олдингидек қайтади, лекин read_cache уни сақламайди
+        return error.data
+
+
+async def _fetch_json(url: str, budget: str):
+    headers = {}
+    cached = _etag_cache.get(url)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    session = await api.session()
+    async with session.get(url, headers=headers, timeout=TIMEOUTS[budget]) as resp:
+        if resp.status == 304 and cached:
+            _etag_cache.move_to_end(url)
+            return cached[1]
+
+        data = await resp.json()
+        if not 200 <= resp.status < 300:
+            raise ApiStatusError(resp.status, data)
+
+        etag = resp.headers.get("ETag")
+        if resp.status == 200 and etag:
+            _etag_cache[url] = (etag, data)
+            _etag_cache.move_to_end(url)
+            while len(_etag_cache) > ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+        return data
+
+
+async def _post_json(url: str, payload, budget: str = "write"):
+    session = await api.session()
+    async with session.post(url, json=payload, timeout=TIMEOUTS[budget]) as resp:
+        data = await resp.json() if resp.status == 200 else None
+        return resp.status, data
 
 
 async def check_access(telegram_id: int, full_name: str):
-    timeout = aiohttp.ClientTimeout(total=10)
     payload = {
         "telegram_id": telegram_id,
         "full_name": (full_name or "").strip()[:255],
     }
 
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                f"{API_BASE_URL}/bot-user/check/",
-                json=payload,
-            ) as resp:
-                if resp.status != 200:
-                    return {"allowed": False}
-
-                data = await resp.json()
-                return data if isinstance(data, dict) else {"allowed": False}
+        status, data = await _post_json(f"{API_BASE_URL}/bot-user/check/", payload, budget="access")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return {"allowed": False}
+    return data if status == 200 and isinstance(data, dict) else {"allowed": False}
+
+
+async def authorize(
+    telegram_id: int,
+    full_name: str,
+    action_name: str | None = None,
+    action_payload: str = "",
+    action_type: str = "message",
+):
+    """Рухсатни текширади; ``action_name`` берилса ҳаракатни ҳам ёзади — битта сўровда."""
+    payload = {
+        "telegram_id": telegram_id,
+        "full_name": (full_name or "").strip()[:255],
+    }
+    if action_name:
+        payload.update({
+            "action_type": action_type,
+            "action_name": action_name[:100],
+            "action_payload": (action_payload or "")[:1000],
+        })
+
+    try:
+        status, data = await _post_json(f"{API_BASE_URL}/bot-user/authorize/", payload, budget="access")
     except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
         return {"allowed": False}
+    return data if status == 200 and isinstance(data, dict) else {"allowed": False}
 
 
-async def get_farmers():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/farmers/") as resp:
-            return await resp.json()
+def _page_params(district_id: int | None, page: int | None, page_size: int | None) -> dict:
+    params = {}
+    if district_id:
+        params["district_id"] = district_id
+    if page:
+        params["page"] = page
+        params["page_size"] = page_size or 25
+    return params
 
 
-async def get_contracts_summary(contract_type: str | None = None):
+async def get_districts(contract_type: str | None = None):
     params = {}
     if contract_type:
         params["contract_type"] = contract_type
 
     query = f"?{urlencode(params)}" if params else ""
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/farmers/summary/{query}") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/districts/{query}")
+
+
+async def get_farmers(
+    district_id: int | None = None,
+    page: int | None = None,
+    page_size: int | None = None,
+):
+    """``page`` берилса ``{"results", "has_next", "totals"}``, акс ҳолда тўлиқ рўйхат."""
+    params = _page_params(district_id, page, page_size)
+    query = f"?{urlencode(params)}" if params else ""
+
+    return await _get_json(f"{API_BASE_URL}/farmers/{query}")
+
+
+async def get_farmer_statement(farmer_id: int, after: int | None = None, limit: int = 20):
+    params = {"limit": limit}
+    if after:
+        params["after"] = after
+
+    return await _get_json(f"{API_BASE_URL}/farmers/{farmer_id}/statement/?{urlencode(params)}")
+
+
+async def get_contracts_summary(
+    contract_type: str | None = None,
+    district_id: int | None = None,
+    page: int | None = None,
+    page_size: int | None = None,
+):
+    params = _page_params(district_id, page, page_size)
+    if contract_type:
+        params["contract_type"] = contract_type
+
+    query = f"?{urlencode(params)}" if params else ""
+
+    return await _get_json(f"{API_BASE_URL}/farmers/summary/{query}")
 
 
 async def get_warehouse_totals():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/totals/") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/totals/")
 
 
 async def get_warehouse_receipts():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/receipts/") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/receipts/")
 
 
 async def get_warehouse_expenses():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/expenses/") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/expenses/")
 
 
 async def get_warehouses():
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/list/") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/list/")
 
 
 async def get_warehouse_totals_by_filters(
@@ -84,9 +245,7 @@ async def get_warehouse_totals_by_filters(
 
     query = f"?{urlencode(params)}" if params else ""
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/totals/{query}") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/totals/{query}")
 
 
 async def get_warehouse_products(
@@ -104,18 +263,41 @@ async def get_warehouse_products(
 
     query = f"?{urlencode(params)}" if params else ""
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/products/{query}") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/products/{query}")
 
 
-async def get_warehouse_movements(
+async def get_warehouse_screen(
+    warehouse_id: int,
+    product_id: int,
     movement: str,
+    district_id: int | None = None,
+    page: int = 1,
+    page_size: int = 25,
+):
+    """Омбор ҳаракатлари экрани: номлар, жамланмалар ва битта саҳифа — битта сўровда."""
+    params = {
+        "warehouse_id": warehouse_id,
+        "product_id": product_id,
+        "movement": movement,
+        "page": page,
+        "page_size": page_size,
+        # Свод "бугун" устунига боғлиқ — кун алмашганда кэш калити ҳам алмашади
+        "date": date.today().isoformat(),
+    }
+    if district_id:
+        params["district_id"] = district_id
+
+    return await _get_json(f"{API_BASE_URL}/warehouse/screen/?{urlencode(params)}", budget="report")
+
+
+async def get_warehouse_report(
     warehouse_id: int | None = None,
     product_id: int | None = None,
     district_id: int | None = None,
+    report_date: date | None = None,
 ):
-    params = {"movement": movement}
+    """Свод: туман бўйича бир қатор (бугунги ва жами чиқим) ва жами қатори."""
+    params = {"date": (report_date or date.today()).isoformat()}
     if warehouse_id:
         params["warehouse_id"] = warehouse_id
     if product_id:
@@ -123,11 +305,41 @@ async def get_warehouse_movements(
     if district_id:
         params["district_id"] = district_id
 
-    query = f"?{urlencode(params)}" if params else ""
+    return await _get_json(f"{API_BASE_URL}/warehouse/report/?{urlencode(params)}", budget="report")
+
+
+async def iter_json_stream(url: str):
+    """
+    ``?stream=1`` жавобини қатор-бақатор ўқийди: ҳар бир массив элементи
+    алоҳида қаторда келади, шунинг учун бутун жавоб хотирага йиғилмайди.
+    200 бўлмаган жавоб (хато танаси қатор эмас) ``aiohttp.ClientResponseError`` беради.
+    """
+    session = await api.session()
+    async with session.get(url, timeout=TIMEOUTS["stream"]) as resp:
+        if resp.status != 200:
+            raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status, message=resp.reason or "")
+        async for line in resp.content:
+            line = line.strip().rstrip(b",")
+            if line in (b"", b"[", b"]"):
+                continue
+            yield json.loads(line)
+
+
+def iter_warehouse_movements(
+    movement: str,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    district_id: int | None = None,
+):
+    params = {"movement": movement, "stream": 1}
+    if warehouse_id:
+        params["warehouse_id"] = warehouse_id
+    if product_id:
+        params["product_id"] = product_id
+    if district_id:
+        params["district_id"] = district_id
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/movements/{query}") as resp:
-            return await resp.json()
+    return iter_json_stream(f"{API_BASE_URL}/warehouse/movements/?{urlencode(params)}")
 
 
 async def get_warehouse_expense_districts(warehouse_id: int | None = None):
@@ -137,9 +349,7 @@ async def get_warehouse_expense_districts(warehouse_id: int | None = None):
 
     query = f"?{urlencode(params)}" if params else ""
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"{API_BASE_URL}/warehouse/expense-districts/{query}") as resp:
-            return await resp.json()
+    return await _get_json(f"{API_BASE_URL}/warehouse/expense-districts/{query}")
 
 
 async def log_activity(
@@ -149,7 +359,6 @@ async def log_activity(
     action_type: str = "message",
     is_allowed: bool = True,
 ):
-    timeout = aiohttp.ClientTimeout(total=10)
     payload = {
         "telegram_id": telegram_id,
         "action_type": action_type,
@@ -159,11 +368,28 @@ async def log_activity(
     }
 
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                f"{API_BASE_URL}/bot-user/activity/",
-                json=payload,
-            ):
-                return True
+        status, _ = await _post_json(f"{API_BASE_URL}/bot-user/activity/", payload)
     except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
         return False
+    return status == 200
+
+
+async def log_activity_batch(events: list[dict]) -> bool:
+    try:
+        status, _ = await _post_json(f"{API_BASE_URL}/bot-user/activity/bulk/", {"events": events})
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return False
+    return status == 200
+
+
+# ==========================================
+# 🔹 EMBEDDED ORM BACKEND
+# ==========================================
+
+if API_BACKEND == "orm":
+    # Bot Django билан бир серверда: қайноқ функциялар HTTP ўрнига тўғридан-тўғри
+    # ORM'га мурожаат қилади, қолганлари HTTP орқали қолади
+    from services import orm_backend
+
+    for _name in orm_backend.__all__:
+        globals()[_name] = getattr(orm_backend, _name)
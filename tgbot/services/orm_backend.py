@@ -0,0 +1,269 @@
+"""
+``api_client`` функцияларининг ORM варианти — bot Django билан бир серверда ва
+бир базада ишлаганда (``API_BACKEND=orm``).
+
+HTTP, DRF ва JSON ўрнига ``api.queries`` даги ўша сўров қурувчилари Django async
+ORM орқали чақирилади. Жавоб кўриниши HTTP билан бир хил: Decimal — endpoint
+нима қайтарса шу (сон ёки сатр), сана — ISO сатр. Ўқиш натижалари HTTP'даги
+каби ``read_cache`` орқали бирлаштирилади.
+
+Bot'нинг ``config.py`` си Django'нинг ``config`` пакети билан номдош, шунинг
+учун settings файли бошқа модул номи остида юкланади.
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+from urllib.parse import urlencode
+
+import django
+from config import DJANGO_PROJECT_DIR, DJANGO_SETTINGS_FILE
+from services.read_cache import read_cache
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_MODULE = "bot_django_settings"
+
+
+def setup_django():
+    if DJANGO_PROJECT_DIR not in sys.path:
+        sys.path.insert(0, DJANGO_PROJECT_DIR)
+
+    spec = importlib.util.spec_from_file_location(SETTINGS_MODULE, DJANGO_SETTINGS_FILE)
+    settings_module = importlib.util.module_from_spec(spec)
+    sys.modules[SETTINGS_MODULE] = settings_module
+    spec.loader.exec_module(settings_module)
+
+    os.environ["DJANGO_SETTINGS_MODULE"] = SETTINGS_MODULE
+    django.setup()
+
+
+setup_django()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.db import DatabaseError, close_old_connections  # noqa: E402
+from api import queries  # noqa: E402
+from api.renderers import to_json_types  # noqa: E402
+
+__all__ = [
+    "authorize",
+    "log_activity_batch",
+    "get_districts",
+    "get_farmers",
+    "get_contracts_summary",
+    "get_warehouses",
+    "get_warehouse_totals",
+    "get_warehouse_totals_by_filters",
+    "get_warehouse_products",
+    "get_warehouse_screen",
+    "get_warehouse_report",
+]
+
+
+def _cached(name: str, params: dict, load):
+    async def fresh_load():
+        # Bot'да request_finished йўқ — узилган/эскирган уланишни ўзимиз ёпамиз
+        await sync_to_async(close_old_connections)()
+        return await load()
+
+    key = f"orm:{name}?{urlencode(sorted(params.items()))}"
+    return read_cache.get(key, fresh_load)
+
+
+async def _paginated(rows, totals, page: int, page_size: int):
+    """``paginated_response`` билан бир хил кўриниш."""
+    page, page_size = queries.parse_page({"page": page, "page_size": page_size})
+    start = (page - 1) * page_size
+    rows = await queries.alist(rows[start:start + page_size + 1])
+    return {
+        "page": page,
+        "page_size": page_size,
+        "has_next": len(rows) > page_size,
+        "totals": await totals(),
+        "results": rows[:page_size],
+    }
+
+
+# ==========================================
+# 🔹 BOT USERS
+# ==========================================
+
+async def authorize(
+    telegram_id: int,
+    full_name: str,
+    action_name: str | None = None,
+    action_payload: str = "",
+    action_type: str = "message",
+):
+    action = None
+    if action_name:
+        action = queries.activity_fields({
+            "action_type": action_type,
+            "action_name": action_name,
+            "action_payload": action_payload,
+        })
+    await sync_to_async(close_old_connections)()
+    return await sync_to_async(queries.authorize_bot_user)(telegram_id, full_name, action)
+
+
+async def log_activity_batch(events: list[dict]) -> bool:
+    # HTTP варианти каби: хато буферга False бўлиб қайтади, фон вазифаси тўхтамайди
+    try:
+        await sync_to_async(close_old_connections)()
+        await sync_to_async(queries.record_activities)(events)
+    except (DatabaseError, ValueError):
+        logger.exception("Activity batch was not written")
+        return False
+    return True
+
+
+# ==========================================
+# 🔹 FARMERS / DISTRICTS
+# ==========================================
+
+async def get_districts(contract_type: str | None = None):
+    async def load():
+        return to_json_types(await queries.alist(queries.district_rows(contract_type)), decimal_as_string=False)
+
+    return await _cached("districts", {"contract_type": contract_type or ""}, load)
+
+
+async def get_farmers(
+    district_id: int | None = None,
+    page: int | None = None,
+    page_size: int | None = None,
+):
+    async def load():
+        farmers, rows = queries.farmer_list(district_id)
+        if not page:
+            return to_json_types(await queries.alist(rows))
+
+        async def totals():
+            return await farmers.order_by().aaggregate(**queries.farmer_list_totals())
+
+        return to_json_types(await _paginated(rows, totals, page, page_size or 25))
+
+    return await _cached("farmers", {"district_id": district_id or "", "page": page or "", "page_size": page_size or ""}, load)
+
+
+async def get_contracts_summary(
+    contract_type: str | None = None,
+    district_id: int | None = None,
+    page: int | None = None,
+    page_size: int | None = None,
+):
+    contract_type = queries.contract_type_param({"contract_type": contract_type})
+
+    async def load():
+        rows = queries.farmer_summary_rows(queries.farmer_summary(contract_type, district_id))
+
+        def rename(data):
+            return list(queries.renamed(data, massive="massive_name"))
+
+        if not page:
+            return to_json_types(rename(await queries.alist(rows)))
+
+        async def totals():
+            farmers, contracts, aggregates = queries.farmer_summary_totals(contract_type, district_id)
+            return {"count": await farmers.acount(), **await contracts.aaggregate(**aggregates)}
+
+        data = await _paginated(rows, totals, page, page_size or 25)
+        data["results"] = rename(data["results"])
+        return to_json_types(data)
+
+    params = {"contract_type": contract_type or "", "district_id": district_id or "", "page": page or "", "page_size": page_size or ""}
+    return await _cached("contracts", params, load)
+
+
+# ==========================================
+# 🔹 WAREHOUSE
+# ==========================================
+
+async def get_warehouses():
+    async def load():
+        return await queries.alist(queries.warehouse_rows())
+
+    return await _cached("warehouses", {}, load)
+
+
+async def get_warehouse_totals_by_filters(
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    district_id: int | None = None,
+):
+    async def load():
+        balances, aggregates = queries.stock_totals_query(warehouse_id, product_id, district_id)
+        totals = queries.stock_totals_result(await balances.aaggregate(**aggregates))
+        return to_json_types(totals, decimal_as_string=False)
+
+    params = {"warehouse_id": warehouse_id or "", "product_id": product_id or "", "district_id": district_id or ""}
+    return await _cached("totals", params, load)
+
+
+async def get_warehouse_totals():
+    return await get_warehouse_totals_by_filters()
+
+
+async def get_warehouse_products(
+    warehouse_id: int | None = None,
+    movement: str | None = None,
+    district_id: int | None = None,
+):
+    async def load():
+        rows = await queries.alist(queries.warehouse_product_totals(warehouse_id, district_id))
+        return to_json_types(queries.warehouse_products(rows, movement), decimal_as_string=False)
+
+    params = {"warehouse_id": warehouse_id or "", "movement": movement or "", "district_id": district_id or ""}
+    return await _cached("products", params, load)
+
+
+async def get_warehouse_screen(
+    warehouse_id: int,
+    product_id: int,
+    movement: str,
+    district_id: int | None = None,
+    page: int = 1,
+    page_size: int = 25,
+):
+    params = {
+        "warehouse_id": warehouse_id,
+        "product_id": product_id,
+        "movement": movement,
+        "page": page,
+        "page_size": page_size,
+    }
+    if district_id:
+        params["district_id"] = district_id
+
+    async def load():
+        try:
+            screen = queries.WarehouseScreen(params)
+        except ValueError as error:
+            return {"detail": str(error)}
+        data = await queries.warehouse_screen_data(screen)
+        if data is None:
+            return {"detail": "Омбор топилмади"}
+        return to_json_types(data, decimal_as_string=False)
+
+    return await _cached("screen", params, load)
+
+
+async def get_warehouse_report(
+    warehouse_id=None,
+    product_id=None,
+    district_id=None,
+    report_date=None,
+):
+    params = {
+        "warehouse_id": warehouse_id or "",
+        "product_id": product_id or "",
+        "district_id": district_id or "",
+    }
+    if report_date:
+        params["date"] = report_date.isoformat()
+
+    async def load():
+        return to_json_types(await queries.warehouse_report_data(params), decimal_as_string=False)
+
+    return await _cached("report", params, load)
@@ -0,0 +1,104 @@
+"""
+API ўқиш сўровлари учун бир неча сониялик кэш ва сўровларни бирлаштириш
+(single-flight).
+
+Бир хил URL бир вақтда бир неча марта сўралса API'га битта сўров кетади,
+қолганлар шу сўров натижасини кутади. Натижа ``ttl`` сония сақланади; ёзувлар
+сони чекланган (LRU), хато натижалар сақланмайди. Кэшдаги объектлар умумий —
+уларни ўзгартирманг.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from config import API_READ_CACHE_TTL
+
+
+@dataclass
+class KeyStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+
+class ReadCache:
+    def __init__(self, ttl: float = 5.0, max_entries: int = 256, max_stats: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stats = max_stats
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._stats: OrderedDict[str, KeyStats] = OrderedDict()
+
+    async def get(self, key: str, fetch):
+        """``key`` бўйича қиймат; йўқ бўлса ``fetch()`` (корутина қайтарувчи) чақирилади."""
+        stats = self._key_stats(key)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            stats.coalesced += 1
+        else:
+            stats.misses += 1
+            task = asyncio.create_task(self._load(key, fetch))
+            self._inflight[key] = task
+
+        # Биринчи кутувчи бекор қилинса ҳам сўров бошқалар учун давом этади
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, fetch):
+        try:
+            value = await fetch()
+        except BaseException:
+            self._key_stats(key).errors += 1
+            raise
+        else:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _key_stats(self, key: str) -> KeyStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = KeyStats()
+            while len(self._stats) > self.max_stats:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        return stats
+
+    def invalidate(self, key: str | None = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        keys = {key: asdict(stats) for key, stats in self._stats.items()}
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": sum(stats["hits"] for stats in keys.values()),
+            "misses": sum(stats["misses"] for stats in keys.values()),
+            "coalesced": sum(stats["coalesced"] for stats in keys.values()),
+            "keys": keys,
+        }
+
+
+# Бир хил экранни бир вақтда очган фойдаланувчилар битта API сўровини бўлишади
+read_cache = ReadCache(ttl=API_READ_CACHE_TTL)
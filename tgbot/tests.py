@@ -0,0 +1,260 @@
+"""
+Bot тестлари. Bot'нинг ``config.py`` си Django'нинг ``config`` пакети билан
+номдош, шунинг учун улар tgbot папкасидан алоҳида ишга туширилади:
+
+    cd tgbot && python -m unittest tests
+"""
+
+import asyncio
+import importlib.util
+import os
+import socket
+import unittest
+from unittest import mock
+
+import aiohttp
+from aiohttp import web
+
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_config = importlib.util.find_spec("config")
+if _config is None or os.path.dirname(os.path.abspath(_config.origin)) != BOT_DIR:
+    raise unittest.SkipTest("bot тестлари tgbot папкасидан ишга туширилади")
+
+from middlewares import access  # noqa: E402
+from services import access_events  # noqa: E402
+from services import activity_log as activity_log_module  # noqa: E402
+from services import api_client  # noqa: E402
+from services.activity_log import ActivityBuffer  # noqa: E402
+
+
+class ActivityBufferTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sent = []
+
+        async def log_activity_batch(events):
+            self.sent.extend(events)
+            return True
+
+        original = activity_log_module.log_activity_batch
+        activity_log_module.log_activity_batch = log_activity_batch
+        self.addCleanup(setattr, activity_log_module, "log_activity_batch", original)
+
+    async def test_stop_while_collecting_sends_batch(self):
+        buffer = ActivityBuffer(batch_size=100, flush_interval=2.0)
+        await buffer.start()
+        for index in range(5):
+            buffer.add(1, f"action-{index}")
+
+        # Фон вазифаси тўпламни олди ва flush_interval ичида кутмоқда
+        await asyncio.sleep(0.1)
+        self.assertTrue(buffer.queue.empty())
+
+        await buffer.stop()
+        self.assertEqual([event["action_name"] for event in self.sent], [f"action-{index}" for index in range(5)])
+
+    async def test_stop_sends_queued_events(self):
+        buffer = ActivityBuffer(batch_size=2)
+        for index in range(5):
+            buffer.add(1, f"action-{index}")
+
+        await buffer.stop()
+        self.assertEqual(len(self.sent), 5)
+
+    async def test_full_queue_drops_oldest(self):
+        buffer = ActivityBuffer(max_pending=3)
+        for index in range(5):
+            buffer.add(1, f"action-{index}")
+
+        await buffer.stop()
+        self.assertEqual(buffer.dropped, 2)
+        self.assertEqual([event["action_name"] for event in self.sent], ["action-2", "action-3", "action-4"])
+
+    async def test_orm_database_error_keeps_flusher_running(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        try:
+            from services import orm_backend
+        except ImproperlyConfigured as error:
+            # ORM backend Django settings'ини юклайди — база драйвери керак
+            self.skipTest(f"Django ORM backend юкланмади: {error}")
+        from django.db import OperationalError
+
+        calls = []
+
+        def record_activities(events):
+            calls.append([event["action_name"] for event in events])
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection")
+
+        with (
+            mock.patch.object(orm_backend, "close_old_connections", lambda: None),
+            mock.patch.object(orm_backend.queries, "record_activities", record_activities),
+            mock.patch.object(activity_log_module, "log_activity_batch", orm_backend.log_activity_batch),
+            self.assertLogs("services.orm_backend", "ERROR"),
+        ):
+            buffer = ActivityBuffer(batch_size=1, flush_interval=0.01)
+            await buffer.start()
+            buffer.add(1, "lost")
+            await asyncio.sleep(0.1)
+            buffer.add(1, "written")
+            await asyncio.sleep(0.1)
+
+            self.assertFalse(buffer._task.done())
+            await buffer.stop()
+
+        self.assertEqual(calls, [["lost"], ["written"]])
+
+
+class AccessCacheTest(unittest.TestCase):
+    def tearDown(self):
+        access.set_push_enabled(False)
+        access.forget_access(1)
+
+    def _ttl(self):
+        with mock.patch("middlewares.access.time.monotonic", return_value=1000.0):
+            access.remember_access(1, True)
+        return access._access_cache[1][0] - 1000.0
+
+    def test_allow_ttl_depends_on_push_endpoint(self):
+        self.assertEqual(self._ttl(), access.ALLOW_TTL_WITHOUT_PUSH)
+        access.set_push_enabled(True)
+        self.assertEqual(self._ttl(), access.ALLOW_TTL)
+
+
+class AccessRequiredTest(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        access.forget_access(1)
+
+    async def test_cache_miss_logs_action_in_authorize_only(self):
+        from aiogram.types import Message
+
+        calls = []
+
+        async def authorize(**kwargs):
+            calls.append(kwargs)
+            return {"allowed": True, "created": False}
+
+        async def start(event):
+            return "handled"
+
+        user = mock.Mock(id=1, full_name="Test")
+        event = mock.AsyncMock(spec=Message, text="/start", from_user=user)
+
+        with (
+            mock.patch.object(access, "authorize", authorize),
+            mock.patch.object(access.activity_log, "add") as add,
+        ):
+            handler = access.access_required(start)
+            self.assertEqual(await handler(event), "handled")
+            add.assert_not_called()
+            # Кэшдан жавоб — ҳаракат фақат буфер орқали ёзилади
+            self.assertEqual(await handler(event), "handled")
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((calls[0]["action_name"], calls[0]["action_payload"]), ("start", "/start"))
+        add.assert_called_once_with(
+            telegram_id=1, action_name="start", action_payload="/start", action_type="message", is_allowed=True
+        )
+
+
+class AccessEventsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_busy_port_fails_startup(self):
+        with socket.socket() as busy:
+            busy.bind(("127.0.0.1", 0))
+            busy.listen()
+            port = busy.getsockname()[1]
+
+            with (
+                mock.patch.object(access_events, "ACCESS_PUSH_SECRET", "secret"),
+                mock.patch.object(access_events, "ACCESS_PUSH_HOST", "127.0.0.1"),
+                mock.patch.object(access_events, "ACCESS_PUSH_PORT", port),
+                self.assertLogs("services.access_events", "ERROR"),
+                self.assertRaises(OSError),
+            ):
+                await access_events.start_access_events()
+
+        self.assertIsNone(access_events._runner)
+        self.assertEqual(self._allow_ttl(), access.ALLOW_TTL_WITHOUT_PUSH)
+
+    def _allow_ttl(self):
+        with mock.patch("middlewares.access.time.monotonic", return_value=1000.0):
+            access.remember_access(2, True)
+        try:
+            return access._access_cache[2][0] - 1000.0
+        finally:
+            access.forget_access(2)
+
+
+class JsonStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def rows(request):
+            if request.query.get("fail"):
+                return web.json_response({"detail": "Омбор топилмади"}, status=404)
+            return web.Response(body=b'[\n{"id":1},\n{"id":2}\n]\n', content_type="application/json")
+
+        app = web.Application()
+        app.router.add_get("/rows/", rows)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}/rows/"
+
+    async def asyncTearDown(self):
+        await api_client.api.close()
+        await self.runner.cleanup()
+
+    async def test_rows_are_read_line_by_line(self):
+        self.assertEqual([row async for row in api_client.iter_json_stream(self.url)], [{"id": 1}, {"id": 2}])
+
+    async def test_error_status_is_raised_not_yielded(self):
+        with self.assertRaises(aiohttp.ClientResponseError) as raised:
+            [row async for row in api_client.iter_json_stream(self.url + "?fail=1")]
+        self.assertEqual(raised.exception.status, 404)
+
+    async def test_receipts_excel_is_written_from_stream(self):
+        try:
+            import openpyxl
+            from excel_export import warehouse_receipts_to_excel
+        except ImportError as error:
+            self.skipTest(f"Excel кутубхоналари ўрнатилмаган: {error}")
+
+        rows = api_client.iter_json_stream(self.url)
+        buffer = await warehouse_receipts_to_excel(({**row, "quantity": "5.00"} async for row in rows))
+
+        worksheet = openpyxl.load_workbook(buffer).active
+        self.assertEqual([row[0] for row in worksheet.iter_rows(min_row=2, values_only=True)], [1, 2])
+
+
+class ReadCacheErrorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = 0
+
+        async def warehouses(request):
+            self.requests += 1
+            if self.requests == 1:
+                return web.json_response({"detail": "Server error"}, status=500)
+            return web.json_response([{"id": 1, "name": "Main"}])
+
+        app = web.Application()
+        app.router.add_get("/warehouse/list/", warehouses)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}/warehouse/list/"
+
+    async def asyncTearDown(self):
+        api_client.read_cache.invalidate(self.url)
+        await api_client.api.close()
+        await self.runner.cleanup()
+
+    async def test_error_response_is_not_cached(self):
+        self.assertEqual(await api_client._get_json(self.url), {"detail": "Server error"})
+        self.assertEqual(await api_client._get_json(self.url), [{"id": 1, "name": "Main"}])
+        self.assertEqual(self.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
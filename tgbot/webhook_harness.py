@@ -0,0 +1,126 @@
+"""
+Webhook қабул қилиш йўлини синтетик Telegram update'лари билан ўлчайди.
+
+Харнесс ўз процессида webhook серверини кўтаради: ``SimpleRequestHandler``,
+``ConcurrencyLimitMiddleware`` ва ҳақиқий handler'лар ўрнида ``--work-ms``
+кутадиган stub handler. Ҳақиқий bot, API ва базага сўров кетмайди — синтетик
+telegram_id'лар ``BotUser`` бўлиб ёзилмайди.
+
+    python webhook_harness.py --updates 1000 --concurrency 50 --limit 32 --work-ms 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import secrets
+import statistics
+import time
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from config import WEBHOOK_PATH
+from middlewares.concurrency import ConcurrencyLimitMiddleware
+
+TEXTS = ("/start", "📋 Фермерлар", "🏠 Асосий меню")
+
+
+def synthetic_update(update_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Test {user_id}"},
+            "text": text,
+        },
+    }
+
+
+def stub_dispatcher(limit: int, work_ms: float) -> tuple[Dispatcher, dict]:
+    """Bot'даги каби чекланган dispatcher; handler фақат ``work_ms`` кутади."""
+    dp = Dispatcher()
+    dp.update.outer_middleware(ConcurrencyLimitMiddleware(limit))
+    state = {"active": 0, "peak": 0, "handled": 0}
+
+    @dp.message()
+    async def handle(message: Message):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(work_ms / 1000)
+        finally:
+            state["active"] -= 1
+            state["handled"] += 1
+
+    return dp, state
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20, help="параллел POST'лар")
+    parser.add_argument("--limit", type=int, default=32, help="MAX_CONCURRENT_UPDATES")
+    parser.add_argument("--work-ms", type=float, default=20, help="stub handler иш вақти")
+    parser.add_argument("--users", type=int, default=50, help="турли telegram_id сони")
+    args = parser.parse_args()
+
+    secret = secrets.token_urlsafe(16)
+    dp, state = stub_dispatcher(args.limit, args.work_ms)
+    # Токен фақат формат учун — stub handler Telegram'га сўров юбормайди
+    bot = Bot(token="123456:harness")
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}{WEBHOOK_PATH}"
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    texts = itertools.cycle(TEXTS)
+    latencies, statuses = [], {}
+
+    try:
+        async with aiohttp.ClientSession(headers={"X-Telegram-Bot-Api-Secret-Token": secret}) as session:
+            async with session.post(url, json=synthetic_update(0, 1, "/start"), headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}) as resp:
+                print(f"wrong secret: {resp.status}")
+
+            async def post(update_id: int):
+                update = synthetic_update(update_id, 10_000 + update_id % args.users, next(texts))
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        async with session.post(url, json=update) as resp:
+                            await resp.read()
+                            status = resp.status
+                    except aiohttp.ClientError as error:
+                        status = type(error).__name__
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(post(update_id) for update_id in range(1, args.updates + 1)))
+            accepted = time.perf_counter() - started
+
+            while state["handled"] < args.updates and time.perf_counter() - started < 60:
+                await asyncio.sleep(0.01)
+            handled = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+
+    latencies.sort()
+    print(f"accepted updates/s: {args.updates / accepted:.1f}")
+    print(f"handled updates/s: {state['handled'] / handled:.1f}  peak in handlers: {state['peak']} (limit {args.limit})")
+    print(f"p50 ms: {statistics.median(latencies):.1f}  p95 ms: {latencies[int(len(latencies) * 0.95) - 1]:.1f}")
+    print(f"statuses: {statuses}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())